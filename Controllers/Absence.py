@@ -1,24 +1,48 @@
 import datetime
 from PyQt5.QtWidgets import QMessageBox
-from sqlalchemy import and_, extract, func, case
-from Controllers.EmployeController import EmployeeController
+from sqlalchemy import extract, func, case
 from Models import Employe
 from Models.Absence import Absence
 from Controllers.BaseController import BaseControllerWithHistory
+from Controllers.schedule_index import Interval, ScheduleIndex
+from Controllers.table_filter import compile_table_filter, paginate
+
+# Mois affichés dans le tableau de consultation (colonne « الشهر »)
+MONTHS_AR = {
+    1: "جانفي", 2: "فيفري", 3: "مارس", 4: "أفريل", 5: "ماي", 6: "جوان",
+    7: "جويلية", 8: "أوت", 9: "سبتمبر", 10: "أكتوبر", 11: "نوفمبر", 12: "ديسمبر",
+}
 
 class AbsenceController(BaseControllerWithHistory):
     def __init__(self, db_session, current_user_account_number=None):
         super().__init__(db_session, current_user_account_number)
         self.session = db_session
+        # Périodes en conflit trouvées par la dernière vérification (pour le message affiché)
+        self.last_conflicts = []
+
+    def find_conflicts(self, idemploye, DateDebut, DateFin, absence_id=None, schedule=None):
+        """
+        Périodes de l'employé (absences, tranches de congé, départs temporaires, formations)
+        qui chevauchent [DateDebut, DateFin]
+
+        schedule: ScheduleIndex chargé une fois pour la session d'édition, construit sinon
+        """
+        if schedule is None:
+            schedule = ScheduleIndex(self.session, [idemploye])
+        exclude = ("absence", absence_id) if absence_id is not None else None
+        self.last_conflicts = schedule.conflicts(idemploye, DateDebut, DateFin, exclude=exclude)
+        return self.last_conflicts
+
     def save_absence_for_employee(self, Type, DateDebut, DateFin, Raison,
                               NumeroDecision=None, DateDecision=None, Raison2=None,
-                              idemploye=None, name=None, lastname=None):
-
-        employe_controller = EmployeeController(self.session, self.current_user_account_number)
+                              idemploye=None, name=None, lastname=None, schedule=None):
 
-    # Get employee name for logging
-        employee = self.session.query(Employe).filter(Employe.idemploye == idemploye).first()
-        employee_name = f"{employee.Prenom} {employee.Nom}" if employee else f"رقم {idemploye}"
+    # Employee name for logging: as selected in the form, otherwise looked up by id
+        if name and lastname:
+            employee_name = f"{name} {lastname}"
+        else:
+            employee = self.session.get(Employe, idemploye)
+            employee_name = f"{employee.Prenom} {employee.Nom}" if employee else f"رقم {idemploye}"
 
     # Clean input data
         Type = Type.strip() if Type else ''
@@ -26,11 +50,9 @@ class AbsenceController(BaseControllerWithHistory):
         NumeroDecision = NumeroDecision.strip() if NumeroDecision else None
         Raison2 = Raison2.strip() if Raison2 else None
 
-    # Check for overlapping absences
-        overlapping_absence = self.session.query(Absence).filter(
-          Absence.idemploye == idemploye,
-          and_(Absence.DateDebut <= DateFin, Absence.DateFin >= DateDebut)
-        ).first()
+    # Check for overlapping periods (absences, leave tranches, departures, trainings)
+        if self.find_conflicts(idemploye, DateDebut, DateFin, schedule=schedule):
+            return "overlapping_absence"
 
     # Calculate absence duration
         duration = (DateFin - DateDebut).days + 1
@@ -48,9 +70,9 @@ class AbsenceController(BaseControllerWithHistory):
        )
 
         self.session.add(absence)
-        self.session.commit()
+        self.session.flush()  # Flush to get the absence ID
 
-    # Log successful creation
+    # Log successful creation (written by the same commit)
         decision_info = f" - قرار رقم: {NumeroDecision}" if NumeroDecision else ""
         decision_date_info = f" - تاريخ القرار: {DateDecision.strftime('%Y-%m-%d')}" if DateDecision else ""
         reason2_info = f" - السبب الثاني: {Raison2}" if Raison2 else ""
@@ -59,58 +81,99 @@ class AbsenceController(BaseControllerWithHistory):
            event="إضافة غياب جديد",
            details=f"تم إضافة غياب للموظف: {employee_name} - النوع: {Type} - من {DateDebut.strftime('%Y-%m-%d')} إلى {DateFin.strftime('%Y-%m-%d')} - المدة: {duration} يوم - السبب: {Raison}{decision_info}{decision_date_info}{reason2_info}",
            gestion="إدارة الغيابات",
+           in_transaction=True,
            employee_id=idemploye,
            absence_id=absence.idAbsence
       )
 
+        self.session.commit()
+        if schedule is not None:
+            schedule.add(idemploye, Interval(DateDebut, DateFin, "absence", absence.idAbsence, Type))
+
         return "success"
 
+    # Libellés des colonnes du tableau de consultation -> expressions SQL filtrées
+    FILTER_COLUMNS = {
+        "رقم الغياب": Absence.idAbsence,
+        "السنة": func.year(Absence.DateDebut),
+        "الشهر": case(MONTHS_AR, value=func.month(Absence.DateDebut), else_=""),
+        "رقم الموظف": Employe.idemploye,
+        "اللقب": Employe.Prenom,
+        "الاسم": Employe.Nom,
+        "نوع الغياب": Absence.Type,
+        "رقم القرار": Absence.NumeroDecision,
+        "تاريخ القرار": Absence.DateDecision,
+        "تاريخ البداية": Absence.DateDebut,
+        "تاريخ النهاية": Absence.DateFin,
+        "سبب الغياب": func.coalesce(func.nullif(Absence.Raison, ""), Absence.Raison2),
+    }
+
+    def _absences_query(self):
+        return (
+            self.session.query(
+                Absence.idAbsence.label("idAbsence"),
+                Absence.Type.label("Type"),
+                Absence.NumeroDecision.label("NumeroDecision"),
+                Absence.DateDecision.label("DateDecision"),
+                Absence.DateDebut.label("DateDebut"),
+                Absence.DateFin.label("DateFin"),
+                Absence.Raison.label("Raison"),
+                Absence.Raison2.label("Raison2"),
+                Employe.idemploye.label("idemploye"),
+                Employe.Nom.label("nom"),
+                Employe.Prenom.label("prenom"),
+            )
+            .join(Employe, Absence.idemploye == Employe.idemploye)
+        )
+
+    @staticmethod
+    def _absence_rows(results):
+        return [
+            {
+                "idAbsence": row.idAbsence,
+                "Type": row.Type,
+                "NumeroDecision": row.NumeroDecision,
+                "DateDecision": row.DateDecision,
+                "DateDebut": row.DateDebut,
+                "DateFin": row.DateFin,
+                "Raison": row.Raison,
+                "Raison2": row.Raison2,
+                "idemploye": row.idemploye,
+                "nom": row.nom,
+                "prenom": row.prenom,
+            }
+            for row in results
+        ]
+
     def load_absences_with_employee_names(self):
         """Load all absences with employee names and history logging"""
         try:
-            results = (
-                self.session.query(
-                    Absence.idAbsence.label("idAbsence"),
-                    Absence.Type.label("Type"),
-                    Absence.NumeroDecision.label("NumeroDecision"),
-                    Absence.DateDecision.label("DateDecision"),
-                    Absence.DateDebut.label("DateDebut"),
-                    Absence.DateFin.label("DateFin"),
-                    Absence.Raison.label("Raison"),
-                    Absence.Raison2.label("Raison2"),
-                    Employe.idemploye.label("idemploye"),
-                    Employe.Nom.label("nom"),
-                    Employe.Prenom.label("prenom"),
-                )
-                .join(Employe, Absence.idemploye == Employe.idemploye)
-                .all()
-            )
-
-            table_data = []
-            for row in results:
-                table_data.append({
-                    "idAbsence": row.idAbsence,
-                    "Type": row.Type,
-                    "NumeroDecision": row.NumeroDecision,
-                    "DateDecision": row.DateDecision,
-                    "DateDebut": row.DateDebut,
-                    "DateFin": row.DateFin,
-                    "Raison": row.Raison,
-                    "Raison2": row.Raison2,
-                    "idemploye": row.idemploye,
-                    "nom": row.nom,
-                    "prenom": row.prenom,
-                })
-
-
-            return table_data
+            return self._absence_rows(self._absences_query().all())
 
         except Exception as e:
             print(f"Error loading absences: {e}")
             return []
 
+    def get_absences_page(self, table_filter=None, page=1, page_size=10):
+        """
+        One page of absences matching the table filter, filtered and paginated in SQL
+
+        Returns:
+            Tuple (rows, total) - rows: same dictionaries as load_absences_with_employee_names
+        """
+        try:
+            query = self._absences_query()
+            condition = compile_table_filter(table_filter, self.FILTER_COLUMNS)
+            if condition is not None:
+                query = query.filter(condition)
+            rows, total = paginate(query.order_by(Absence.idAbsence), page, page_size)
+            return self._absence_rows(rows), total
+        except Exception as e:
+            print(f"Error getting absences page: {e}")
+            return [], 0
+
     def update_absence(self, absence_id, Type, DateDebut, DateFin, Raison,
-                       NumeroDecision=None, DateDecision=None, Raison2=None):
+                       NumeroDecision=None, DateDecision=None, Raison2=None, schedule=None):
         """Update absence with comprehensive history logging"""
         try:
             absence = self.session.query(Absence).filter_by(idAbsence=absence_id).first()
@@ -131,15 +194,9 @@ class AbsenceController(BaseControllerWithHistory):
             old_reason2 = absence.Raison2
             old_duration = (old_end - old_start).days + 1
 
-            # Check overlapping absences for this employee, excluding current record
-            overlapping_absence = self.session.query(Absence).filter(
-                Absence.idemploye == absence.idemploye,
-                Absence.idAbsence != absence_id,
-                Absence.DateDebut <= DateFin,
-                Absence.DateFin >= DateDebut
-            ).first()
-
-
+            # Check overlapping periods for this employee, excluding current record
+            if self.find_conflicts(absence.idemploye, DateDebut, DateFin, absence_id=absence_id, schedule=schedule):
+                return "overlapping_absence"
 
             # Track changes
             changes = []
@@ -177,18 +234,20 @@ class AbsenceController(BaseControllerWithHistory):
             absence.Raison = Raison.strip() if Raison else None
             absence.Raison2 = Raison2.strip() if Raison2 else None
 
-            self.session.commit()
-
-            # Log successful update
+            # Log successful update (written by the same commit)
             if changes:
                 self.log_history(
                     event="تحديث غياب",
                     details=f"تم تحديث الغياب رقم {absence_id} للموظف: {employee_name} - التغييرات: {' | '.join(changes)}",
                     gestion="إدارة الغيابات",
+                    in_transaction=True,
                     absence_id=absence_id,
                     employee_id=absence.idemploye
                 )
 
+            self.session.commit()
+            if schedule is not None:
+                schedule.replace(absence.idemploye, Interval(DateDebut, DateFin, "absence", absence_id, absence.Type))
 
             return "success"
 
@@ -196,8 +255,8 @@ class AbsenceController(BaseControllerWithHistory):
             self.session.rollback()
             return "db_error"
 
-    def delete_absence(self, absence_id):
-        """Delete absence with comprehensive history logging"""
+    def delete_absence(self, absence_id, schedule=None):
+        """Delete absence with comprehensive history logging (schedule: edit-session index)"""
         try:
             absence = self.session.query(Absence).filter_by(idAbsence=absence_id).first()
             
@@ -213,19 +272,21 @@ class AbsenceController(BaseControllerWithHistory):
             reason = absence.Raison
             employee_id = absence.idemploye
 
-            # Delete the absence
-            self.session.delete(absence)
-            self.session.commit()
-
-            # Log successful deletion
+            # Log successful deletion (same commit, the deleted absence is only named in the details)
             self.log_history(
                 event="حذف غياب",
                 details=f"تم حذف الغياب رقم {absence_id} للموظف: {employee_name} - النوع: {absence_type} - من {start_date} إلى {end_date} - المدة: {duration} يوم - السبب: {reason}",
                 gestion="إدارة الغيابات",
-                absence_id=absence_id,
+                in_transaction=True,
                 employee_id=employee_id
             )
 
+            # Delete the absence
+            self.session.delete(absence)
+            self.session.commit()
+            if schedule is not None:
+                schedule.remove(employee_id, "absence", absence_id)
+
             return True
 
         except Exception as e:
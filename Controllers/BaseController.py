@@ -1,16 +1,60 @@
+import itertools
 from Controllers.history_controller import HistoryController
+from datetime import datetime
+from Controllers.history_writer import HistoryWriter
+from Models import History
 
 class BaseControllerWithHistory:
     """
     Classe de base pour tous les contrôleurs qui doivent enregistrer l'historique
     """
+    # Paramètres de log_history -> colonnes de la table history
+    HISTORY_RELATION_COLUMNS = {
+        'employee_id': 'idemploye',
+        'formation_id': 'idFormation',
+        'conge_id': 'idConge',
+        'tranche_id': 'idTranche',
+        'evaluation_id': 'idEvaluation',
+        'absence_id': 'idAbsence',
+    }
+
+    # Événements de consultation (recherches déclenchées à la frappe, validation de formulaire...)
+    READ_EVENTS = frozenset({
+        "البحث عن موظفين بالاسم",
+        "البحث عن موظف بالاسم الكامل",
+    })
+
+    # Politique d'audit des lectures :
+    #   "log"       : une entrée par lecture
+    #   "sample"    : une lecture sur READ_SAMPLE_EVERY
+    #   "aggregate" : une entrée de synthèse par événement et par session (voir HistoryWriter)
+    #   "drop"      : aucune entrée
+    # Les modifications sont toujours journalisées.
+    READ_AUDIT_POLICIES = ("log", "sample", "aggregate", "drop")
+    read_audit_policy = "aggregate"
+    READ_SAMPLE_EVERY = 20
+    _read_counter = itertools.count()
+
     def __init__(self, db_session, current_user_account_number=None, gestion_module="النظام"):
         self.session = db_session
         self.current_user_account_number = current_user_account_number
         self.gestion_module = gestion_module  # NOUVEAU : Module de gestion par défaut
         self.history_controller = HistoryController(db_session)
     
-    def log_history(self, event, details, gestion=None, **kwargs):
+    @classmethod
+    def set_read_audit_policy(cls, policy, sample_every=None):
+        """Change la politique d'audit des lectures (pour cette classe et ses sous-classes)"""
+        if policy not in cls.READ_AUDIT_POLICIES:
+            raise ValueError(f"Politique d'audit inconnue: {policy}")
+        cls.read_audit_policy = policy
+        if sample_every is not None:
+            cls.READ_SAMPLE_EVERY = max(1, int(sample_every))
+
+    def is_read_event(self, event):
+        """True si l'événement est une simple consultation (aucune donnée modifiée)"""
+        return event in self.READ_EVENTS
+
+    def log_history(self, event, details, gestion=None, in_transaction=False, read=None, **kwargs):
         """
         Enregistre une entrée dans l'historique
        
@@ -18,28 +62,66 @@ class BaseControllerWithHistory:
             event: Type d'événement
             details: Détails de l'événement
             gestion: Module de gestion (optionnel, utilise celui par défaut si non fourni)
+            in_transaction: Si True, l'entrée est ajoutée à la session de l'appelant et
+                sera écrite par son commit (à appeler AVANT le commit de l'opération).
+                Ne pas lier une entité supprimée dans la même transaction (clé étrangère).
+            read: True pour une consultation, soumise à read_audit_policy
+                (par défaut : événement présent dans READ_EVENTS)
             **kwargs: IDs optionnels des entités liées (employee_id, formation_id, etc.)
         """
-        print(f"DEBUG - log_history appelé: event={event}, user={self.current_user_account_number}")
         if self.current_user_account_number:
             try:
-                print(f"DEBUG - Tentative d'enregistrement dans l'historique...")
+                user_id = self.get_current_user_id()
+                if user_id is None:
+                    print(f"Erreur: Utilisateur avec account_number {self.current_user_account_number} non trouvé")
+                    return
+
                 # Utiliser la gestion fournie ou celle par défaut
                 target_gestion = gestion if gestion else self.gestion_module
-                
+
+                if read is None:
+                    read = self.is_read_event(event)
+                if read and not in_transaction:
+                    policy = self.read_audit_policy
+                    if policy == "drop":
+                        return
+                    if policy == "sample" and next(self._read_counter) % self.READ_SAMPLE_EVERY:
+                        return
+                    if policy == "aggregate":
+                        HistoryWriter.for_session(self.session).record_read(user_id, event, target_gestion)
+                        return
+
                 # Ajouter les IDs des entités liées si fournis
-                result = self.history_controller.add_history_entry_with_relations(
-                    user_account_number=self.current_user_account_number,
-                    event=event,
-                    details=details,
-                    gestion=target_gestion,  # NOUVEAU : Inclure la gestion
-                    **kwargs
+                relations = {
+                    column: kwargs.get(name)
+                    for name, column in self.HISTORY_RELATION_COLUMNS.items()
+                }
+
+                if in_transaction:
+                    # Même unité de travail que l'opération : un seul commit, rien n'est perdu
+                    self.session.add(History(
+                        user_id=user_id,
+                        event=event,
+                        details=details,
+                        gestion=target_gestion,
+                        timestamp=datetime.now(),
+                        **relations
+                    ))
+                    return
+
+                # Mise en file d'attente : l'INSERT groupé est fait par le HistoryWriter
+                HistoryWriter.for_session(self.session).enqueue(
+                    user_id, event, details, target_gestion, **relations
                 )
-                print(f"DEBUG - Résultat enregistrement: {result}")
             except Exception as e:
                 print(f"Erreur lors de l'enregistrement de l'historique: {e}")
         else:
             print("DEBUG - Aucun utilisateur actuel défini, historique non enregistré")
+
+    def get_current_user_id(self):
+        """Retourne users.id de l'utilisateur actuel (résolu via le cache d'identité de l'historique)"""
+        user_id, _ = self.history_controller.resolve_user(self.current_user_account_number)
+        return user_id
     
     def set_current_user(self, user_account_number):
         """Met à jour l'utilisateur actuel"""
@@ -51,4 +133,5 @@ class BaseControllerWithHistory:
     
     def get_module_history(self, limit=None):
         """NOUVEAU : Récupère l'historique du module actuel"""
+        HistoryWriter.flush_all()
         return self.history_controller.get_history_by_gestion(self.gestion_module, limit)
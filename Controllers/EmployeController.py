@@ -1,12 +1,143 @@
+import threading
+from collections import OrderedDict
 from Models.Employe import Employe
 from Models.Carriere import Carriere
 from Models.Permanent import Permanent
 from Models.Contractuel import Contractuel
-from sqlalchemy import or_, and_
+import re
+from sqlalchemy import exists, select, union_all, literal, func
+from sqlalchemy.dialects.mysql import match
 from Models.DepartDefinitif import DepartDefinitif 
 from Controllers.BaseController import BaseControllerWithHistory
+from Controllers.stats_controller import apply_employee_change, bump_data_version, employee_statistics_keys, get_data_version
+from Controllers.table_filter import FilterField, compile_field_filters
+
+# Cache LRU (Nom, Prenom) -> idemploye, vidé quand la version des données change
+NAME_RESOLUTION_CACHE_SIZE = 1024
+_name_resolution_cache = OrderedDict()
+_name_resolution_version = None
+_name_resolution_lock = threading.Lock()
+
+# Tables des sous-types (colonnes de table : indépendantes de la jointure polymorphique)
+_permanents = Permanent.__table__
+_contractuels = Contractuel.__table__
+
+
+def active_employee_clause(employee_id_column=Employe.idemploye):
+    """
+    Condition SQL vraie pour les employés sans départ définitif
+
+    NOT EXISTS sur la table departs_definitifs (sans passer par le mapper
+    polymorphique Depart), réutilisable par tous les contrôleurs.
+
+    Args:
+        employee_id_column: Colonne portant l'identifiant de l'employé dans la requête appelante
+    """
+    departs_definitifs = DepartDefinitif.__table__
+    return ~exists().where(departs_definitifs.c.idemploye == employee_id_column)
+
+
+def resolve_employee_id(session, name, lastname):
+    """
+    ID de l'employé ayant ce prénom (name) et ce nom (lastname), None si inconnu
+
+    Une seule requête sur l'index (Nom, Prenom), servie ensuite depuis un cache LRU
+    tant qu'aucun employé n'est modifié (bump_data_version). Seuls les employés
+    trouvés sont mis en cache.
+    """
+    global _name_resolution_version
+    name = name.strip() if name else ""
+    lastname = lastname.strip() if lastname else ""
+    if not name or not lastname:
+        return None
+
+    key = (lastname, name)
+    version = get_data_version()
+    with _name_resolution_lock:
+        if _name_resolution_version != version:
+            _name_resolution_cache.clear()
+            _name_resolution_version = version
+        elif key in _name_resolution_cache:
+            _name_resolution_cache.move_to_end(key)
+            return _name_resolution_cache[key]
+
+    employee_id = session.execute(
+        select(Employe.idemploye)
+        .where(Employe.Nom == lastname, Employe.Prenom == name)
+        .order_by(Employe.idemploye)
+        .limit(1)
+    ).scalar()
+
+    if employee_id is not None:
+        with _name_resolution_lock:
+            if _name_resolution_version == version:
+                _name_resolution_cache[key] = employee_id
+                if len(_name_resolution_cache) > NAME_RESOLUTION_CACHE_SIZE:
+                    _name_resolution_cache.popitem(last=False)
+    return employee_id
+
 
 class EmployeeController(BaseControllerWithHistory):
+    # Clés de tri acceptées par get_employees_page
+    SORT_COLUMNS = {
+        "id": Employe.idemploye,
+        "nom": Employe.Nom,
+        "prenom": Employe.Prenom,
+        "date_naissance": Employe.Datedenaissance,
+        "poste": Carriere.Nomposte,
+        "dependency": Carriere.dependency,
+        "service": Carriere.service,
+        "effective_date": Carriere.effectiveDate,
+    }
+
+    # Critères de filter_employees (libellés de la fenêtre de filtre) -> champ filtré
+    # Les colonnes de Carriere sont déjà jointes par la requête de base.
+    FILTER_FIELDS = {
+        "رقم الموظف": FilterField(Employe.idemploye, "exact", convert=int),
+        "التفعيل": FilterField(Employe.Statut, "exact", convert=lambda value: value == "مفعل"),
+        # Nom : préfixe, sur l'index (Nom, Prenom)
+        "اللقب": FilterField(Employe.Nom, "prefix"),
+        "الاسم": FilterField(Employe.Prenom, "contains"),
+        "لقب الزوج ": FilterField(Employe.NomEpoux, "contains"),
+        "تاريخ الميلاد": FilterField(Employe.Datedenaissance, "range"),
+        "ولاية الميلاد": FilterField(Employe.Lieudenaissance, "contains"),
+        "الجنس": FilterField(Employe.Sexe, "exact"),
+        " الوضعية العائلية": FilterField(Employe.Statutfamilial, "exact"),
+        " الوضعية تجاه الخدمة الوطنية": FilterField(Employe.Servicesnationale, "exact"),
+        "طبيعة علاقة العمل (موظف عون متعاقد)": FilterField(
+            Employe.type, "exact", convert=lambda value: "permanent" if value == "موظف" else "contractuel"
+        ),
+        "الشهادة التي تم على أساسهاالتوظيف الأصلي": FilterField(Carriere.Dipinitial, "contains", "carriere"),
+        "الشهادة الحالية ": FilterField(Carriere.Dipactuel, "contains", "carriere"),
+        "رتبة التوظيف الأصلي": FilterField(Carriere.GRec, "contains", "carriere"),
+        "الرتبة أو منصب الشغل الحالي ": FilterField(Carriere.Nomposte, "contains", "carriere"),
+        "الصنف الحالي ": FilterField(Carriere.current_class, "contains", "carriere"),
+        "تاريخ المفعول ": FilterField(Carriere.effectiveDate, "range", "carriere"),
+        "التبعية": FilterField(Carriere.dependency, "contains", "carriere"),
+        "المصلحة": FilterField(Carriere.service, "contains", "carriere"),
+        # Degré des titulaires, pourcentage des contractuels
+        "الدرجة الحالية": (
+            FilterField(_permanents.c.current_degree, "exact", "permanent", convert=int),
+            FilterField(_contractuels.c.percentage, "contains", "contractuel"),
+        ),
+    }
+
+    # Relations des sous-types : EXISTS corrélé sur leur index unique idemploye
+    FILTER_JOINS = {
+        "permanent": lambda condition: exists().where(
+            _permanents.c.idemploye == Employe.idemploye, condition
+        ).correlate(Employe.__table__),
+        "contractuel": lambda condition: exists().where(
+            _contractuels.c.idemploye == Employe.idemploye, condition
+        ).correlate(Employe.__table__),
+    }
+
+    # Colonnes couvertes par les index FULLTEXT (ngram) de la migration a3c9e1f0b7d2
+    EMPLOYEE_SEARCH_COLUMNS = ("Nom", "Prenom", "NomFR", "PrenomFR", "NomEpoux")
+    CAREER_SEARCH_COLUMNS = ("Nomposte", "service", "dependency")
+    # ngram_token_size par défaut de MySQL : les termes plus courts ne sont pas indexés
+    MIN_SEARCH_TERM_LENGTH = 2
+
     def __init__(self, session, current_user_account_number=None):
         super().__init__(session, current_user_account_number)
 
@@ -14,6 +145,109 @@ class EmployeeController(BaseControllerWithHistory):
         """Get all employees with their career information"""
         return self.session.query(Employe, Carriere).join(Carriere).all()
 
+    def get_employees_page(self, page=1, page_size=10, sort_key="id", descending=False):
+        """
+        Get one page of active employees with their career information
+
+        Args:
+            page: Page number (starting at 1)
+            page_size: Number of rows per page
+            sort_key: One of SORT_COLUMNS keys
+            descending: Sort order
+
+        Returns:
+            Tuple (rows, total) - rows: list of (Employe, Carriere), total: number of matching employees
+        """
+        try:
+            query = self.query_active_employees(Employe, Carriere).join(Carriere)
+
+            total = query.order_by(None).count()
+
+            sort_column = self.SORT_COLUMNS.get(sort_key, Employe.idemploye)
+            order = sort_column.desc() if descending else sort_column.asc()
+            # Tri secondaire sur l'identifiant pour une pagination stable
+            query = query.order_by(order, Employe.idemploye.asc())
+
+            page = max(1, page)
+            rows = query.offset((page - 1) * page_size).limit(page_size).all()
+
+            return rows, total
+        except Exception as e:
+            print(f"Error getting employees page: {e}")
+            return [], 0
+
+    def search_employees(self, search_term, limit=50):
+        """
+        Ranked full-text search over active employees
+
+        Each table is searched through its own FULLTEXT index (names on employes,
+        post/service/dependency on carrieres), the hits are merged by employee and
+        sorted by relevance. A numeric term also matches the employee ID.
+
+        Args:
+            search_term: Text typed by the user
+            limit: Maximum number of results
+
+        Returns:
+            List of (Employe, Carriere) tuples, best matches first
+
+        Raises:
+            SQLAlchemyError: if the search query fails (e.g. missing FULLTEXT index)
+        """
+        try:
+            # Retirer les opérateurs du mode booléen pour ne garder que les mots
+            words = re.sub(r'[+\-<>()~*"@]', " ", search_term or "").split()
+            words = [word for word in words if len(word) >= self.MIN_SEARCH_TERM_LENGTH]
+            term = search_term.strip() if search_term else ""
+
+            employes = Employe.__table__
+            carrieres = Carriere.__table__
+            hits = []
+
+            if words:
+                against = " ".join(words)
+                employee_match = match(
+                    *(employes.c[name] for name in self.EMPLOYEE_SEARCH_COLUMNS), against=against
+                ).in_boolean_mode()
+                career_match = match(
+                    *(carrieres.c[name] for name in self.CAREER_SEARCH_COLUMNS), against=against
+                ).in_boolean_mode()
+
+                hits.append(select(employes.c.idemploye, employee_match.label("score")).where(employee_match))
+                hits.append(select(carrieres.c.idemploye, career_match.label("score")).where(career_match))
+
+            if term.isdigit():
+                # Correspondance exacte sur le numéro de l'employé, classée en premier
+                hits.append(select(employes.c.idemploye, literal(1000.0).label("score"))
+                            .where(employes.c.idemploye == int(term)))
+
+            if not hits:
+                return []
+
+            all_hits = union_all(*hits).subquery()
+            ranked = (
+                select(all_hits.c.idemploye, func.sum(all_hits.c.score).label("score"))
+                .group_by(all_hits.c.idemploye)
+                .subquery()
+            )
+
+            return (
+                self.query_active_employees(Employe, Carriere)
+                .join(Carriere)
+                .join(ranked, ranked.c.idemploye == Employe.idemploye)
+                .order_by(ranked.c.score.desc(), Employe.idemploye.asc())
+                .limit(limit)
+                .all()
+            )
+        except Exception as e:
+            # Remonté au worker de recherche, qui signale l'échec à la vue
+            print(f"Error searching employees: {e}")
+            raise
+
+    def query_active_employees(self, *entities):
+        """Query over employees that have no final departure (defaults to Employe)"""
+        return self.session.query(*(entities or (Employe,))).filter(active_employee_clause())
+
     def get_employee_by_id(self, employee_id):
         """Get an employee by ID"""
         return self.session.query(Employe).filter(Employe.idemploye == employee_id).first()
@@ -35,16 +269,21 @@ class EmployeeController(BaseControllerWithHistory):
             # Add career to session
             self.session.add(career)
             
-            # Commit the transaction
-            self.session.commit()
-            
-            # Log history
+            # Log history (written by the same commit)
             self.log_history(
                 event="إضافة موظف جديد",
                 details=f"تم إضافة الموظف: {employee.Prenom} {employee.Nom} - رقم الموظف: {employee.idemploye} - النوع: {employee.type}",
                 gestion="إدارة الموظفين",
+                in_transaction=True,
                 employee_id=employee.idemploye
             )
+
+            # Keep the statistics snapshot in step (same transaction)
+            apply_employee_change(self.session, None, employee_statistics_keys(employee))
+            
+            # Commit the transaction
+            self.session.commit()
+            bump_data_version()
             
             return True
         except Exception as e:
@@ -63,6 +302,7 @@ class EmployeeController(BaseControllerWithHistory):
             
             # Store old values for history
             old_name = f"{employee.Prenom} {employee.Nom}"
+            old_statistics_keys = employee_statistics_keys(employee)
             changes = []
             
             # Update employee attributes
@@ -98,16 +338,19 @@ class EmployeeController(BaseControllerWithHistory):
                                 changes.append(f"المهنة - {key}: {old_value} ← {value}")
                         setattr(career, key, value)
             
-            # Commit the changes
-            self.session.commit()
-            
             self.log_history(
                     event="تحديث بيانات موظف",
                     details=f"تم تحديث بيانات الموظف: {old_name} (رقم: {employee_id}) - التغييرات: {' | '.join(changes)}",
                     gestion=" إدارة الموظفين ",
+                    in_transaction=True,
                     employee_id=employee_id
                 )
 
+            apply_employee_change(self.session, old_statistics_keys, employee_statistics_keys(employee))
+
+            # Commit the changes, the history entry and the statistics together
+            self.session.commit()
+            bump_data_version()
             
             return True
         except Exception as e:
@@ -125,16 +368,19 @@ class EmployeeController(BaseControllerWithHistory):
                 employee_name = f"{employee.Prenom} {employee.Nom}"
                 employee_type = employee.type
                 
-                self.session.delete(employee)
-                self.session.commit()
-                
-                # Log history
+                # Log history (the deleted employee cannot be referenced, its ID stays in the details)
                 self.log_history(
                     event="حذف موظف",
                     details=f"تم حذف الموظف: {employee_name} - رقم الموظف: {employee_id} - النوع: {employee_type}",
                     gestion=" إدارة الموظفين ",
-                    employee_id=employee_id
+                    in_transaction=True
                 )
+
+                apply_employee_change(self.session, employee_statistics_keys(employee), None)
+                
+                self.session.delete(employee)
+                self.session.commit()
+                bump_data_version()
                 
                 return True
 
@@ -145,73 +391,16 @@ class EmployeeController(BaseControllerWithHistory):
             return False
 
     def filter_employees(self, criteria):
-        """Filter employees based on criteria with history logging"""
+        """Filter employees based on criteria (FILTER_FIELDS), in a single query"""
         try:
             query = self.session.query(Employe, Carriere).join(Carriere)
-            
-            applied_filters = []
-            
-            # Apply filters based on criteria
-            for field, value in criteria.items():
-                if not value:  # Skip empty criteria
-                    continue
-                    
-                applied_filters.append(f"{field}: {value}")
-                
-                # Map field names to model attributes
-                if field == "رقم الموظف" and value:
-                    query = query.filter(Employe.idemploye == value)
-                elif field == "التفعيل":
-                    is_active = value == "مفعل"
-                    query = query.filter(Employe.Statut == is_active)
-                elif field == "الاسم":
-                    query = query.filter(Employe.Prenom.like(f"%{value}%"))
-                elif field == "اللقب":
-                    query = query.filter(Employe.Nom.like(f"%{value}%"))
-                elif field == "لقب الزوج ":
-                    query = query.filter(Employe.NomEpoux.like(f"%{value}%"))
-                elif field == "تاريخ الميلاد":
-                    query = query.filter(Employe.Datedenaissance == value)
-                elif field == "ولاية الميلاد":
-                    query = query.filter(Employe.Lieudenaissance.like(f"%{value}%"))
-                elif field == "الجنس":
-                    query = query.filter(Employe.Sexe == value)
-                elif field == " الوضعية العائلية":
-                    query = query.filter(Employe.Statutfamilial == value)
-                elif field == " الوضعية تجاه الخدمة الوطنية":
-                    query = query.filter(Employe.Servicesnationale == value)
-                elif field == "الشهادة التي تم على أساسهاالتوظيف الأصلي":
-                    query = query.filter(Carriere.Dipinitial.like(f"%{value}%"))
-                elif field == "الشهادة الحالية ":
-                    query = query.filter(Carriere.Dipactuel.like(f"%{value}%"))
-                elif field == "رتبة التوظيف الأصلي":
-                    query = query.filter(Carriere.GRec.like(f"%{value}%"))
-                elif field == "الرتبة أو منصب الشغل الحالي ":
-                    query = query.filter(Carriere.Nomposte.like(f"%{value}%"))
-                elif field == "الصنف الحالي ":
-                    query = query.filter(Carriere.current_class.like(f"%{value}%"))
-                elif field == "الدرجة الحالية":
-                    query = query.filter(
-                        or_(
-                            and_(Employe.type == "permanent", Permanent.current_degree == value),
-                            and_(Employe.type == "contractuel", Contractuel.percentage.like(f"%{value}%"))
-                        )
-                    )
-                elif field == "تاريخ المفعول ":
-                    query = query.filter(Carriere.effectiveDate == value)
-                elif field == "التبعية":
-                    query = query.filter(Carriere.dependency.like(f"%{value}%"))
-                elif field == "المصلحة":
-                    query = query.filter(Carriere.service.like(f"%{value}%"))
-                elif field == "طبيعة علاقة العمل (موظف عون متعاقد)":
-                    emp_type = "permanent" if value == "موظف" else "contractuel"
-                    query = query.filter(Employe.type == emp_type)
-            
-            results = query.all()
-            
-            
-            return results
-            
+
+            condition = compile_field_filters(criteria, self.FILTER_FIELDS, self.FILTER_JOINS)
+            if condition is not None:
+                query = query.filter(condition)
+
+            return query.all()
+
         except Exception as e:
             print(f"Error filtering employees: {e}")
 
@@ -230,42 +419,21 @@ class EmployeeController(BaseControllerWithHistory):
             return []
     
     def getidbynameandlastname(self, name, lastname):
-        """Get employee ID by name and lastname with history logging"""
+        """Get employee ID by name and lastname (indexed lookup, LRU cached)"""
         try:
-            employee = self.session.query(Employe).filter(
-                
-                Employe.Prenom == name,
-                Employe.Nom == lastname
-            ).first()
-
-            if employee:
-                print(f"Employé trouvé! ID: {employee.idemploye}")
-                return employee.idemploye
-            else:
-
-                return None
+            return resolve_employee_id(self.session, name, lastname)
         except Exception as e:
             print(f"Error searching employee by name: {e}")
-            
-
             return None
 
     def get_all_employees(self):
         """Get all employees (excluding departed) with history logging"""
         try:
-            # Récupérer les identifiants des employés qui ont quitté définitivement
-            departed_ids = set(depart.idemploye for depart in self.get_final_departures())
-
-            # Récupérer tous les employés qui ne sont pas partis définitivement
-            employees = (
-                self.session.query(Employe)
-                .filter(Employe.idemploye.notin_(departed_ids))
-                .all()
-            )
-
+            # Employés sans départ définitif, filtrés côté SQL
+            employees = self.query_active_employees(Employe.Prenom, Employe.Nom).all()
 
             # Retourner Nom et Prénom
-            return [(emp.Prenom, emp.Nom) for emp in employees]
+            return [(prenom, nom) for prenom, nom in employees]
         except Exception as e:
             print("Failed to fetch employees:", e)
 
@@ -1,33 +1,63 @@
 import datetime
 from PyQt5.QtWidgets import QMessageBox
-from sqlalchemy import func, cast, Float
-from Controllers.EmployeController import EmployeeController
+from sqlalchemy import func, cast, case, Float
+from Controllers.EmployeController import active_employee_clause, resolve_employee_id
 from Controllers.BaseController import BaseControllerWithHistory
 from Models import Employe
 from Models.Evaluation import Evaluation
+from Controllers.table_filter import compile_table_filter, paginate
+
+# Notes prises en compte dans la moyenne (calculate_average)
+NOTE_COLUMNS = (Evaluation.NoteAnnuelle, Evaluation.Note1, Evaluation.Note2, Evaluation.Note3, Evaluation.Note4)
+
+
+def average_expression():
+    """Moyenne SQL des notes renseignées, arrondie à 2 décimales (même calcul que calculate_average)"""
+    total = sum(func.coalesce(cast(note, Float), 0) for note in NOTE_COLUMNS)
+    count = sum(case((note.isnot(None), 1), else_=0) for note in NOTE_COLUMNS)
+    return func.round(total / func.nullif(count, 0), 2)
+
 
 class EvaluationController(BaseControllerWithHistory):
+    # En-têtes des tableaux d'évaluations -> expression SQL filtrée par les get_*_page
+    FILTER_COLUMNS = {
+        "رقم التنقيط": Evaluation.idEvaluation,
+        "السنة": Evaluation.Annee,
+        "رقم الموظف": Employe.idemploye,
+        "الإسم": Employe.Prenom,
+        "اللقب": Employe.Nom,
+        "النقطة السنوية": Evaluation.NoteAnnuelle,
+        "نقطة المردودية 1": Evaluation.Note1,
+        "نقطة المردودية 2": Evaluation.Note2,
+        "نقطة المردودية 3": Evaluation.Note3,
+        "نقطة المردودية 4": Evaluation.Note4,
+        "المعدل": average_expression(),
+    }
+
     def __init__(self, db_session, current_user_account_number=None):
         super().__init__(db_session, current_user_account_number)
         # CORRECTION: Ajouter cette ligne pour maintenir la compatibilité
         self.db_session = db_session
         print(f"DEBUG - EvaluationController init completed, self.current_user_account_number: {self.current_user_account_number}")
 
-    def save_evaluation_for_employee(self, name, lastname, annee, note_annuelle, note1=None, note2=None, note3=None, note4=None):
-        """Save evaluation with comprehensive history logging (Update if exists, Create if not)."""
-        employe_controller = EmployeeController(self.db_session, self.current_user_account_number)
-        
+    def save_evaluation_for_employee(self, name, lastname, annee, note_annuelle, note1=None, note2=None, note3=None, note4=None,
+                                     employee_id=None):
+        """
+        Save evaluation with comprehensive history logging (Update if exists, Create if not).
+
+        employee_id: ID of the employee selected in the form; resolved from name/lastname if not given
+        """
         try:
             print(f"DEBUG - Starting save_evaluation_for_employee for {name} {lastname}")
-            employee_id = employe_controller.getidbynameandlastname(name, lastname)
+            if employee_id is None:
+                employee_id = resolve_employee_id(self.db_session, name, lastname)
 
             if employee_id is None:
                 print(f"DEBUG - Employee not found: {name} {lastname}")
                 return "not_found"
 
-            # Get employee for logging
-            employee = self.db_session.query(Employe).filter(Employe.idemploye == employee_id).first()
-            employee_name = f"{employee.Prenom} {employee.Nom}" if employee else f"رقم {employee_id}"
+            # Name for logging, as entered in the form
+            employee_name = f"{name} {lastname}" if name and lastname else f"رقم {employee_id}"
 
             # Check if evaluation already exists for this employee and year
             existing_evaluation = self.db_session.query(Evaluation).filter_by(
@@ -61,10 +91,7 @@ class EvaluationController(BaseControllerWithHistory):
                 self.db_session.flush()
                 action_type = "إضافة تقييم جديد"
 
-            # --- Commit the changes ---
-            self.db_session.commit()
-
-            # --- Log the action ---
+            # --- Log the action (written by the same commit) ---
             notes_info = []
             if note1: notes_info.append(f"نقطة 1: {note1}")
             if note2: notes_info.append(f"نقطة 2: {note2}")
@@ -76,10 +103,14 @@ class EvaluationController(BaseControllerWithHistory):
                 event=action_type,
                 details=f"{action_type} للموظف: {employee_name} - السنة: {annee} - النقطة السنوية: {note_annuelle}{notes_text}",
                 gestion="إدارة التقييمات",
+                in_transaction=True,
                 employee_id=employee_id,
                 evaluation_id=evaluation.idEvaluation
             )
 
+            # --- Commit the changes ---
+            self.db_session.commit()
+
             print(f"DEBUG - Evaluation saved successfully ({action_type})")
             return "success"
 
@@ -115,6 +146,85 @@ class EvaluationController(BaseControllerWithHistory):
 
             return None
 
+    def _evaluation_query(self):
+        return self.db_session.query(
+            Evaluation.idEvaluation.label("idEvaluation"),
+            Evaluation.Annee.label("Annee"),
+            Employe.idemploye.label("idemploye"),
+            Employe.Nom.label("nom"),
+            Employe.Prenom.label("prenom"),
+            Evaluation.NoteAnnuelle.label("NoteAnnuelle"),
+            Evaluation.Note1.label("Note1"),
+            Evaluation.Note2.label("Note2"),
+            Evaluation.Note3.label("Note3"),
+            Evaluation.Note4.label("Note4"),
+        )
+
+    def _evaluation_rows(self, results):
+        """Lignes du tableau (dictionnaires) avec la moyenne calculée"""
+        table_data = []
+        for row in results:
+            notes = [row.NoteAnnuelle, row.Note1, row.Note2, row.Note3, row.Note4]
+            table_data.append({
+                "idEvaluation": row.idEvaluation,
+                "Annee": row.Annee,
+                "idemploye": row.idemploye,
+                "nom": row.nom,
+                "prenom": row.prenom,
+                "NoteAnnuelle": row.NoteAnnuelle,
+                "Note1": row.Note1,
+                "Note2": row.Note2,
+                "Note3": row.Note3,
+                "Note4": row.Note4,
+                "Moyenne": self.calculate_average(notes) if any(n is not None for n in notes) else None,
+            })
+        return table_data
+
+    def _filtered_page(self, query, table_filter, page, page_size, *order_by):
+        condition = compile_table_filter(table_filter, self.FILTER_COLUMNS)
+        if condition is not None:
+            query = query.filter(condition)
+        rows, total = paginate(query.order_by(*order_by), page, page_size)
+        return self._evaluation_rows(rows), total
+
+    def get_evaluations_page(self, table_filter=None, page=1, page_size=10):
+        """
+        One page of evaluations (all years) matching the table filter, filtered and paginated in SQL
+
+        Returns:
+            Tuple (rows, total) - rows: same dictionaries as load_evaluations_with_employee_names
+        """
+        try:
+            query = self._evaluation_query().join(Employe, Evaluation.idemploye == Employe.idemploye)
+            return self._filtered_page(query, table_filter, page, page_size, Evaluation.idEvaluation)
+        except Exception as e:
+            print(f"Error getting evaluations page: {e}")
+            return [], 0
+
+    def get_current_year_evaluations_page(self, table_filter=None, page=1, page_size=10):
+        """
+        One page of the current year table (every active employee, evaluated or not)
+        matching the table filter, filtered and paginated in SQL
+
+        Returns:
+            Tuple (rows, total) - rows: same dictionaries as load_evaluations_with_employee_names_current_year
+        """
+        try:
+            current_year = datetime.datetime.now().year
+            query = (
+                self._evaluation_query()
+                .select_from(Employe)
+                .outerjoin(
+                    Evaluation,
+                    (Evaluation.idemploye == Employe.idemploye) & (Evaluation.Annee == current_year)
+                )
+                .filter(active_employee_clause())
+            )
+            return self._filtered_page(query, table_filter, page, page_size, Employe.idemploye)
+        except Exception as e:
+            print(f"Error getting current year evaluations page: {e}")
+            return [], 0
+
     def load_evaluations_with_employee_names(self):
         """Load all evaluations with employee names and history logging"""
         try:
@@ -225,14 +335,13 @@ class EvaluationController(BaseControllerWithHistory):
             evaluation.Note3 = note3.strip() if note3 else None
             evaluation.Note4 = note4.strip() if note4 else None
 
-            self.db_session.commit()
-
-            # Log successful update
+            # Log successful update (written by the same commit)
             if changes:
                 self.log_history(
                     event="تحديث تقييم",
                     details=f"تم تحديث التقييم رقم {evaluation_id} للموظف: {employee_name} - التغييرات: {' | '.join(changes)}",
                     gestion="إدارة التقييمات",
+                    in_transaction=True,
                     evaluation_id=evaluation_id,
                     employee_id=evaluation.idemploye
                 )
@@ -241,10 +350,13 @@ class EvaluationController(BaseControllerWithHistory):
                     event="محاولة تحديث تقييم",
                     details=f"تم محاولة تحديث التقييم رقم {evaluation_id} للموظف: {employee_name} - لا توجد تغييرات",
                     gestion="إدارة التقييمات",
+                    in_transaction=True,
                     evaluation_id=evaluation_id,
                     employee_id=evaluation.idemploye
                 )
 
+            self.db_session.commit()
+
             return "success"
 
         except Exception as e:
@@ -257,12 +369,8 @@ class EvaluationController(BaseControllerWithHistory):
         try:
             import datetime
             current_year = datetime.datetime.now().year
-            employe_controller = EmployeeController(self.db_session, self.current_user_account_number)
-            
-            # Obtenir les identifiants des employés ayant un départ définitif
-            departed_ids = set(depart.idemploye for depart in employe_controller.get_final_departures())
 
-            # Requête avec jointure externe pour inclure tous les employés
+            # Requête avec jointure externe pour inclure tous les employés actifs
             results = (
                 self.db_session.query(
                     Evaluation.idEvaluation.label("idEvaluation"),
@@ -282,16 +390,14 @@ class EvaluationController(BaseControllerWithHistory):
                     Evaluation,
                     (Evaluation.idemploye == Employe.idemploye) & (Evaluation.Annee == current_year)
                 )
+                # Exclure les employés qui ont quitté définitivement
+                .filter(active_employee_clause())
                 .all()
             )
 
             # Construction des données pour le tableau
             table_data = []
             for row in results:
-                # ⚠️ Ignorer les employés qui ont quitté définitivement
-                if row.idemploye in departed_ids:
-                    continue
-
                 notes = [row.NoteAnnuelle, row.Note1, row.Note2, row.Note3, row.Note4]
                 moyenne = self.calculate_average(notes) if any(n is not None for n in notes) else None
 
@@ -334,12 +440,12 @@ class EvaluationController(BaseControllerWithHistory):
 
             # Delete the evaluation
 
-            # Log successful deletion
+            # Log successful deletion (same commit, the deleted evaluation is only named in the details)
             self.log_history(
                 event="حذف تقييم",
                 details=f"تم حذف التقييم رقم {evaluation_id} للموظف: {employee_name} - السنة: {evaluation_year} - النقطة السنوية: {evaluation_note}",
                 gestion="إدارة التقييمات",
-                evaluation_id=evaluation_id,
+                in_transaction=True,
                 employee_id=employee_id
             )
             self.db_session.delete(evaluation)
@@ -423,14 +529,13 @@ class EvaluationController(BaseControllerWithHistory):
             evaluation.Note3 = note3.strip() if note3 else None
             evaluation.Note4 = note4.strip() if note4 else None
 
-            self.db_session.commit()
-
-            # Log successful update
+            # Log successful update (written by the same commit)
             if changes:
                 self.log_history(
                     event="تحديث تقييم سابق",
                     details=f"تم تحديث التقييم السابق رقم {evaluation_id} للموظف: {employee_name} - التغييرات: {' | '.join(changes)}",
                     gestion="إدارة التقييمات",
+                    in_transaction=True,
                     evaluation_id=evaluation_id,
                     employee_id=evaluation.idemploye
                 )
@@ -439,10 +544,13 @@ class EvaluationController(BaseControllerWithHistory):
                     event="محاولة تحديث تقييم سابق",
                     details=f"تم محاولة تحديث التقييم السابق رقم {evaluation_id} للموظف: {employee_name} - لا توجد تغييرات",
                     gestion="إدارة التقييمات",
+                    in_transaction=True,
                     evaluation_id=evaluation_id,
                     employee_id=evaluation.idemploye
                 )
 
+            self.db_session.commit()
+
             return "success"
 
         except Exception as e:
@@ -0,0 +1,227 @@
+import threading
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from Models.Employe import Employe
+from Models.Carriere import Carriere
+from Models.Permanent import Permanent
+from Models.DepartDefinitif import DepartDefinitif
+from Controllers.EmployeController import active_employee_clause
+from Controllers.stats_controller import get_data_version
+
+
+# Âge légal de départ à la retraite utilisé par défaut pour les projections
+DEFAULT_RETIREMENT_AGE = 60
+
+# Une seule cohorte en mémoire : (version des données, jour) -> EmployeeCohort
+_cohort_cache = {}
+_cohort_lock = threading.Lock()
+
+
+def to_day_array(values):
+    """Dates Python (ou None) -> tableau datetime64[D] (NaT pour None)"""
+    return np.array([value if value else "NaT" for value in values], dtype="datetime64[D]")
+
+
+def _year_month_day(days, missing):
+    """Décompose un tableau datetime64[D] en tableaux (année, mois, jour), NaT remplacé par `missing`"""
+    days = np.where(np.isnat(days), np.datetime64(missing, "D"), days)
+    years = days.astype("datetime64[Y]")
+    months = days.astype("datetime64[M]")
+    return (
+        years.astype(int) + 1970,
+        (months - years.astype("datetime64[M]")).astype(int) + 1,
+        (days - months.astype("datetime64[D]")).astype(int) + 1,
+    )
+
+
+class EmployeeCohort:
+    """
+    Employés actifs chargés une fois sous forme de tableaux NumPy
+
+    Un seul SELECT (employé, carrière, ancienneté des permanents), puis tous les
+    calculs (âges, pyramide, ancienneté, départs à la retraite) sont vectoriels.
+    """
+
+    def __init__(self, employee_ids, birth_dates, sexes, services, dependencies,
+                 effective_dates, recruitment_dates, seniority_days, final_departure_dates=None, today=None):
+        self.today = today or date.today()
+        self.employee_ids = np.asarray(employee_ids, dtype=np.int64)
+        self.birth_dates = birth_dates
+        self.sexes = np.asarray(sexes, dtype=object)
+        self.services = np.asarray(services, dtype=object)
+        self.dependencies = np.asarray(dependencies, dtype=object)
+        self.effective_dates = effective_dates
+        self.recruitment_dates = recruitment_dates
+        self.seniority_days = seniority_days  # Ancienneté déclarée (permanents), NaN sinon
+        if final_departure_dates is None:
+            final_departure_dates = np.full(len(self.employee_ids), np.datetime64("NaT"), dtype="datetime64[D]")
+        self.final_departure_dates = final_departure_dates  # Départ définitif, NaT sinon
+
+    @classmethod
+    def load(cls, session: Session, today=None, include_departed=False):
+        """
+        Charge la cohorte des employés sans départ définitif
+
+        include_departed: inclure aussi les employés ayant un départ définitif
+        (sa date est dans final_departure_dates), pour les projections d'effectifs
+        """
+        permanents = Permanent.__table__
+        departs_definitifs = DepartDefinitif.__table__
+        query = (
+            select(
+                Employe.idemploye, Employe.Datedenaissance, Employe.Sexe,
+                Carriere.service, Carriere.dependency, Carriere.effectiveDate, Carriere.RecEffetDate,
+                permanents.c.NBR_A, permanents.c.NBR_M, permanents.c.NBR_J,
+                departs_definitifs.c.Datedepartdefinitif
+            )
+            .select_from(Employe)
+            .outerjoin(Carriere, Carriere.idemploye == Employe.idemploye)
+            .outerjoin(permanents, permanents.c.idemploye == Employe.idemploye)
+            .outerjoin(departs_definitifs, departs_definitifs.c.idemploye == Employe.idemploye)
+        )
+        if not include_departed:
+            query = query.where(active_employee_clause())
+        rows = session.execute(query).all()
+
+        columns = list(zip(*rows)) if rows else [()] * 11
+        nbr_a, nbr_m, nbr_j = (np.array(column, dtype=float) for column in columns[7:10])
+        # NULL -> NaN ; un permanent sans aucune valeur saisie n'a pas d'ancienneté déclarée
+        declared = ~(np.isnan(nbr_a) & np.isnan(nbr_m) & np.isnan(nbr_j))
+        seniority_days = np.where(
+            declared,
+            np.nan_to_num(nbr_a) * 365.25 + np.nan_to_num(nbr_m) * 30.4375 + np.nan_to_num(nbr_j),
+            np.nan
+        )
+
+        return cls(
+            employee_ids=columns[0],
+            birth_dates=to_day_array(columns[1]),
+            sexes=columns[2],
+            services=columns[3],
+            dependencies=columns[4],
+            effective_dates=to_day_array(columns[5]),
+            recruitment_dates=to_day_array(columns[6]),
+            seniority_days=seniority_days,
+            final_departure_dates=to_day_array(columns[10]),
+            today=today
+        )
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+    # ---------- Âges ----------
+
+    def ages(self):
+        """Âge exact en années révolues (-1 si la date de naissance est inconnue)"""
+        years, months, days = _year_month_day(self.birth_dates, self.today)
+        birthday_not_reached = (months > self.today.month) | ((months == self.today.month) & (days > self.today.day))
+        ages = self.today.year - years - birthday_not_reached
+        return np.where(np.isnat(self.birth_dates), -1, ages)
+
+    def age_pyramid(self, bin_width=5, min_age=20, max_age=65):
+        """
+        Pyramide des âges par sexe
+
+        Returns:
+            (libellés des tranches, {sexe: tableau des effectifs par tranche}).
+            Les âges hors [min_age, max_age[ sont regroupés dans la première / dernière tranche.
+        """
+        # Bornes arrêtées à max_age : la dernière tranche est plus courte si
+        # max_age - min_age n'est pas un multiple de bin_width
+        edges = np.append(np.arange(min_age, max_age, bin_width), max_age)
+        labels = (
+            [f"< {min_age}"]
+            + [f"{low}-{high - 1}" for low, high in zip(edges[:-1], edges[1:])]
+            + [f"{max_age}+"]
+        )
+
+        ages = self.ages()
+        known = ages >= 0
+        bins = np.digitize(ages[known], edges)  # 0 : < min_age, len(edges) : >= max_age
+        sexes = np.array([sexe or "Non spécifié" for sexe in self.sexes[known]], dtype=object)
+
+        pyramid = {}
+        for sexe in np.unique(sexes):
+            pyramid[sexe] = np.bincount(bins[sexes == sexe], minlength=len(labels))
+        return labels, pyramid
+
+    # ---------- Ancienneté ----------
+
+    def seniority_years(self):
+        """
+        Ancienneté en années
+
+        Ancienneté déclarée (NBR_A/NBR_M/NBR_J) pour les permanents, sinon calculée
+        depuis la date d'effet du recrutement initial (ou de la carrière actuelle).
+        NaN si aucune donnée n'est disponible.
+        """
+        start = np.where(np.isnat(self.recruitment_dates), self.effective_dates, self.recruitment_dates)
+        elapsed = (np.datetime64(self.today, "D") - start).astype(float)
+        elapsed[np.isnat(start)] = np.nan
+        days = np.where(np.isnan(self.seniority_days), elapsed, self.seniority_days)
+        return days / 365.25
+
+    def seniority_histogram(self, edges=(0, 2, 5, 10, 15, 20, 25, 30)):
+        """
+        Nombre d'employés par tranche d'ancienneté
+
+        Returns:
+            Dictionnaire {libellé: effectif}, ex: {"0-1": 4, ..., "30+": 2}
+        """
+        edges = np.asarray(edges)
+        seniority = self.seniority_years()
+        seniority = seniority[~np.isnan(seniority)]
+        counts = np.bincount(np.digitize(np.maximum(seniority, 0), edges) - 1, minlength=len(edges))
+        labels = [f"{low}-{high - 1}" for low, high in zip(edges[:-1], edges[1:])] + [f"{edges[-1]}+"]
+        return dict(zip(labels, counts.tolist()))
+
+    # ---------- Retraite ----------
+
+    def retirement_dates(self, retirement_age=DEFAULT_RETIREMENT_AGE):
+        """Date à laquelle chaque employé atteint l'âge de la retraite (NaT si inconnue)"""
+        years, months, days = _year_month_day(self.birth_dates, self.today)
+        # Même jour et même mois, retirement_age ans plus tard (29 février -> 1er mars)
+        first_of_month = (
+            (years + retirement_age - 1970) * 12 + (months - 1)
+        ).astype("datetime64[M]").astype("datetime64[D]")
+        dates = first_of_month + (days - 1)
+        dates[np.isnat(self.birth_dates)] = np.datetime64("NaT")
+        return dates
+
+    def retirement_projection(self, years=10, retirement_age=DEFAULT_RETIREMENT_AGE):
+        """
+        Départs à la retraite prévus par année civile
+
+        Returns:
+            Dictionnaire {année: effectif} pour l'année en cours et les `years - 1` suivantes ;
+            la clé "overdue" compte les employés ayant atteint l'âge de la retraite avant cette année.
+        """
+        retirement = self.retirement_dates(retirement_age)
+        known = ~np.isnat(retirement)
+        retirement = retirement[known]
+        retirement_years = retirement.astype("datetime64[Y]").astype(int) + 1970
+
+        first_year = self.today.year
+        in_horizon = (retirement_years >= first_year) & (retirement_years < first_year + years)
+        counts = np.bincount(retirement_years[in_horizon] - first_year, minlength=years)
+
+        projection = {first_year + offset: int(count) for offset, count in enumerate(counts)}
+        projection["overdue"] = int(np.count_nonzero(retirement_years < first_year))
+        return projection
+
+
+def get_employee_cohort(session: Session):
+    """Cohorte en mémoire, rechargée quand les données (bump_data_version) ou le jour changent"""
+    key = (get_data_version(), date.today())
+    cohort = _cohort_cache.get(key)
+    if cohort is None:
+        cohort = EmployeeCohort.load(session)
+        with _cohort_lock:
+            if key[0] == get_data_version():
+                _cohort_cache.clear()
+                _cohort_cache[key] = cohort
+    return cohort
@@ -1,25 +1,61 @@
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import exists, func, literal, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import aliased
 from datetime import datetime
 from Models.Conge import Conge
 from Models.Employe import Employe
 from Models.Tranche import Tranche
 from Models.Depart import Depart
 from Controllers.BaseController import BaseControllerWithHistory
+from Controllers.EmployeController import active_employee_clause
+from Controllers.table_filter import compile_table_filter, paginate
+
+
+def tranche_days_expression(position):
+    """Durée (jours) de la position-ième tranche d'un congé par date de début, 0 si absente"""
+    days = (
+        select(func.datediff(Tranche.DateFin, Tranche.DateDebut) + 1)
+        .where(Tranche.idConge == Conge.idConge)
+        .order_by(Tranche.DateDebut, Tranche.idTranche)
+        .offset(position - 1)
+        .limit(1)
+        .correlate(Conge)
+        .scalar_subquery()
+    )
+    return func.coalesce(days, 0)
 
 class CongeController(BaseControllerWithHistory):
     """
     Controller for managing leave (Conge) records with comprehensive history logging
     """
     
+    # En-têtes des tableaux de congés (et cases du filtre) -> expression SQL filtrée
+    FILTER_COLUMNS = {
+        "رقم العطلة": Conge.idConge,
+        "السنة": Conge.Annee,
+        "رقم الموظف": Conge.idemploye,
+        "لقب الموظف": Employe.Nom,
+        "اللقب": Employe.Nom,
+        "اسم الموظف": Employe.Prenom,
+        "الإسم": Employe.Prenom,
+        "عدد الأيام المستحقة": Conge.NbrJoursAlloues,
+        **{f"الشطر {position}": tranche_days_expression(position) for position in range(1, 6)},
+        "عدد الأيام المستهلكة": Conge.NbrJoursPris,
+        "عدد الأيام المتبقية": Conge.NbrJoursRestants,
+    }
+
     def __init__(self, db_session, current_user_account_number=None):
         super().__init__(db_session, current_user_account_number)
     
-    def get_all_conges(self, year=None):
-        """Get all leave records with history logging"""
+    def get_all_conges(self, year=None, active_only=False):
+        """Get all leave records (optionally only for employees without final departure)"""
         try:
             query = self.session.query(Conge)
             if year:
                 query = query.filter(Conge.Annee == year)
+            if active_only:
+                query = query.filter(active_employee_clause(Conge.idemploye))
             
             conges = query.all()
             
@@ -44,17 +80,12 @@ class CongeController(BaseControllerWithHistory):
     def get_conge_by_employee_year(self, employee_id, year):
         """Get a leave record for a specific employee and year with history logging"""
         try:
+            # Served by the unique index uq_conges_employe_annee
             conge = self.session.query(Conge).filter(
                 Conge.idemploye == employee_id,
                 Conge.Annee == year
             ).first()
             
-            # Get employee name for logging
-            employee = self.session.query(Employe).filter(Employe.idemploye == employee_id).first()
-            employee_name = f"{employee.Prenom} {employee.Nom}" if employee else f"رقم {employee_id}"
-            
-
-            
             return conge
         except Exception as e:
             print(f"Error getting conge by employee and year: {e}")
@@ -62,6 +93,141 @@ class CongeController(BaseControllerWithHistory):
             return None
     
     
+    def get_or_create_conge(self, employee_id, year, default_days=30):
+        """
+        Get the leave record of an employee for a year, creating it if needed
+
+        INSERT IGNORE on the unique (idemploye, Annee) index: concurrent calls cannot create
+        duplicates and an existing record is left as is. The affected row count tells whether
+        this call inserted the record (the MySQL dialect reports found rows, so a no-op
+        ON DUPLICATE KEY UPDATE would also count as one).
+
+        Returns:
+            tuple: (Conge, created) - created is False when the record already existed
+        """
+        try:
+            conge = self.get_conge_by_employee_year(employee_id, year)
+            if conge:
+                return conge, False
+
+            result = self.session.execute(insert(Conge.__table__).prefix_with("IGNORE").values(
+                idemploye=employee_id,
+                Annee=year,
+                NbrJoursAlloues=default_days,
+                NbrJoursPris=0,
+                NbrJoursRestants=default_days
+            ))
+            self.session.commit()
+
+            created = result.rowcount == 1
+            if created:
+                return self.session.get(Conge, result.lastrowid), True
+
+            # Created meanwhile by another client
+            conge = self.get_conge_by_employee_year(employee_id, year)
+            if conge is None:
+                raise ValueError(f"تعذر إنشاء عطلة الموظف رقم {employee_id} لسنة {year}")
+            return conge, False
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Error getting or creating conge: {e}")
+
+            raise e
+
+    @staticmethod
+    def _leave_conditions(year=None, before_year=None, active_only=False):
+        conditions = []
+        if year:
+            conditions.append(Conge.Annee == year)
+        if before_year:
+            conditions.append(Conge.Annee < before_year)
+        if active_only:
+            conditions.append(active_employee_clause(Conge.idemploye))
+        return conditions
+
+    def _leave_records(self, rows, tranche_conditions, max_tranches):
+        """
+        Overview dictionaries of conge rows, with the first `max_tranches` tranche durations
+        of the conges matching `tranche_conditions` (one query, ROW_NUMBER() per conge)
+        """
+        position = func.row_number().over(
+            partition_by=Tranche.idConge,
+            order_by=(Tranche.DateDebut, Tranche.idTranche)
+        ).label("position")
+        ranked = (
+            select(
+                Tranche.idConge,
+                (func.datediff(Tranche.DateFin, Tranche.DateDebut) + 1).label("days"),
+                position
+            )
+            .join(Conge, Conge.idConge == Tranche.idConge)
+            .where(*tranche_conditions)
+            .subquery()
+        )
+        tranche_days = {}
+        for conge_id, tranche_position, days in self.session.execute(
+            select(ranked.c.idConge, ranked.c.position, ranked.c.days).where(ranked.c.position <= max_tranches)
+        ):
+            tranche_days.setdefault(conge_id, [0] * max_tranches)[tranche_position - 1] = days
+
+        return [
+            {
+                'idConge': row.idConge,
+                'Annee': row.Annee,
+                'idemploye': row.idemploye,
+                'Nom': row.Nom or "",
+                'Prenom': row.Prenom or "",
+                'NbrJoursAlloues': row.NbrJoursAlloues,
+                'NbrJoursPris': row.NbrJoursPris,
+                'NbrJoursRestants': row.NbrJoursRestants,
+                'tranche_days': tranche_days.get(row.idConge, [0] * max_tranches),
+            }
+            for row in rows
+        ]
+
+    def get_leave_overview_page(self, table_filter=None, page=1, page_size=10,
+                                year=None, before_year=None, active_only=False, max_tranches=5):
+        """
+        One page of leave records with employee names and the duration of their first tranches
+
+        The table filter and the pagination run in SQL; the tranche durations of the
+        page are then read in one query (ROW_NUMBER() per conge, ordered by start date).
+
+        Args:
+            table_filter: TableFilter on the table headers (None: no filter)
+            page, page_size: Page to return (1-based) and its size
+            year: Only this year
+            before_year: Only years before this one (most recent first)
+            active_only: Exclude employees with a final departure
+            max_tranches: Number of tranche durations per record
+
+        Returns:
+            Tuple (records, total) - records: list of dict with idConge, Annee, idemploye, Nom,
+            Prenom, NbrJoursAlloues, NbrJoursPris, NbrJoursRestants and tranche_days
+            (max_tranches day counts, 0 when missing); total: number of matching records
+        """
+        try:
+            query = (
+                self.session.query(
+                    Conge.idConge, Conge.Annee, Conge.idemploye, Employe.Nom, Employe.Prenom,
+                    Conge.NbrJoursAlloues, Conge.NbrJoursPris, Conge.NbrJoursRestants
+                )
+                .outerjoin(Employe, Employe.idemploye == Conge.idemploye)
+                .filter(*self._leave_conditions(year, before_year, active_only))
+            )
+            condition = compile_table_filter(table_filter, self.FILTER_COLUMNS)
+            if condition is not None:
+                query = query.filter(condition)
+            order = (Conge.Annee.desc(), Conge.idConge) if before_year else (Conge.idConge,)
+            rows, total = paginate(query.order_by(*order), page, page_size)
+
+            # Tranche durations of this page only
+            records = self._leave_records(rows, [Conge.idConge.in_([row.idConge for row in rows])], max_tranches) if rows else []
+            return records, total
+        except Exception as e:
+            print(f"Error getting leave overview page: {e}")
+            return [], 0
+
     def get_previous_years_conges(self, current_year):
         """Get leave records from previous years with history logging"""
         try:
@@ -90,18 +256,18 @@ class CongeController(BaseControllerWithHistory):
             conge.NbrJoursAlloues = nbr_jours_alloues
             conge.NbrJoursRestants = nbr_jours_alloues - conge.NbrJoursPris
             
-            self.session.commit()
-            
-            # Log successful update
+            # Log successful update (written by the same commit)
             self.log_history(
                 event="تحديث الأيام المخصصة",
                 details=f"تم تحديث الأيام المخصصة للموظف: {employee_name} - من {old_allocated} إلى {nbr_jours_alloues} يوم - الأيام المتبقية: {conge.NbrJoursRestants}",
                 gestion= "إدارة الإجازات",
-
+                in_transaction=True,
                 conge_id=conge_id,
                 employee_id=conge.idemploye
             )
             
+            self.session.commit()
+            
             return conge
             
         except SQLAlchemyError as e:
@@ -114,34 +280,78 @@ class CongeController(BaseControllerWithHistory):
 
 
     
-    def create_annual_leaves_for_all_employees(self, year, default_days=30):
-        """Create annual leave records for all employees with comprehensive history logging"""
+    def create_annual_leaves_for_all_employees(self, year, default_days=30, carry_over=False, max_carry_over=None):
+        """
+        Create the missing annual leave records of a year for all employees in one statement
+
+        A single INSERT ... SELECT ... WHERE NOT EXISTS adds a record for every employee
+        who has none for this year, then one commit. Existing records are untouched.
+
+        Args:
+            year: Leave year
+            default_days: Days allocated for the year
+            carry_over: Add the remaining days of the previous year to the allocation
+            max_carry_over: Maximum number of carried days per employee (no limit if None)
+
+        Returns:
+            dict: year, created (records added), skipped (employees that already had one),
+            carried_days (total days carried over)
+        """
         try:
-            # Get all employees
-            employees = self.session.query(Employe).all()
-            created_conges = []
-            skipped_employees = []
-            
-            for employee in employees:
-                # Check if leave record already exists for this employee and year
-                existing_conge = self.get_conge_by_employee_year(employee.idemploye, year)
-                if not existing_conge:
-                    # Create new leave record
-                    new_conge = Conge.create(
-                        self.session,
-                        idemploye=employee.idemploye,
-                        Annee=year,
-                        NbrJoursAlloues=default_days,
-                        NbrJoursPris=0,
-                        NbrJoursRestants=default_days
-                    )
-                    created_conges.append(new_conge)
-                else:
-                    skipped_employees.append(f"{employee.Prenom} {employee.Nom}")
-            
-
-            
-            return created_conges
+            previous = aliased(Conge)
+            carried = literal(0)
+            if carry_over:
+                remaining = select(previous.NbrJoursRestants).where(
+                    previous.idemploye == Employe.idemploye,
+                    previous.Annee == year - 1
+                ).limit(1).scalar_subquery()
+                carried = func.greatest(func.coalesce(remaining, 0), 0)
+                if max_carry_over is not None:
+                    carried = func.least(carried, max_carry_over)
+
+            # The NOT EXISTS skips existing records, the unique index covers concurrent rollovers
+            missing = ~exists().where(Conge.idemploye == Employe.idemploye, Conge.Annee == year)
+            new_records = select(
+                Employe.idemploye,
+                literal(year).label("Annee"),
+                (literal(default_days) + carried).label("NbrJoursAlloues"),
+                literal(0).label("NbrJoursPris"),
+                (literal(default_days) + carried).label("NbrJoursRestants")
+            ).where(missing)
+
+            # Summary of what will be inserted
+            to_create, carried_days = self.session.execute(
+                select(func.count(), func.coalesce(func.sum(carried), 0)).select_from(Employe).where(missing)
+            ).one()
+            total_employees = self.session.query(func.count(Employe.idemploye)).scalar()
+
+            created = 0
+            if to_create:
+                # A record created meanwhile by another rollover is kept as is and not counted
+                result = self.session.execute(insert(Conge.__table__).prefix_with("IGNORE").from_select(
+                    ["idemploye", "Annee", "NbrJoursAlloues", "NbrJoursPris", "NbrJoursRestants"],
+                    new_records
+                ))
+                created = result.rowcount
+
+                # One aggregate entry for the whole rollover (written by the same commit)
+                details = f"تم إنشاء الإجازات السنوية لسنة {year} لـ {created} موظف - {default_days} يوم"
+                if carry_over:
+                    details += f" - الأيام المرحلة من {year - 1}: {int(carried_days)}"
+                self.log_history(
+                    event="إنشاء الإجازات السنوية",
+                    details=details,
+                    gestion="إدارة الإجازات",
+                    in_transaction=True
+                )
+                self.session.commit()
+
+            return {
+                "year": year,
+                "created": created,
+                "skipped": total_employees - to_create,
+                "carried_days": int(carried_days) if carry_over else 0
+            }
             
         except SQLAlchemyError as e:
             self.session.rollback()
@@ -0,0 +1,112 @@
+import re
+import threading
+from bisect import bisect_left
+
+from sqlalchemy.orm import Session
+
+from Models.Employe import Employe
+from Controllers.EmployeController import active_employee_clause
+from Controllers.stats_controller import get_data_version
+
+# Un seul index en mémoire : version des données -> EmployeeNameIndex
+_index_cache = {}
+_index_lock = threading.Lock()
+
+# Voyelles courtes, tanwin, shadda, sukun et tatweel ignorés dans les recherches
+_ARABIC_MARKS = re.compile("[\u064B-\u0652\u0670\u0640]")
+_ARABIC_LETTERS = str.maketrans({"\u0623": "\u0627", "\u0625": "\u0627", "\u0622": "\u0627", "\u0671": "\u0627", "\u0649": "\u064A"})
+
+
+def normalize_name(value):
+    """Forme de recherche d'un nom : minuscules, sans diacritiques arabes, alifs unifiés"""
+    if not value:
+        return ""
+    value = _ARABIC_MARKS.sub("", value).translate(_ARABIC_LETTERS)
+    return " ".join(value.casefold().split())
+
+
+class EmployeeNameIndex:
+    """
+    Index en mémoire des prénoms et noms des employés actifs
+
+    Chargé en une requête ; les recherches se font par dichotomie (bisect) :
+    - prefix : tableau trié des prénoms, noms et noms complets (dans les deux ordres)
+    - contains : tableau trié de tous les suffixes des prénoms et des noms, une
+      sous-chaîne étant le préfixe d'un suffixe
+    Les résultats sont des tuples (idemploye, Prenom, Nom).
+    """
+
+    def __init__(self, employees):
+        self.employees = sorted(
+            employees, key=lambda employee: (employee[1] or "", employee[2] or "", employee[0])
+        )
+        prefixes = []
+        suffixes = []
+        for position, (_, prenom, nom) in enumerate(self.employees):
+            prenom, nom = normalize_name(prenom), normalize_name(nom)
+            keys = {prenom, nom, f"{prenom} {nom}".strip(), f"{nom} {prenom}".strip()} - {""}
+            for key in keys:
+                prefixes.append((key, position))
+            for name in {prenom, nom} - {""}:
+                suffixes.extend((name[start:], position) for start in range(len(name)))
+        prefixes.sort()
+        suffixes.sort()
+        self._prefix_keys = prefixes
+        self._suffix_keys = suffixes
+
+    @classmethod
+    def load(cls, session: Session):
+        rows = session.query(Employe.idemploye, Employe.Prenom, Employe.Nom).filter(active_employee_clause()).all()
+        return cls([tuple(row) for row in rows])
+
+    def __len__(self):
+        return len(self.employees)
+
+    @staticmethod
+    def _scan(keys, text, limit):
+        positions = set()
+        start = bisect_left(keys, (text,))
+        for key, position in keys[start:]:
+            if not key.startswith(text):
+                break
+            positions.add(position)
+        # Positions dans self.employees : déjà triées par Prenom, Nom
+        return sorted(positions)[:limit] if limit else sorted(positions)
+
+    def prefix(self, text, limit=None):
+        """Employés dont le prénom, le nom ou le nom complet commence par `text`"""
+        text = normalize_name(text)
+        if not text:
+            return []
+        return [self.employees[position] for position in self._scan(self._prefix_keys, text, limit)]
+
+    def contains(self, text, limit=None):
+        """Employés dont le prénom ou le nom contient `text`"""
+        text = normalize_name(text)
+        if not text:
+            return []
+        if " " in text:
+            # Nom complet : "Prenom Nom" ou "Nom Prenom" commençant par le texte
+            return self.prefix(text, limit)
+        return [self.employees[position] for position in self._scan(self._suffix_keys, text, limit)]
+
+    def find(self, prenom, nom):
+        """Employés portant exactement ce prénom et ce nom (aux diacritiques près)"""
+        prenom, nom = normalize_name(prenom), normalize_name(nom)
+        return [
+            employee for employee in self.prefix(f"{prenom} {nom}")
+            if normalize_name(employee[1]) == prenom and normalize_name(employee[2]) == nom
+        ]
+
+
+def get_employee_name_index(session: Session):
+    """Index partagé, rechargé après chaque modification d'employé (bump_data_version)"""
+    version = get_data_version()
+    index = _index_cache.get(version)
+    if index is None:
+        index = EmployeeNameIndex.load(session)
+        with _index_lock:
+            if version == get_data_version():
+                _index_cache.clear()
+                _index_cache[version] = index
+    return index
@@ -1,11 +1,26 @@
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import or_
+from sqlalchemy import or_, func
 from datetime import datetime
 from Models.Formation import Formation
 from Models.Employe import Employe
 from Controllers.BaseController import BaseControllerWithHistory
+from Controllers.EmployeController import resolve_employee_id
+from Controllers.table_filter import compile_table_filter, paginate
 
 class FormationController(BaseControllerWithHistory):
+    # En-têtes du tableau des formations -> expression SQL filtrée par get_formations_page
+    FILTER_COLUMNS = {
+        "السنة": func.year(Formation.DateDebut),
+        "رقم الموظف": Formation.idemploye,
+        "الإسم": Employe.Prenom,
+        "اللقب": Employe.Nom,
+        "نوع التكوين": Formation.Type,
+        "تاريخ البدء": Formation.DateDebut,
+        "تاريخ الإنتهاء": Formation.DateFin,
+        "مدة التكوين": func.datediff(Formation.DateFin, Formation.DateDebut) + 1,
+        "مؤسسة التكوين": Formation.Etablissement,
+        "محتوى التكوين": Formation.Theme,
+    }
     
     def __init__(self, db_session, current_user_account_number=None):
         super().__init__(db_session, current_user_account_number)
@@ -39,6 +54,32 @@ class FormationController(BaseControllerWithHistory):
             )
             return []
     
+    def get_formations_page(self, table_filter=None, page=1, page_size=10):
+        """
+        One page of formations matching the table filter (filtered and paginated in SQL)
+
+        Args:
+            table_filter: TableFilter built by the filter dialog, None for all formations
+            page: Page number (starting at 1)
+            page_size: Number of rows per page
+
+        Returns:
+            Tuple (rows, total) - rows: list of (Formation, Prenom, Nom)
+        """
+        try:
+            query = (
+                self.session.query(Formation, Employe.Prenom, Employe.Nom)
+                .outerjoin(Employe, Employe.idemploye == Formation.idemploye)
+            )
+            condition = compile_table_filter(table_filter, self.FILTER_COLUMNS)
+            if condition is not None:
+                query = query.filter(condition)
+            query = query.order_by(Formation.idFormation)
+            return paginate(query, page, page_size)
+        except Exception as e:
+            print(f"Error getting formations page: {e}")
+            return [], 0
+
     def get_formation_by_id(self, formation_id):
         """Get formation by ID with history logging"""
         try:
@@ -118,10 +159,8 @@ class FormationController(BaseControllerWithHistory):
             if not first_name or not last_name:
                 return None
                 
-            employee = self.session.query(Employe).filter(
-                Employe.Prenom == first_name.strip(),
-                Employe.Nom == last_name.strip()
-            ).first()
+            employee_id = resolve_employee_id(self.session, first_name, last_name)
+            employee = self.session.get(Employe, employee_id) if employee_id is not None else None
             
             if employee:
                 # Log successful search
@@ -151,13 +190,15 @@ class FormationController(BaseControllerWithHistory):
             )
             return None
     
-    def create_formation(self, first_name, last_name, type_formation, date_debut, date_fin, etablissement, theme=None):
+    def create_formation(self, first_name, last_name, type_formation, date_debut, date_fin, etablissement, theme=None,
+                         employee_id=None):
         """Create formation with comprehensive history logging"""
         try:
-            # Find employee by name
-            employee = self.get_employee_by_name(first_name, last_name)
+            # Employee chosen in the form, otherwise resolved from the name (indexed, cached)
+            if employee_id is None:
+                employee_id = resolve_employee_id(self.session, first_name, last_name)
 
-            if not employee:
+            if employee_id is None:
                 # Log failed creation
                 self.log_history(
                     event="فشل إضافة تكوين",
@@ -172,7 +213,7 @@ class FormationController(BaseControllerWithHistory):
 
             new_formation = Formation.create(
                 self.session,
-                idemploye=employee.idemploye,
+                idemploye=employee_id,
                 Type=type_formation,
                 DateDebut=date_debut,
                 DateFin=date_fin,
@@ -188,7 +229,7 @@ class FormationController(BaseControllerWithHistory):
                 event="إضافة تكوين جديد",
                 details=f"تم إضافة تكوين للموظف: {first_name} {last_name} - النوع: {type_formation} - المؤسسة: {etablissement} - المدة: {duration} يوم - الموضوع: {theme or 'غير محدد'}",
                 gestion="إدارة التكوينات",
-                employee_id=employee.idemploye,
+                employee_id=employee_id,
                 formation_id=new_formation.idFormation
             )
 
@@ -202,7 +243,7 @@ class FormationController(BaseControllerWithHistory):
                 event="فشل إضافة تكوين",
                 details=f"فشل في إضافة تكوين للموظف: {first_name} {last_name} - خطأ في قاعدة البيانات: {str(e)}",
                 gestion="إدارة التكوينات",
-                employee_id=employee.idemploye if 'employee' in locals() else None
+                employee_id=employee_id
             )
             raise e
         except Exception as e:
@@ -211,12 +252,12 @@ class FormationController(BaseControllerWithHistory):
                 event="فشل إضافة تكوين",
                 details=f"فشل في إضافة تكوين للموظف: {first_name} {last_name} - خطأ عام: {str(e)}",
                 gestion="إدارة التكوينات",
-                employee_id=employee.idemploye if 'employee' in locals() else None
+                employee_id=employee_id
             )
             raise e
 
     def update_formation(self, formation_id, first_name=None, last_name=None, type_formation=None, 
-                        date_debut=None, date_fin=None, etablissement=None, theme=None):
+                        date_debut=None, date_fin=None, etablissement=None, theme=None, employee_id=None):
         """Update formation with comprehensive history logging"""
         try:
             formation = self.session.query(Formation).filter(Formation.idFormation == formation_id).first()
@@ -235,8 +276,17 @@ class FormationController(BaseControllerWithHistory):
             
             changes = []
             
-            # Update employee if provided
-            if first_name is not None and last_name is not None:
+            # Update employee if provided: the one chosen in the form, otherwise looked up by name
+            if employee_id is not None:
+                employee = self.session.get(Employe, employee_id)
+                if not employee:
+
+                    raise ValueError(f"لم يتم العثور على الموظف برقم {employee_id}")
+                first_name, last_name = employee.Prenom, employee.Nom
+                if formation.idemploye != employee.idemploye:
+                    changes.append(f"الموظف: {old_employee_name} ← {first_name} {last_name}")
+                formation.idemploye = employee.idemploye
+            elif first_name is not None and last_name is not None:
                 employee = self.get_employee_by_name(first_name, last_name)
                 if not employee:
 
@@ -274,14 +324,13 @@ class FormationController(BaseControllerWithHistory):
      
                 raise ValueError("تاريخ البدء يجب أن يكون قبل تاريخ الإنتهاء")
             
-            self.session.commit()
-            
-            # Log successful update
+            # Log successful update (written by the same commit)
             if changes:
                 self.log_history(
                     event="تحديث تكوين",
                     details=f"تم تحديث التكوين رقم {formation_id} - التغييرات: {' | '.join(changes)}",
                     gestion="إدارة التكوينات",
+                    in_transaction=True,
                     formation_id=formation_id,
                     employee_id=formation.idemploye
                 )
@@ -290,10 +339,13 @@ class FormationController(BaseControllerWithHistory):
                     event="محاولة تحديث تكوين",
                     details=f"تم محاولة تحديث التكوين رقم {formation_id} - لا توجد تغييرات",
                     gestion="إدارة التكوينات",
+                    in_transaction=True,
                     formation_id=formation_id,
                     employee_id=formation.idemploye
                 )
             
+            self.session.commit()
+            
             return formation
             
         except SQLAlchemyError as e:
@@ -338,19 +390,19 @@ class FormationController(BaseControllerWithHistory):
             formation_duration = (formation.DateFin - formation.DateDebut).days + 1
             employee_id = formation.idemploye
             
-            # Delete the training record
-            self.session.delete(formation)
-            self.session.commit()
-            
-            # Log successful deletion
+            # Log successful deletion (same commit, the deleted formation is only named in the details)
             self.log_history(
                 event="حذف تكوين",
                 details=f"تم حذف التكوين رقم {formation_id} للموظف: {employee_name} - النوع: {formation_type} - المؤسسة: {formation_etablissement} - المدة: {formation_duration} يوم",
                 gestion="إدارة التكوينات",
-                formation_id=formation_id,
+                in_transaction=True,
                 employee_id=employee_id
             )
             
+            # Delete the training record
+            self.session.delete(formation)
+            self.session.commit()
+            
             return True
             
         except SQLAlchemyError as e:
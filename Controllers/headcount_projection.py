@@ -0,0 +1,151 @@
+import threading
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from Models.DepartTemporaire import DepartTemporaire
+from Controllers.cohort_analytics import DEFAULT_RETIREMENT_AGE, EmployeeCohort, to_day_array
+from Controllers.stats_controller import get_data_version
+
+# Une seule projection chargée en mémoire : (version des données, jour) -> HeadcountProjection
+_projection_cache = {}
+_projection_lock = threading.Lock()
+
+
+class HeadcountProjection:
+    """
+    Projection mensuelle des effectifs par service ou par dépendance
+
+    Un employé est compté au premier jour d'un mois s'il est recruté (date d'effet
+    du recrutement initial, sinon de la carrière actuelle), n'a pas atteint l'âge de
+    la retraite, n'a pas de départ définitif à cette date et n'est pas en départ
+    temporaire. Les données sont chargées une fois ; les masques qui ne dépendent pas
+    de l'âge de la retraite sont gardés en mémoire, si bien que changer ce paramètre
+    ne refait que le calcul des dates de retraite.
+    """
+
+    # Regroupement accepté par project -> attribut de EmployeeCohort
+    GROUP_ATTRIBUTES = {"service": "services", "dependency": "dependencies"}
+
+    def __init__(self, cohort, temporary_employee_ids, temporary_starts, temporary_ends):
+        self.cohort = cohort
+        self.temporary_employee_ids = np.asarray(temporary_employee_ids, dtype=np.int64)
+        self.temporary_starts = temporary_starts
+        self.temporary_ends = temporary_ends
+        self._base_masks = {}  # (premier mois, nombre de mois) -> (mois, masque en service hors retraite)
+
+    @classmethod
+    def load(cls, session: Session, today=None):
+        """Charge les employés (départs définitifs compris) et les départs temporaires"""
+        cohort = EmployeeCohort.load(session, today=today, include_departed=True)
+        departs_temporaires = DepartTemporaire.__table__
+        rows = session.execute(
+            select(departs_temporaires.c.idemploye, departs_temporaires.c.Datedebut, departs_temporaires.c.Datefin)
+        ).all()
+        columns = list(zip(*rows)) if rows else [()] * 3
+        return cls(cohort, columns[0], to_day_array(columns[1]), to_day_array(columns[2]))
+
+    def month_starts(self, months, start=None):
+        """Premiers jours des `months` mois à partir du mois de `start` (aujourd'hui par défaut)"""
+        start = start or self.cohort.today
+        first_month = np.datetime64(f"{start.year:04d}-{start.month:02d}", "M")
+        return (first_month + np.arange(months)).astype("datetime64[D]")
+
+    def _base_mask(self, months, start=None):
+        """Matrice employés x mois : recruté, sans départ définitif ni temporaire (sans la retraite)"""
+        key = (start or self.cohort.today, months)
+        if key in self._base_masks:
+            return self._base_masks[key]
+
+        month_days = self.month_starts(months, start)
+        cohort = self.cohort
+
+        # Date d'entrée inconnue : considéré comme déjà en service
+        hired = np.where(np.isnat(cohort.recruitment_dates), cohort.effective_dates, cohort.recruitment_dates)
+        in_service = np.isnat(hired)[:, None] | (hired[:, None] <= month_days[None, :])
+
+        departed = cohort.final_departure_dates
+        in_service &= np.isnat(departed)[:, None] | (month_days[None, :] < departed[:, None])
+
+        # Départs temporaires : l'employé ne compte pas pendant [Datedebut, Datefin]
+        if len(self.temporary_employee_ids):
+            positions = {employee_id: index for index, employee_id in enumerate(cohort.employee_ids.tolist())}
+            rows = np.array([positions.get(employee_id, -1) for employee_id in self.temporary_employee_ids.tolist()])
+            known = rows >= 0
+            absent = (
+                (self.temporary_starts[known][:, None] <= month_days[None, :])
+                & (month_days[None, :] <= self.temporary_ends[known][:, None])
+            )
+            on_leave = np.zeros_like(in_service)
+            np.logical_or.at(on_leave, rows[known], absent)
+            in_service &= ~on_leave
+
+        self._base_masks[key] = (month_days, in_service)
+        return month_days, in_service
+
+    def project(self, months=60, retirement_age=DEFAULT_RETIREMENT_AGE, group_by="service", start=None):
+        """
+        Effectif au premier jour de chaque mois
+
+        Args:
+            months: Horizon en mois
+            retirement_age: Âge de départ à la retraite
+            group_by: "service" ou "dependency"
+            start: Premier mois de la projection (date), mois en cours par défaut
+
+        Returns:
+            dict avec 'months' (liste de "YYYY-MM"), 'groups' ({groupe: liste des effectifs})
+            et 'total' (liste des effectifs toutes structures confondues)
+        """
+        if group_by not in self.GROUP_ATTRIBUTES:
+            raise ValueError(f"Regroupement inconnu: {group_by}")
+
+        month_days, in_service = self._base_mask(months, start)
+
+        # Seule partie qui dépend du paramètre : la date de retraite
+        retirement = self.cohort.retirement_dates(retirement_age)
+        in_service = in_service & (np.isnat(retirement)[:, None] | (month_days[None, :] < retirement[:, None]))
+
+        groups = np.array(
+            [value or "غير محدد" for value in getattr(self.cohort, self.GROUP_ATTRIBUTES[group_by])],
+            dtype=object
+        )
+        names, group_index = np.unique(groups, return_inverse=True)
+        headcount = np.zeros((len(names), len(month_days)), dtype=np.int64)
+        np.add.at(headcount, group_index, in_service)
+
+        return {
+            'months': [str(month)[:7] for month in month_days.astype("datetime64[M]")],
+            'groups': {name: counts.tolist() for name, counts in zip(names.tolist(), headcount)},
+            'total': headcount.sum(axis=0).tolist()
+        }
+
+    def retirements_per_month(self, months=60, retirement_age=DEFAULT_RETIREMENT_AGE, start=None):
+        """Nombre de départs à la retraite dans chaque mois de l'horizon (employés encore en service)"""
+        month_days, in_service = self._base_mask(months, start)
+        retirement = self.cohort.retirement_dates(retirement_age)
+        offsets = (retirement.astype("datetime64[M]") - month_days[0].astype("datetime64[M]")).astype(np.int64)
+        # Compté seulement si l'employé est encore en service le mois où il atteint l'âge
+        valid = ~np.isnat(retirement) & (offsets >= 0) & (offsets < months)
+        counted = np.zeros(len(retirement), dtype=bool)
+        counted[valid] = in_service[np.nonzero(valid)[0], offsets[valid]]
+        return np.bincount(offsets[counted], minlength=months).tolist()
+
+
+def get_headcount_projection(session: Session):
+    """
+    Moteur de projection partagé, rechargé quand les données ou le jour changent
+
+    Les appels successifs de project() avec d'autres paramètres ne touchent pas la base.
+    """
+    key = (get_data_version(), date.today())
+    projection = _projection_cache.get(key)
+    if projection is None:
+        projection = HeadcountProjection.load(session)
+        with _projection_lock:
+            if key[0] == get_data_version():
+                _projection_cache.clear()
+                _projection_cache[key] = projection
+    return projection
@@ -0,0 +1,186 @@
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+
+from Models import History, HistoryArchive
+
+# Colonnes copiées de history vers l'archive (table ou JSONL)
+HISTORY_COLUMNS = ['id', 'timestamp', 'user_id', 'event', 'details', 'gestion',
+                   'idemploye', 'idFormation', 'idConge', 'idTranche', 'idEvaluation', 'idAbsence']
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(value):
+    """Nom de la partition mensuelle contenant `value` (ex: p202506)"""
+    return f"p{value.year}{value.month:02d}"
+
+
+class HistoryArchiver:
+    """
+    Rétention de l'historique : archivage des anciennes entrées et maintenance des partitions
+
+    Les entrées plus anciennes que l'horizon sont déplacées par lots, soit vers la
+    table history_archive (interrogeable par HistoryController avec include_archive),
+    soit vers des fichiers JSONL compressés (un fichier par mois). Les partitions
+    mensuelles vidées sont ensuite supprimées et les partitions des mois à venir créées.
+    """
+
+    def __init__(self, session, batch_size=5000):
+        self.session = session
+        self.batch_size = batch_size
+
+    def archive_older_than(self, days=365, target="table", archive_dir="archives/history"):
+        """
+        Déplace les entrées plus anciennes que `days` jours
+
+        Args:
+            days: Horizon de rétention en jours
+            target: "table" (history_archive) ou "jsonl" (fichiers .jsonl.gz)
+            archive_dir: Dossier des fichiers JSONL
+
+        Returns:
+            Nombre d'entrées archivées
+        """
+        if target not in ("table", "jsonl"):
+            raise ValueError(f"Cible d'archivage inconnue: {target}")
+
+        # Archiver des mois entiers : les partitions concernées pourront être supprimées
+        cutoff = month_start(datetime.now() - timedelta(days=days))
+        archived = 0
+
+        while True:
+            rows = [dict(row) for row in self.session.execute(
+                select(*(History.__table__.c[name] for name in HISTORY_COLUMNS))
+                .where(History.timestamp < cutoff)
+                .order_by(History.timestamp, History.id)
+                .limit(self.batch_size)
+            ).mappings()]
+            if not rows:
+                break
+
+            pending = []
+            try:
+                if target == "table":
+                    archived_at = datetime.now()
+                    self.session.execute(
+                        HistoryArchive.__table__.insert(),
+                        [{**row, 'archived_at': archived_at} for row in rows]
+                    )
+                else:
+                    # Lot écrit à part : ajouté aux archives seulement une fois la suppression validée
+                    pending = self._write_pending_jsonl(rows, archive_dir)
+
+                self.session.execute(
+                    History.__table__.delete().where(History.id.in_([row['id'] for row in rows]))
+                )
+                self.session.commit()
+            except Exception as e:
+                self.session.rollback()
+                for pending_path, _ in pending:
+                    os.remove(pending_path)
+                print(f"Erreur lors de l'archivage de l'historique: {e}")
+                raise
+
+            self._publish_jsonl(pending)
+
+            archived += len(rows)
+            print(f"{archived} entrées archivées ({target})")
+
+        self.drop_empty_partitions(cutoff)
+        return archived
+
+    def _write_pending_jsonl(self, rows, archive_dir):
+        """
+        Écrit le lot dans des fichiers history_AAAA_MM.jsonl.gz.pending (un par mois)
+
+        Returns:
+            [(fichier en attente, fichier d'archive)]
+        """
+        os.makedirs(archive_dir, exist_ok=True)
+        by_month = {}
+        for row in rows:
+            by_month.setdefault((row['timestamp'].year, row['timestamp'].month), []).append(row)
+
+        pending = []
+        for (year, month), month_rows in by_month.items():
+            path = os.path.join(archive_dir, f"history_{year}_{month:02d}.jsonl.gz")
+            pending_path = path + ".pending"
+            with gzip.open(pending_path, "wt", encoding="utf-8") as archive_file:
+                for row in month_rows:
+                    record = dict(row, timestamp=row['timestamp'].strftime('%Y-%m-%d %H:%M:%S'))
+                    archive_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            pending.append((pending_path, path))
+        return pending
+
+    @staticmethod
+    def _publish_jsonl(pending):
+        """Ajoute les fichiers en attente à leur archive (un membre gzip par lot) puis les supprime"""
+        for pending_path, path in pending:
+            with open(pending_path, "rb") as pending_file, open(path, "ab") as archive_file:
+                shutil.copyfileobj(pending_file, archive_file)
+            os.remove(pending_path)
+
+    @staticmethod
+    def read_jsonl(path):
+        """Relit un fichier d'archive JSONL (générateur de dictionnaires)"""
+        with gzip.open(path, "rt", encoding="utf-8") as archive_file:
+            for line in archive_file:
+                yield json.loads(line)
+
+    # ---------- Partitions (MySQL) ----------
+
+    def get_partitions(self):
+        """Retourne [(nom, nombre de lignes estimé)] des partitions de history, vide si non partitionnée"""
+        rows = self.session.execute(text(
+            "SELECT PARTITION_NAME, TABLE_ROWS FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'history' AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        )).all()
+        return [(name, table_rows) for name, table_rows in rows]
+
+    def ensure_future_partitions(self, months_ahead=3):
+        """Crée les partitions des prochains mois en découpant la partition pmax"""
+        existing = {name for name, _ in self.get_partitions()}
+        if "pmax" not in existing:
+            return
+
+        new_partitions = []
+        month = month_start(datetime.now())
+        for _ in range(months_ahead + 1):
+            if partition_name(month) not in existing:
+                upper_bound = next_month(month).strftime('%Y-%m-%d')
+                new_partitions.append(
+                    f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{upper_bound}'))"
+                )
+            month = next_month(month)
+
+        if new_partitions:
+            self.session.execute(text(
+                "ALTER TABLE history REORGANIZE PARTITION pmax INTO ("
+                + ", ".join(new_partitions)
+                + ", PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            ))
+            self.session.commit()
+
+    def drop_empty_partitions(self, before):
+        """Supprime les partitions mensuelles antérieures à `before` qui ne contiennent plus de lignes"""
+        for name, _ in self.get_partitions():
+            if name == "pmax" or name >= partition_name(before):
+                continue
+            # TABLE_ROWS n'est qu'une estimation : vérifier réellement avant de supprimer
+            remaining = self.session.execute(text(f"SELECT COUNT(*) FROM history PARTITION ({name})")).scalar()
+            if remaining == 0:
+                self.session.execute(text(f"ALTER TABLE history DROP PARTITION {name}"))
+                self.session.commit()
+                print(f"Partition {name} supprimée")
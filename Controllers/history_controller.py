@@ -6,8 +6,10 @@ import csv
 import os
 from Models import User
 from sqlalchemy import desc
-from sqlalchemy import func
-from Models import History, User
+from sqlalchemy import func, and_, or_, select, text, union_all
+from sqlalchemy.orm import joinedload
+from Models import History, HistoryArchive, User
+from Controllers.history_writer import HistoryWriter
 from datetime import datetime
 from sqlalchemy import desc
 
@@ -15,25 +17,56 @@ class HistoryController:
     """
     Contrôleur fusionné pour gérer les opérations sur l'historique
     """
+    # Identité des utilisateurs par account_number : (user_id, user_data sans mot de passe).
+    # Partagé par toutes les instances, vidé par UserController.update_user / delete_user.
+    _user_identities = {}
+
     def __init__(self, session):
         self.session = session
+
+    def resolve_user(self, user_account_number):
+        """
+        Retourne (user_id, user_data) de l'utilisateur, ou (None, None) s'il n'existe pas
+
+        L'utilisateur n'est cherché en base qu'une seule fois par account_number.
+        """
+        identity = HistoryController._user_identities.get(user_account_number)
+        if identity is None:
+            user = self.session.query(User).filter(User.account_number == user_account_number).first()
+            if not user:
+                return None, None
+            user_data = user.to_dict()
+            user_data.pop('password', None)
+            identity = (user.id, user_data)
+            HistoryController._user_identities[user_account_number] = identity
+        user_id, user_data = identity
+        return user_id, dict(user_data)
+
+    @classmethod
+    def invalidate_user_identity(cls, user_account_number=None):
+        """Oublie l'identité d'un utilisateur (ou de tous si account_number est None)"""
+        if user_account_number is None:
+            cls._user_identities.clear()
+        else:
+            cls._user_identities.pop(user_account_number, None)
     
     # ========== MÉTHODES EXISTANTES (gardées telles quelles) ==========
     def get_all_history(self):
         """Récupère tout l'historique, trié par date décroissante"""
-        entries = self.session.query(History).order_by(desc(History.timestamp)).all()
+        # joinedload : le nom d'utilisateur est chargé dans la même requête (pas de N+1)
+        entries = self.session.query(History).options(joinedload(History.user)).order_by(desc(History.timestamp)).all()
         return [entry.to_dict() for entry in entries]
     
     def add_history_entry(self, user_account_number, event, details, gestion="النظام"):
         """Méthode existante - LÉGÈREMENT MODIFIÉE pour supporter la gestion"""
         try:
-            user = self.session.query(User).filter(User.account_number == user_account_number).first()
-            if not user:
+            user_id, _ = self.resolve_user(user_account_number)
+            if user_id is None:
                 print(f"Erreur: Utilisateur avec account_number {user_account_number} non trouvé")
                 return False
             
             entry = History(
-                user_id=user.id,
+                user_id=user_id,
                 event=event,
                 details=details,
                 gestion=gestion,  # AJOUT : Support de la gestion
@@ -52,10 +85,9 @@ class HistoryController:
     def check_admin_access(self, user_account_number):
         """Méthode existante - gardée telle quelle"""
         try:
-            user = self.session.query(User).filter(User.account_number == user_account_number).first()
-            if user:
-                user_data = user.to_dict()
-                is_admin = user_data.get('role', '').lower() == 'admin'
+            user_id, user_data = self.resolve_user(user_account_number)
+            if user_id is not None:
+                is_admin = (user_data.get('role') or '').lower() == 'admin'
                 return is_admin, user_data
             else:
                 return False, None
@@ -66,6 +98,9 @@ class HistoryController:
     def get_history_with_access_control(self, user_account_number, username=None, gestion_filter=None):
         """Méthode existante - LÉGÈREMENT MODIFIÉE pour supporter le filtrage par gestion"""
         try:
+            # Les entrées encore en file d'attente doivent apparaître dans le journal
+            HistoryWriter.flush_all()
+
             is_admin, user_data = self.check_admin_access(user_account_number)
             
             if not user_data:
@@ -109,9 +144,12 @@ class HistoryController:
             error_msg = f"حدث خطأ أثناء تحميل سجل الأنشطة: {str(e)}"
             return False, None, error_msg
     
-    def filter_history_with_access_control(self, user_account_number, username=None, date=None, event=None, requesting_username=None, gestion_filter=None):
+    def filter_history_with_access_control(self, user_account_number, username=None, date=None, event=None, requesting_username=None, gestion_filter=None,
+                                           date_from=None, date_to=None, relative_range=None):
         """Méthode existante - LÉGÈREMENT MODIFIÉE pour supporter le filtrage par gestion"""
         try:
+            HistoryWriter.flush_all()
+
             is_admin, user_data = self.check_admin_access(user_account_number)
             
             if not user_data:
@@ -128,13 +166,18 @@ class HistoryController:
                 )
                 return False, None, "عذراً، هذه الميزة متاحة للمديرين فقط."
             
-            filtered_data = self.filter_history(username, date, event, gestion_filter)  # MODIFICATION : Ajouter gestion_filter
+            filtered_data = self.filter_history(username, date, event, gestion_filter,  # MODIFICATION : Ajouter gestion_filter
+                                                date_from, date_to, relative_range)
             
             filter_details = []
             if username:
                 filter_details.append(f"اسم المستخدم: {username}")
             if date:
                 filter_details.append(f"التاريخ: {date}")
+            if date_from or date_to:
+                filter_details.append(f"الفترة: {date_from or '...'} - {date_to or '...'}")
+            if relative_range:
+                filter_details.append(f"الفترة: {self.RELATIVE_RANGES.get(relative_range, (relative_range,))[0]}")
             if event:
                 filter_details.append(f"الحدث: {event}")
             if gestion_filter:  # AJOUT : Inclure la gestion dans les détails du filtre
@@ -155,17 +198,26 @@ class HistoryController:
             error_msg = f"حدث خطأ أثناء تصفية سجل الأنشطة: {str(e)}"
             return False, None, error_msg
     
-    def filter_history(self, username=None, date=None, event=None, gestion=None):
-        """Méthode existante - LÉGÈREMENT MODIFIÉE pour supporter le filtrage par gestion"""
-        query = self.session.query(History)
+    def filter_history(self, username=None, date=None, event=None, gestion=None,
+                       date_from=None, date_to=None, relative_range=None):
+        """
+        Méthode existante - LÉGÈREMENT MODIFIÉE pour supporter le filtrage par gestion
+
+        date: un seul jour ('YYYY-MM-DD'), date_from/date_to: période (voir resolve_date_range),
+        relative_range: clé de RELATIVE_RANGES (ex: 'last_7_days')
+        """
+        query = self.session.query(History).options(joinedload(History.user))
         
         if username:
             query = query.join(User).filter(User.username.like(f'%{username}%'))
         
         if date:
-            filter_date = datetime.strptime(date, '%Y-%m-%d')
-            next_day = datetime(filter_date.year, filter_date.month, filter_date.day + 1)
-            query = query.filter(History.timestamp >= filter_date, History.timestamp < next_day)
+            date_from = date_to = date
+        start, end = self.resolve_date_range(date_from, date_to, relative_range)
+        if start:
+            query = query.filter(History.timestamp >= start)
+        if end:
+            query = query.filter(History.timestamp < end)
         
         if event:
             query = query.filter(History.event == event)
@@ -176,6 +228,312 @@ class HistoryController:
         query = query.order_by(desc(History.timestamp))
         entries = query.all()
         return [entry.to_dict() for entry in entries]
+
+    # ========== PÉRIODES ==========
+    # Périodes relatives : clé -> (libellé, nombre de jours en comptant aujourd'hui)
+    RELATIVE_RANGES = {
+        'today': ("اليوم", 1),
+        'last_7_days': ("آخر 7 أيام", 7),
+        'last_30_days': ("آخر 30 يوما", 30),
+        'last_90_days': ("آخر 90 يوما", 90),
+        'last_365_days': ("آخر سنة", 365),
+    }
+
+    @classmethod
+    def resolve_date_range(cls, date_from=None, date_to=None, relative_range=None):
+        """
+        Convertit un filtre de dates en intervalle semi-ouvert [start, end)
+
+        Les comparaisons directes sur History.timestamp utilisent les index
+        (pas de DATE(timestamp) dans le WHERE).
+
+        Args:
+            date_from: Début inclus - date/'YYYY-MM-DD' (début du jour) ou datetime
+            date_to: Fin - date/'YYYY-MM-DD' (jour inclus) ou datetime (borne exclue)
+            relative_range: Clé de RELATIVE_RANGES, prioritaire sur date_from/date_to
+
+        Returns:
+            Tuple (start, end) de datetimes, None quand la borne est ouverte
+        """
+        if relative_range:
+            if relative_range not in cls.RELATIVE_RANGES:
+                raise ValueError(f"Période inconnue: {relative_range}")
+            _, days = cls.RELATIVE_RANGES[relative_range]
+            today = datetime.combine(datetime.now().date(), datetime.min.time())
+            return today - timedelta(days=days - 1), today + timedelta(days=1)
+
+        start = cls._as_datetime(date_from)
+        end = cls._as_datetime(date_to)
+        if end is not None and not isinstance(date_to, datetime):
+            # Jour inclus : borne exclue au lendemain (fin de mois / d'année comprises)
+            end += timedelta(days=1)
+        return start, end
+
+    @staticmethod
+    def _as_datetime(value):
+        if value is None or value == "":
+            return None
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, str):
+            return datetime.strptime(value, '%Y-%m-%d')
+        return datetime(value.year, value.month, value.day)
+
+    def get_daily_counts(self, username=None, date_from=None, date_to=None, event=None, gestion=None,
+                         relative_range=None, include_archive=False):
+        """
+        Nombre d'entrées par jour pour les filtres donnés (GROUP BY DATE(timestamp) en SQL)
+
+        Returns:
+            Liste de (date, nombre) triée du jour le plus récent au plus ancien
+        """
+        filters = dict(username=username, date_from=date_from, date_to=date_to, event=event,
+                       gestion=gestion, relative_range=relative_range)
+        counts = {}
+        try:
+            for model in ([History, HistoryArchive] if include_archive else [History]):
+                day = func.date(model.timestamp)
+                rows = self.session.execute(
+                    select(day.label('day'), func.count().label('count'))
+                    .select_from(model)
+                    .outerjoin(User, User.id == model.user_id)
+                    .where(*self._history_filter_conditions(model=model, **filters))
+                    .group_by(day)
+                ).all()
+                for row in rows:
+                    counts[row.day] = counts.get(row.day, 0) + row.count
+        except Exception as e:
+            print(f"Erreur lors du calcul des entrées par jour: {e}")
+            return []
+        return sorted(counts.items(), key=lambda item: item[0], reverse=True)
+
+    # ========== PAGINATION PAR CURSEUR (KEYSET) ==========
+    # Au-delà de ce nombre, le total filtré n'est plus compté exactement
+    HISTORY_COUNT_CAP = 10000
+
+    def get_history_page_with_access_control(self, user_account_number, requesting_username=None,
+                                             cursor=None, page_size=10, log_access=True,
+                                             include_archive=False, **filters):
+        """
+        Version paginée de get_history_with_access_control / filter_history_with_access_control
+
+        L'accès n'est journalisé qu'à l'ouverture de la première page (cursor None),
+        pas à chaque changement de page.
+
+        Args:
+            user_account_number: Numéro de compte de l'utilisateur qui consulte
+            requesting_username: Nom affiché dans l'historique
+            cursor: Curseur retourné par la page précédente (None = première page)
+            page_size: Nombre d'entrées par page
+            log_access: Journaliser la consultation (première page seulement)
+            include_archive: Inclure les entrées archivées (table history_archive)
+            **filters: Filtres acceptés par get_history_page
+
+        Returns:
+            Tuple (success, page, message) - page : dictionnaire retourné par get_history_page
+        """
+        try:
+            HistoryWriter.flush_all()
+
+            is_admin, user_data = self.check_admin_access(user_account_number)
+
+            if not user_data:
+                return False, None, "المستخدم غير موجود"
+
+            current_username = requesting_username or user_data.get('username', 'مستخدم غير معروف')
+
+            if not is_admin:
+                self.add_history_entry(
+                    user_account_number,
+                    "محاولة وصول غير مصرح",
+                    f"محاولة وصول إلى سجل الأنشطة من قبل المستخدم: {current_username}",
+                    gestion="النظام"
+                )
+                return False, None, "عذراً، هذه الميزة متاحة للمديرين فقط."
+
+            active_filters = {key: value for key, value in filters.items() if value}
+            if log_access and cursor is None:
+                gestion = active_filters.get('gestion')
+                if active_filters:
+                    filter_text = ", ".join(f"{key}: {value}" for key, value in active_filters.items())
+                    self.add_history_entry(
+                        user_account_number,
+                        "تصفية سجل الأنشطة",
+                        f"تم تصفية سجل الأنشطة من قبل المدير: {current_username} - المعايير: {filter_text}",
+                        gestion=gestion or "النظام"
+                    )
+                else:
+                    self.add_history_entry(
+                        user_account_number,
+                        "عرض سجل الأنشطة",
+                        f"تم الوصول إلى سجل الأنشطة بنجاح من قبل المدير: {current_username}",
+                        gestion="النظام"
+                    )
+
+            page = self.get_history_page(cursor=cursor, page_size=page_size,
+                                         include_archive=include_archive, **active_filters)
+            return True, page, "تم تحميل سجل الأنشطة بنجاح"
+
+        except Exception as e:
+            error_msg = f"حدث خطأ أثناء تحميل سجل الأنشطة: {str(e)}"
+            return False, None, error_msg
+
+    def get_history_page(self, cursor=None, page_size=10, username=None, date_from=None, date_to=None,
+                         event=None, gestion=None, relative_range=None, include_archive=False):
+        """
+        Une page de l'historique, de la plus récente à la plus ancienne
+
+        La page suivante reprend après la dernière entrée (timestamp, id) au lieu
+        d'un OFFSET : le coût ne dépend pas de la position dans la table. Le nom
+        d'utilisateur est joint dans la même requête.
+
+        Args:
+            cursor: (timestamp, id) de la dernière entrée de la page précédente, None pour la première page
+            page_size: Nombre d'entrées par page
+            username: Partie du nom d'utilisateur
+            date_from: Début de la période (voir resolve_date_range)
+            date_to: Fin de la période (voir resolve_date_range)
+            event: Événement exact
+            gestion: Module de gestion exact
+            relative_range: Période relative (clé de RELATIVE_RANGES)
+            include_archive: Parcourir aussi la table history_archive
+
+        Returns:
+            dict avec 'entries' (liste de dictionnaires comme History.to_dict), 'next_cursor'
+            (None s'il n'y a plus de page), 'total' et 'total_is_exact'
+        """
+        filters = dict(username=username, date_from=date_from, date_to=date_to, event=event,
+                       gestion=gestion, relative_range=relative_range)
+        models = [History, HistoryArchive] if include_archive else [History]
+
+        # Chaque table est limitée séparément (index utilisés), puis les pages sont fusionnées
+        branches = []
+        for model in models:
+            branch = self._history_select(model, self._history_filter_conditions(model=model, **filters))
+            if cursor is not None:
+                cursor_timestamp, cursor_id = cursor
+                branch = branch.where(or_(
+                    model.timestamp < cursor_timestamp,
+                    and_(model.timestamp == cursor_timestamp, model.id < cursor_id)
+                ))
+            # Une ligne de plus pour savoir s'il existe une page suivante
+            branches.append(branch.order_by(desc(model.timestamp), desc(model.id)).limit(page_size + 1))
+
+        if len(branches) == 1:
+            statement = branches[0]
+        else:
+            merged = union_all(*(select(branch.subquery()) for branch in branches)).subquery()
+            statement = select(merged).order_by(desc(merged.c.timestamp), desc(merged.c.id)).limit(page_size + 1)
+
+        rows = self.session.execute(statement).all()
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+        total, total_is_exact = self.estimate_history_count(include_archive=include_archive, **filters)
+
+        return {
+            'entries': [self._history_row_to_dict(row) for row in rows],
+            'next_cursor': (rows[-1].timestamp, rows[-1].id) if has_next else None,
+            'total': total,
+            'total_is_exact': total_is_exact
+        }
+
+    def estimate_history_count(self, include_archive=False, **filters):
+        """
+        Nombre (approché) d'entrées correspondant aux filtres de get_history_page
+
+        Sans filtre, utilise le nombre de lignes estimé par MySQL (information_schema)
+        au lieu d'un COUNT(*) sur toute la table. Avec filtres, compte au plus
+        HISTORY_COUNT_CAP lignes par table.
+
+        Returns:
+            Tuple (total, is_exact)
+        """
+        total, is_exact = 0, True
+        for model in ([History, HistoryArchive] if include_archive else [History]):
+            count, exact = self._estimate_table_count(model, self._history_filter_conditions(model=model, **filters))
+            total += count
+            is_exact = is_exact and exact
+        return total, is_exact
+
+    def _estimate_table_count(self, model, conditions):
+        try:
+            if not conditions:
+                estimate = self.session.execute(text(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+                ), {'table_name': model.__tablename__}).scalar()
+                if estimate is not None:
+                    return int(estimate), False
+
+            capped = (
+                select(model.id)
+                .outerjoin(User, User.id == model.user_id)
+                .where(*conditions)
+                .limit(self.HISTORY_COUNT_CAP + 1)
+                .subquery()
+            )
+            total = self.session.execute(select(func.count()).select_from(capped)).scalar()
+            if total > self.HISTORY_COUNT_CAP:
+                return self.HISTORY_COUNT_CAP, False
+            return total, True
+        except Exception as e:
+            print(f"Erreur lors de l'estimation du nombre d'entrées: {e}")
+            return 0, False
+
+    def _history_select(self, model, conditions):
+        """SELECT des colonnes d'historique de `model` (History ou HistoryArchive) avec le nom d'utilisateur"""
+        return select(
+            model.id, model.timestamp, model.user_id, User.username,
+            model.event, model.details, model.gestion,
+            model.idemploye, model.idFormation, model.idConge,
+            model.idTranche, model.idEvaluation, model.idAbsence
+        ).outerjoin(User, User.id == model.user_id).where(*conditions)
+
+    @staticmethod
+    def _history_row_to_dict(row):
+        """Même format que History.to_dict, pour une ligne de _history_select"""
+        return {
+            'id': row.id,
+            'user_id': row.user_id,
+            'username': row.username or 'مستخدم محذوف',
+            'event': row.event,
+            'details': row.details,
+            'gestion': row.gestion,
+            'timestamp': row.timestamp.strftime('%Y-%m-%d %H:%M:%S') if row.timestamp else '',
+            'idemploye': row.idemploye,
+            'idFormation': row.idFormation,
+            'idConge': row.idConge,
+            'idTranche': row.idTranche,
+            'idEvaluation': row.idEvaluation,
+            'idAbsence': row.idAbsence
+        }
+
+    def _archived_history(self, conditions, limit=None):
+        """Entrées archivées (dictionnaires) correspondant aux conditions, les plus récentes d'abord"""
+        query = self._history_select(HistoryArchive, conditions).order_by(
+            desc(HistoryArchive.timestamp), desc(HistoryArchive.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        return [self._history_row_to_dict(row) for row in self.session.execute(query).all()]
+
+    def _history_filter_conditions(self, username=None, date_from=None, date_to=None, event=None, gestion=None,
+                                   relative_range=None, model=History):
+        """Conditions SQL des filtres de l'historique (période semi-ouverte, voir resolve_date_range)"""
+        conditions = []
+        if username:
+            conditions.append(User.username.like(f'%{username}%'))
+        start, end = self.resolve_date_range(date_from, date_to, relative_range)
+        if start:
+            conditions.append(model.timestamp >= start)
+        if end:
+            conditions.append(model.timestamp < end)
+        if event:
+            conditions.append(model.event == event)
+        if gestion:
+            conditions.append(model.gestion == gestion)
+        return conditions
     
     # ========== NOUVELLES MÉTHODES AJOUTÉES ==========
     def add_history_entry_with_relations(self, user_account_number, event, details, gestion="النظام",
@@ -185,13 +543,13 @@ class HistoryController:
         NOUVELLE: Ajoute une entrée dans l'historique avec relations vers les entités et gestion
         """
         try:
-            user = self.session.query(User).filter(User.account_number == user_account_number).first()
-            if not user:
+            user_id, _ = self.resolve_user(user_account_number)
+            if user_id is None:
                 print(f"Erreur: Utilisateur avec account_number {user_account_number} non trouvé")
                 return False
             
             entry = History(
-                user_id=user.id,
+                user_id=user_id,
                 event=event,
                 details=details,
                 gestion=gestion,  # AJOUT : Support de la gestion
@@ -213,11 +571,12 @@ class HistoryController:
             print(f"Erreur lors de l'ajout dans l'historique: {str(e)}")
             return False
     
-    def get_history_by_entity(self, entity_type, entity_id):
+    def get_history_by_entity(self, entity_type, entity_id, include_archive=False):
         """
         NOUVELLE: Récupère l'historique pour une entité spécifique
+        include_archive: ajoute les entrées archivées (history_archive)
         """
-        query = self.session.query(History)
+        query = self.session.query(History).options(joinedload(History.user))
         
         if entity_type == 'employee':
             query = query.filter(History.idemploye == entity_id)
@@ -232,21 +591,35 @@ class HistoryController:
         elif entity_type == 'absence':
             query = query.filter(History.idAbsence == entity_id)
         
-        entries = query.order_by(desc(History.timestamp)).all()
-        return [entry.to_dict() for entry in entries]
+        entries = [entry.to_dict() for entry in query.order_by(desc(History.timestamp)).all()]
+
+        entity_columns = {
+            'employee': 'idemploye', 'formation': 'idFormation', 'conge': 'idConge',
+            'tranche': 'idTranche', 'evaluation': 'idEvaluation', 'absence': 'idAbsence'
+        }
+        if include_archive and entity_type in entity_columns:
+            column = getattr(HistoryArchive, entity_columns[entity_type])
+            entries += self._archived_history([column == entity_id])
+        return entries
     
-    def get_history_by_gestion(self, gestion, limit=None):
+    def get_history_by_gestion(self, gestion, limit=None, include_archive=False):
         """
         NOUVELLE: Récupère l'historique filtré par module de gestion
+        include_archive: complète avec les entrées archivées (plus anciennes)
         """
-        query = self.session.query(History).filter(History.gestion == gestion)
+        query = self.session.query(History).options(joinedload(History.user)).filter(History.gestion == gestion)
         query = query.order_by(desc(History.timestamp))
         
         if limit:
             query = query.limit(limit)
         
-        entries = query.all()
-        return [entry.to_dict() for entry in entries]
+        entries = [entry.to_dict() for entry in query.all()]
+
+        # Les entrées archivées sont toutes plus anciennes que celles de history
+        if include_archive and (not limit or len(entries) < limit):
+            remaining = limit - len(entries) if limit else None
+            entries += self._archived_history([HistoryArchive.gestion == gestion], remaining)
+        return entries
     
     def get_gestion_statistics(self):
         """
@@ -0,0 +1,170 @@
+import atexit
+import threading
+from datetime import datetime
+
+from Models import History
+
+
+class HistoryWriter:
+    """
+    Écriture groupée et asynchrone de l'historique
+
+    Les entrées sont mises en file d'attente puis insérées en un seul INSERT
+    multi-lignes, soit périodiquement (flush_interval secondes), soit dès que
+    la file atteint batch_size entrées. L'insertion passe par sa propre
+    connexion : elle ne touche pas à la session (ni aux transactions) des
+    contrôleurs. Les entrées restantes sont écrites à la déconnexion, à la
+    fermeture de la fenêtre principale et à la sortie du programme.
+
+    Les lectures (politique "aggregate" de BaseControllerWithHistory) sont seulement
+    comptées ; une entrée de synthèse par utilisateur, module et événement est ajoutée
+    à la file par flush_all (déconnexion, fermeture, consultation de l'historique).
+    """
+
+    # Un seul writer par moteur de base de données
+    _writers = {}
+    _writers_lock = threading.Lock()
+
+    def __init__(self, engine, batch_size=50, flush_interval=2.0):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = []
+        self._read_counts = {}  # (user_id, gestion, event) -> [nombre, première lecture]
+        self._queue_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Un seul flush à la fois
+        self._wake_up = threading.Event()
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name="HistoryWriter", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_session(cls, session):
+        """Retourne le writer partagé du moteur de la session (créé au premier appel)"""
+        engine = session.get_bind()
+        with cls._writers_lock:
+            writer = cls._writers.get(engine)
+            if writer is None:
+                writer = cls(engine)
+                cls._writers[engine] = writer
+            return writer
+
+    @classmethod
+    def flush_all(cls):
+        """Écrit immédiatement les entrées en attente de tous les writers"""
+        with cls._writers_lock:
+            writers = list(cls._writers.values())
+        for writer in writers:
+            writer.summarize_reads()
+            writer.flush()
+
+    @classmethod
+    def shutdown_all(cls):
+        """Arrête tous les writers après un dernier flush (sortie du programme)"""
+        with cls._writers_lock:
+            writers = list(cls._writers.values())
+            cls._writers.clear()
+        for writer in writers:
+            writer.stop()
+
+    def enqueue(self, user_id, event, details, gestion, **relations):
+        """
+        Ajoute une entrée à la file d'attente
+
+        Args:
+            user_id: ID de l'utilisateur (users.id)
+            event: Type d'événement
+            details: Détails de l'événement
+            gestion: Module de gestion
+            **relations: Colonnes des entités liées (idemploye, idFormation, ...)
+        """
+        entry = {
+            'user_id': user_id,
+            'event': event,
+            'details': details,
+            'gestion': gestion,
+            'timestamp': datetime.now(),  # Heure de l'action, pas celle du flush
+            'idemploye': relations.get('idemploye'),
+            'idFormation': relations.get('idFormation'),
+            'idConge': relations.get('idConge'),
+            'idTranche': relations.get('idTranche'),
+            'idEvaluation': relations.get('idEvaluation'),
+            'idAbsence': relations.get('idAbsence'),
+        }
+        with self._queue_lock:
+            self._queue.append(entry)
+            queue_size = len(self._queue)
+
+        if queue_size >= self.batch_size:
+            self._wake_up.set()
+
+    def record_read(self, user_id, event, gestion):
+        """Compte une lecture sans l'écrire (voir summarize_reads)"""
+        with self._queue_lock:
+            counts = self._read_counts.setdefault((user_id, gestion, event), [0, datetime.now()])
+            counts[0] += 1
+
+    def summarize_reads(self):
+        """Met en file une entrée de synthèse par (utilisateur, module, événement) de lecture"""
+        with self._queue_lock:
+            read_counts, self._read_counts = self._read_counts, {}
+        for (user_id, gestion, event), (count, first_read) in read_counts.items():
+            self.enqueue(
+                user_id, event,
+                f"ملخص عمليات القراءة: {count} عملية منذ {first_read.strftime('%Y-%m-%d %H:%M:%S')}",
+                gestion
+            )
+        return len(read_counts)
+
+    def pending_count(self):
+        with self._queue_lock:
+            return len(self._queue)
+
+    def flush(self):
+        """Insère toutes les entrées en attente, retourne le nombre d'entrées écrites"""
+        with self._flush_lock:
+            with self._queue_lock:
+                entries, self._queue = self._queue, []
+
+            if not entries:
+                return 0
+
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(History.__table__.insert(), entries)
+                return len(entries)
+            except Exception as e:
+                print(f"Erreur lors de l'écriture groupée de l'historique: {e}")
+                # Une entrée invalide ne doit pas faire perdre tout le lot
+                return self._insert_one_by_one(entries)
+
+    def _insert_one_by_one(self, entries):
+        written = 0
+        for entry in entries:
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(History.__table__.insert(), [entry])
+                written += 1
+            except Exception as e:
+                print(f"Erreur lors de l'ajout dans l'historique ({entry['event']}): {e}")
+        return written
+
+    def stop(self):
+        """Arrête le thread d'écriture et écrit les entrées restantes"""
+        self._stopped = True
+        self._wake_up.set()
+        self._thread.join(timeout=5)
+        self.summarize_reads()
+        self.flush()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake_up.wait(self.flush_interval)
+            self._wake_up.clear()
+            self.flush()
+
+
+# Aucune entrée ne doit être perdue à la fermeture du programme
+atexit.register(HistoryWriter.shutdown_all)
@@ -0,0 +1,217 @@
+from collections import namedtuple
+
+from sqlalchemy import null, select
+
+from Models.Absence import Absence
+from Models.Conge import Conge
+from Models.DepartTemporaire import DepartTemporaire
+from Models.Formation import Formation
+from Models.Tranche import Tranche
+
+
+# Une période occupée d'un employé ; kind : "tranche", "absence", "depart_temporaire" ou "formation"
+Interval = namedtuple("Interval", ["start", "end", "kind", "record_id", "label"])
+
+# Libellés affichés dans les messages de conflit
+KIND_LABELS = {
+    "tranche": "شطر عطلة",
+    "absence": "غياب",
+    "depart_temporaire": "مغادرة مؤقتة",
+    "formation": "تكوين",
+}
+
+
+class IntervalTree:
+    """
+    Arbre d'intervalles statique (dates incluses aux deux bornes)
+
+    Les intervalles sont triés par début et rangés dans un arbre binaire équilibré
+    implicite (le milieu de chaque tranche du tableau est la racine du sous-arbre) ;
+    chaque nœud retient la plus grande fin de son sous-arbre pour élaguer la
+    recherche : O(log n + k) par requête. Les ajouts vont dans un petit tampon
+    parcouru linéairement, fusionné dans l'arbre quand il dépasse REBUILD_THRESHOLD.
+    """
+
+    REBUILD_THRESHOLD = 32
+
+    def __init__(self, intervals=()):
+        self._pending = []
+        self._build(list(intervals))
+
+    def _build(self, intervals):
+        self._intervals = sorted(intervals, key=lambda interval: (interval.start, interval.end))
+        self._max_end = [None] * len(self._intervals)
+        self._fill_max_end(0, len(self._intervals) - 1)
+
+    def _fill_max_end(self, low, high):
+        if low > high:
+            return None
+        middle = (low + high) // 2
+        max_end = self._intervals[middle].end
+        for child_max in (self._fill_max_end(low, middle - 1), self._fill_max_end(middle + 1, high)):
+            if child_max is not None and child_max > max_end:
+                max_end = child_max
+        self._max_end[middle] = max_end
+        return max_end
+
+    def __len__(self):
+        return len(self._intervals) + len(self._pending)
+
+    def __iter__(self):
+        return iter(self._intervals + self._pending)
+
+    def add(self, interval):
+        self._pending.append(interval)
+        if len(self._pending) > self.REBUILD_THRESHOLD:
+            self._build(self._intervals + self._pending)
+            self._pending = []
+
+    def remove(self, predicate):
+        """Retire les intervalles pour lesquels predicate(interval) est vrai"""
+        kept = [interval for interval in self if not predicate(interval)]
+        if len(kept) != len(self):
+            self._pending = []
+            self._build(kept)
+
+    def overlapping(self, start, end):
+        """Intervalles ayant au moins un jour en commun avec [start, end]"""
+        found = []
+        self._search(0, len(self._intervals) - 1, start, end, found)
+        found.extend(interval for interval in self._pending if interval.start <= end and interval.end >= start)
+        return found
+
+    def _search(self, low, high, start, end, found):
+        if low > high:
+            return
+        middle = (low + high) // 2
+        # Aucun intervalle de ce sous-arbre ne se termine après le début recherché
+        if self._max_end[middle] < start:
+            return
+        self._search(low, middle - 1, start, end, found)
+        interval = self._intervals[middle]
+        if interval.start > end:
+            # Tout ce qui suit commence encore plus tard
+            return
+        if interval.end >= start:
+            found.append(interval)
+        self._search(middle + 1, high, start, end, found)
+
+
+class ScheduleIndex:
+    """
+    Périodes occupées (tranches de congé, absences, départs temporaires, formations)
+    d'un ensemble d'employés, chargées une fois pour toute une session d'édition
+
+    Quatre requêtes au chargement quel que soit le nombre d'employés, puis toutes
+    les vérifications de chevauchement se font en mémoire. Les entrées validées
+    par validate_batch sont ajoutées à l'index : les entrées d'un même lot sont
+    donc aussi vérifiées entre elles.
+    """
+
+    def __init__(self, session, employee_ids):
+        self.session = session
+        self.trees = {}
+        self.load(employee_ids)
+
+    def load(self, employee_ids):
+        """Charge (ou recharge) les périodes des employés donnés"""
+        employee_ids = {employee_id for employee_id in employee_ids if employee_id is not None}
+        if not employee_ids:
+            return
+
+        intervals = {employee_id: [] for employee_id in employee_ids}
+        departs_temporaires = DepartTemporaire.__table__
+        sources = [
+            ("tranche", select(Conge.idemploye, Tranche.idTranche, Tranche.DateDebut, Tranche.DateFin, Tranche.NumeroDecision)
+                .join(Conge, Conge.idConge == Tranche.idConge)
+                .where(Conge.idemploye.in_(employee_ids))),
+            ("absence", select(Absence.idemploye, Absence.idAbsence, Absence.DateDebut, Absence.DateFin, Absence.Type)
+                .where(Absence.idemploye.in_(employee_ids))),
+            ("depart_temporaire", select(departs_temporaires.c.idemploye, departs_temporaires.c.iddeparttemporaire,
+                                         departs_temporaires.c.Datedebut, departs_temporaires.c.Datefin, null())
+                .where(departs_temporaires.c.idemploye.in_(employee_ids))),
+            ("formation", select(Formation.idemploye, Formation.idFormation, Formation.DateDebut, Formation.DateFin, Formation.Type)
+                .where(Formation.idemploye.in_(employee_ids))),
+        ]
+        for kind, query in sources:
+            for employee_id, record_id, start, end, label in self.session.execute(query):
+                intervals[employee_id].append(Interval(start, end, kind, record_id, label))
+
+        for employee_id, employee_intervals in intervals.items():
+            self.trees[employee_id] = IntervalTree(employee_intervals)
+
+    def _tree(self, employee_id):
+        if employee_id not in self.trees:
+            self.load([employee_id])
+        return self.trees.setdefault(employee_id, IntervalTree())
+
+    def conflicts(self, employee_id, start, end, exclude=None, kinds=None):
+        """
+        Périodes de l'employé qui chevauchent [start, end]
+
+        Args:
+            exclude: (kind, record_id) de l'enregistrement modifié, ignoré
+            kinds: Types de périodes à vérifier (tous par défaut)
+
+        Returns:
+            Liste d'Interval triée par date de début
+        """
+        found = [
+            interval for interval in self._tree(employee_id).overlapping(start, end)
+            if (kinds is None or interval.kind in kinds)
+            and (exclude is None or (interval.kind, interval.record_id) != tuple(exclude))
+        ]
+        return sorted(found, key=lambda interval: (interval.start, interval.end))
+
+    def add(self, employee_id, interval):
+        self._tree(employee_id).add(interval)
+
+    def remove(self, employee_id, kind, record_id):
+        self._tree(employee_id).remove(
+            lambda interval: interval.kind == kind and interval.record_id == record_id
+        )
+
+    def replace(self, employee_id, interval):
+        """Remplace l'enregistrement (même kind et record_id) après une modification"""
+        self.remove(employee_id, interval.kind, interval.record_id)
+        self.add(employee_id, interval)
+
+    def validate_batch(self, entries, kinds=None):
+        """
+        Vérifie un lot de périodes en un seul appel
+
+        Args:
+            entries: Liste de dict avec idemploye, start, end, kind et, pour une
+                modification, record_id (l'enregistrement lui-même est ignoré)
+            kinds: Types de périodes existantes à vérifier (tous par défaut)
+
+        Returns:
+            Liste de (position dans le lot, entrée, conflits) pour les entrées en conflit ;
+            vide si tout le lot est valide
+        """
+        self.load(entry["idemploye"] for entry in entries if entry["idemploye"] not in self.trees)
+
+        report = []
+        for position, entry in enumerate(entries):
+            record_id = entry.get("record_id")
+            exclude = (entry["kind"], record_id) if record_id is not None else None
+            found = self.conflicts(entry["idemploye"], entry["start"], entry["end"], exclude=exclude, kinds=kinds)
+            if found:
+                report.append((position, entry, found))
+            # Les entrées suivantes du lot sont vérifiées contre celle-ci
+            interval = Interval(entry["start"], entry["end"], entry["kind"], record_id, entry.get("label"))
+            if record_id is not None:
+                self.replace(entry["idemploye"], interval)
+            else:
+                self.add(entry["idemploye"], interval)
+        return report
+
+
+def describe_conflicts(conflicts):
+    """Message lisible listant tous les conflits (une ligne par période)"""
+    return "\n".join(
+        f"{KIND_LABELS.get(interval.kind, interval.kind)}"
+        f"{' (' + str(interval.label) + ')' if interval.label else ''}: "
+        f"{interval.start.strftime('%Y-%m-%d')} - {interval.end.strftime('%Y-%m-%d')}"
+        for interval in conflicts
+    )
@@ -1,63 +1,254 @@
+import threading
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, cast, literal, literal_column, select, union_all, String
+from sqlalchemy.dialects.mysql import insert
 from datetime import date
 from Models.Employe import Employe
+from Models.StatisticsSnapshot import StatisticsSnapshot
 
 
-def repartition_par_sexe(session: Session):
-    resultats = session.query(Employe.Sexe, func.count()).group_by(Employe.Sexe).all()
-    total = sum([r[1] for r in resultats])
-    return {
-        sexe if sexe else "Non spécifié": round((count / total) * 100, 2)
-        for sexe, count in resultats
-    }
-    
-def repartition_par_wilaya(session: Session):
-    resultats = session.query(Employe.Lieudenaissance, func.count()).group_by(Employe.Lieudenaissance).all()
-    return {
-        wilaya if wilaya else "Non spécifiée": count
-        for wilaya, count in resultats
+# Tranches d'âge : (libellé, borne supérieure exclue), la dernière n'a pas de borne
+AGE_BUCKETS = [
+    ("< 25", 25),
+    ("25-34", 35),
+    ("35-44", 45),
+    ("45-54", 55),
+    ("55+", None),
+]
+
+# Dimensions affichées en pourcentage dans la barre de statistiques
+PERCENTAGE_DIMENSIONS = ("sexe", "statut")
+
+# Cache mémoire des répartitions : (version des données, jour) -> statistiques.
+# La version est incrémentée après chaque modification d'employé ou départ.
+_data_version = 0
+_statistics_cache = {}
+_cache_lock = threading.Lock()
+
+
+def bump_data_version():
+    """Invalide les statistiques en cache (à appeler après le commit d'une modification)"""
+    global _data_version
+    with _cache_lock:
+        _data_version += 1
+        _statistics_cache.clear()
+
+
+def get_data_version():
+    return _data_version
+
+
+def _age_bucket_expression():
+    """CASE SQL donnant la tranche d'âge (âge calculé par MySQL à la date du jour)"""
+    age = func.timestampdiff(literal_column("YEAR"), Employe.Datedenaissance, func.curdate())
+    whens = [(age < upper, label) for label, upper in AGE_BUCKETS if upper is not None]
+    return case(*whens, else_=AGE_BUCKETS[-1][0])
+
+
+def _age_bucket(birthdate, today):
+    """Même découpage que _age_bucket_expression, pour un seul employé"""
+    age = today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
+    for label, upper in AGE_BUCKETS:
+        if upper is None or age < upper:
+            return label
+
+
+def _bucket_label(dimension, bucket):
+    """Libellé affiché d'une catégorie brute (NULL, booléen du statut...)"""
+    if dimension == "statut":
+        return "Activé" if bucket not in (None, "0") else "Désactivé"
+    if dimension == "wilaya":
+        return bucket if bucket else "Non spécifiée"
+    return bucket if bucket else "Non spécifié"
+
+
+def compute_employee_statistics(session: Session):
+    """
+    Calcule toutes les répartitions en un seul aller-retour (UNION ALL de GROUP BY)
+
+    session: Session ou Connection SQLAlchemy
+
+    Returns:
+        Dictionnaire {dimension: {catégorie: nombre d'employés}}
+    """
+    age_bucket = _age_bucket_expression()
+    dimensions = [
+        ("sexe", Employe.Sexe, None),
+        ("age", age_bucket, Employe.Datedenaissance.isnot(None)),
+        ("statut", cast(Employe.Statut, String), None),
+        ("statut_familial", Employe.Statutfamilial, None),
+        ("wilaya", Employe.Lieudenaissance, None),
+    ]
+
+    selects = []
+    for name, column, condition in dimensions:
+        query = select(
+            literal(name).label("dimension"),
+            column.label("bucket"),
+            func.count().label("total")
+        ).select_from(Employe)
+        if condition is not None:
+            query = query.where(condition)
+        selects.append(query.group_by(column))
+
+    statistics = {name: {} for name, _, _ in dimensions}
+    for dimension, bucket, total in session.execute(union_all(*selects)).all():
+        label = _bucket_label(dimension, bucket)
+        # Ex: Statut NULL et 0 sont tous deux "Désactivé"
+        statistics[dimension][label] = statistics[dimension].get(label, 0) + total
+    return statistics
+
+
+def refresh_statistics_snapshot(session: Session):
+    """
+    Recalcule toutes les répartitions et remplace le snapshot
+
+    Dans sa propre transaction, sur une connexion distincte : le travail en cours de
+    la session de l'appelant n'est ni validé ni annulé. Les lignes sont écrites par
+    INSERT ... ON DUPLICATE KEY UPDATE, deux postes qui reconstruisent le snapshot en
+    même temps écrivent donc les mêmes clés sans erreur.
+    """
+    try:
+        today = date.today()
+        snapshot = StatisticsSnapshot.__table__
+        with session.get_bind().begin() as connection:
+            statistics = compute_employee_statistics(connection)
+            rows = [
+                {"dimension": dimension, "bucket": bucket, "total": total, "computed_on": today}
+                for dimension, buckets in statistics.items()
+                for bucket, total in buckets.items()
+            ]
+            if rows:
+                statement = insert(snapshot).values(rows)
+                connection.execute(statement.on_duplicate_key_update(
+                    total=statement.inserted.total,
+                    computed_on=statement.inserted.computed_on
+                ))
+            # Catégories qui n'existent plus depuis le calcul précédent
+            connection.execute(snapshot.delete().where(snapshot.c.computed_on != today))
+        return statistics
+    except Exception as e:
+        print(f"Erreur lors du calcul du snapshot des statistiques: {e}")
+        raise
+
+
+def load_statistics_snapshot(session: Session):
+    """
+    Répartitions lues depuis le snapshot, reconstruit s'il est vide ou d'un autre jour
+
+    Returns:
+        Dictionnaire {dimension: {catégorie: nombre d'employés}}
+    """
+    rows = session.query(StatisticsSnapshot).all()
+    if not rows or any(row.computed_on != date.today() for row in rows):
+        return refresh_statistics_snapshot(session)
+
+    statistics = {}
+    for row in rows:
+        if row.total > 0:
+            statistics.setdefault(row.dimension, {})[row.bucket] = row.total
+    return statistics
+
+
+def employee_statistics_keys(employe, today=None):
+    """Catégories d'un employé pour chaque dimension (même libellés que le snapshot)"""
+    if employe is None:
+        return {}
+    today = today or date.today()
+    keys = {
+        "sexe": _bucket_label("sexe", employe.Sexe),
+        "statut": _bucket_label("statut", None if employe.Statut is None else str(int(bool(employe.Statut)))),
+        "statut_familial": _bucket_label("statut_familial", employe.Statutfamilial),
+        "wilaya": _bucket_label("wilaya", employe.Lieudenaissance),
     }
+    if employe.Datedenaissance:
+        keys["age"] = _age_bucket(employe.Datedenaissance, today)
+    return keys
 
-def repartition_par_age(session: Session):
+
+def apply_employee_change(session: Session, before_keys, after_keys):
+    """
+    Met à jour le snapshot pour un seul employé, dans la transaction de l'appelant
+
+    À appeler avant le commit de l'opération, avec les catégories de l'employé
+    avant (None pour un ajout) et après (None pour une suppression) la modification.
+    Un snapshot absent ou périmé n'est pas touché : il sera reconstruit à la lecture.
+    """
     today = date.today()
-    tranches = {
-        "< 25": 0,
-        "25-34": 0,
-        "35-44": 0,
-        "45-54": 0,
-        "55+": 0,
+    computed_on = session.query(StatisticsSnapshot.computed_on).limit(1).scalar()
+    if computed_on != today:
+        return
+
+    before_keys = before_keys or {}
+    after_keys = after_keys or {}
+    for dimension in set(before_keys) | set(after_keys):
+        old_bucket = before_keys.get(dimension)
+        new_bucket = after_keys.get(dimension)
+        if old_bucket == new_bucket:
+            continue
+        if old_bucket is not None:
+            session.query(StatisticsSnapshot).filter(
+                StatisticsSnapshot.dimension == dimension,
+                StatisticsSnapshot.bucket == old_bucket
+            ).update({StatisticsSnapshot.total: StatisticsSnapshot.total - 1}, synchronize_session=False)
+        if new_bucket is not None:
+            statement = insert(StatisticsSnapshot.__table__).values(
+                dimension=dimension, bucket=new_bucket, total=1, computed_on=today
+            )
+            session.execute(statement.on_duplicate_key_update(total=StatisticsSnapshot.__table__.c.total + 1))
+
+
+def _as_percentages(counts):
+    total = sum(counts.values())
+    return {
+        bucket: round((count / total) * 100, 2)
+        for bucket, count in counts.items()
+    } if total else {}
+
+
+def get_employee_statistics(session: Session):
+    """
+    Toutes les répartitions de la barre de statistiques (sexe et statut en pourcentage)
+
+    Servies depuis la mémoire tant que la version des données et le jour n'ont pas
+    changé, sinon lues depuis le snapshot. Le résultat partagé ne doit pas être modifié.
+
+    Returns:
+        Dictionnaire {dimension: {catégorie: valeur}}
+    """
+    key = (_data_version, date.today())
+    cached = _statistics_cache.get(key)
+    if cached is not None:
+        return cached
+
+    statistics = load_statistics_snapshot(session)
+    result = {
+        dimension: _as_percentages(counts) if dimension in PERCENTAGE_DIMENSIONS else counts
+        for dimension, counts in statistics.items()
     }
-    employes = session.query(Employe.Datedenaissance).filter(Employe.Datedenaissance != None).all()
+    with _cache_lock:
+        # Une modification pendant le calcul a changé la version : ne pas garder ce résultat
+        if key[0] == _data_version:
+            _statistics_cache.clear()
+            _statistics_cache[key] = result
+    return result
 
-    for (birthdate,) in employes:
-        age = today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
-        if age < 25:
-            tranches["< 25"] += 1
-        elif age < 35:
-            tranches["25-34"] += 1
-        elif age < 45:
-            tranches["35-44"] += 1
-        elif age < 55:
-            tranches["45-54"] += 1
-        else:
-            tranches["55+"] += 1
 
-    return tranches
+def repartition_par_sexe(session: Session):
+    return get_employee_statistics(session).get("sexe", {})
+
+def repartition_par_wilaya(session: Session):
+    return get_employee_statistics(session).get("wilaya", {})
+
+def repartition_par_age(session: Session):
+    age_stats = get_employee_statistics(session).get("age", {})
+    # Toutes les tranches, dans l'ordre, même vides
+    return {label: age_stats.get(label, 0) for label, _ in AGE_BUCKETS}
 
 
 def repartition_par_statut(session: Session):
-    resultats = session.query(Employe.Statut, func.count()).group_by(Employe.Statut).all()
-    total = sum([r[1] for r in resultats])
-    return {
-        "Activé" if statut else "Désactivé": round((count / total) * 100, 2)
-        for statut, count in resultats
-    }
-    
-    
+    return get_employee_statistics(session).get("statut", {})
+
+
 def repartition_par_statut_familial(session: Session):
-    resultats = session.query(Employe.Statutfamilial, func.count()).group_by(Employe.Statutfamilial).all()
-    return {
-        statut if statut else "Non spécifié": count
-        for statut, count in resultats
-    }
\ No newline at end of file
+    return get_employee_statistics(session).get("statut_familial", {})
@@ -0,0 +1,148 @@
+from collections import namedtuple
+
+from sqlalchemy import String, and_, cast, false, or_
+
+
+class TableFilter:
+    """
+    Filtre d'un tableau tel que saisi dans la boîte de dialogue « ترشيح »
+
+    columns : libellés des colonnes cochées ; value : texte recherché. Une ligne
+    est retenue si l'une des colonnes cochées contient la valeur (sans distinction
+    de casse, selon la collation MySQL). Chaque contrôleur le compile en clause
+    WHERE avec compile_table_filter et sa table FILTER_COLUMNS {libellé: expression}.
+    """
+
+    def __init__(self, columns=(), value=""):
+        # Certains en-têtes sont sur deux lignes, les cases à cocher non
+        self.columns = [" ".join(column.split()) for column in columns]
+        self.value = (value or "").strip()
+
+    def is_empty(self):
+        return not self.value or not self.columns
+
+    def __repr__(self):
+        return f"<TableFilter {self.columns} ~ {self.value!r}>"
+
+
+def compile_table_filter(table_filter, filter_columns):
+    """
+    Clause WHERE d'un TableFilter : OU des colonnes cochées contenant la valeur
+
+    Args:
+        table_filter: TableFilter (ou None)
+        filter_columns: {libellé de colonne: expression SQL} du contrôleur
+
+    Returns:
+        Clause SQLAlchemy, ou None si le filtre est vide (aucune restriction)
+    """
+    if table_filter is None or table_filter.is_empty():
+        return None
+
+    conditions = []
+    for column in table_filter.columns:
+        expression = filter_columns.get(column)
+        if expression is None:
+            continue
+        conditions.append(_as_text(expression).contains(table_filter.value, autoescape=True))
+
+    # Aucune colonne connue : comme avant, aucune ligne ne correspond
+    return or_(*conditions) if conditions else false()
+
+
+def _as_text(expression):
+    # Dates et nombres comparés sous leur forme affichée (CAST ... AS CHAR)
+    if not isinstance(expression.type, String):
+        return cast(expression, String)
+    return expression
+
+
+# Champ d'un filtre déclaratif :
+#   column   : expression SQL filtrée
+#   operator : "exact", "prefix" (LIKE 'v%', utilise un index), "contains" ou "range"
+#   join     : relation nécessaire (clé des `joins` de compile_field_filters), None si la
+#              colonne est déjà dans la requête de l'appelant
+#   convert  : conversion de la valeur saisie (ValueError : aucune ligne ne correspond)
+FilterField = namedtuple("FilterField", ["column", "operator", "join", "convert"], defaults=(None, None))
+
+
+def _range_condition(column, value):
+    # (début, fin) avec bornes incluses et optionnelles, ou une valeur unique
+    if not isinstance(value, (tuple, list)):
+        return column == value
+    low, high = value
+    bounds = []
+    if low:
+        bounds.append(column >= low)
+    if high:
+        bounds.append(column <= high)
+    return and_(*bounds) if bounds else None
+
+
+FILTER_OPERATORS = {
+    "exact": lambda column, value: column == value,
+    "prefix": lambda column, value: _as_text(column).startswith(value, autoescape=True),
+    "contains": lambda column, value: _as_text(column).contains(value, autoescape=True),
+    "range": _range_condition,
+}
+
+
+def compile_field_filters(criteria, fields, joins=None):
+    """
+    Clause WHERE d'un dictionnaire de critères {clé: valeur} : ET de tous les critères
+
+    Les critères sont compilés dans l'ordre de `fields` et non dans l'ordre de saisie :
+    une même combinaison de critères donne toujours la même requête paramétrée, compilée
+    une seule fois (cache de compilation de SQLAlchemy). Une clé associée à un tuple de
+    FilterField est vraie si l'une de ses alternatives l'est. Les clés inconnues et les
+    valeurs vides sont ignorées.
+
+    Args:
+        criteria: {clé: valeur saisie}
+        fields: {clé: FilterField ou tuple de FilterField}
+        joins: {relation: fonction(condition) -> clause}, par exemple un EXISTS corrélé
+
+    Returns:
+        Clause SQLAlchemy, ou None si aucun critère n'est renseigné
+    """
+    joins = joins or {}
+    conditions = []
+    for key, alternatives in fields.items():
+        value = criteria.get(key)
+        if not value:
+            continue
+        if isinstance(alternatives, FilterField):
+            alternatives = (alternatives,)
+
+        matches = []
+        for field in alternatives:
+            try:
+                field_value = field.convert(value) if field.convert else value
+            except (TypeError, ValueError):
+                # Valeur inutilisable pour ce champ (par ex. un numéro non numérique)
+                matches.append(false())
+                continue
+            condition = FILTER_OPERATORS[field.operator](field.column, field_value)
+            if condition is None:
+                continue
+            if field.join in joins:
+                condition = joins[field.join](condition)
+            matches.append(condition)
+
+        if matches:
+            conditions.append(or_(*matches) if len(matches) > 1 else matches[0])
+
+    return and_(*conditions) if conditions else None
+
+
+def paginate(query, page, page_size):
+    """
+    Une page d'une requête ORM triée, et le nombre total de lignes
+
+    Returns:
+        Tuple (lignes de la page, total)
+    """
+    total = query.order_by(None).count()
+    page = max(1, page)
+    rows = query.offset((page - 1) * page_size).limit(page_size).all()
+    return rows, total
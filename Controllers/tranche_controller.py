@@ -3,6 +3,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 from Models.Tranche import Tranche
 from Models.Conge import Conge
+from Controllers.schedule_index import Interval, ScheduleIndex, describe_conflicts
 
 class TrancheController(BaseControllerWithHistory):
     """
@@ -38,10 +39,6 @@ class TrancheController(BaseControllerWithHistory):
         try:
             tranches = self.session.query(Tranche).filter(Tranche.idConge == conge_id).order_by(Tranche.DateDebut).all()
             
-            # Log the consultation
-            conge = self.session.query(Conge).filter(Conge.idConge == conge_id).first()
-
-            
             return tranches
             
         except Exception as e:
@@ -53,7 +50,7 @@ class TrancheController(BaseControllerWithHistory):
             )
             raise e
     
-    def create_tranche(self, conge_id, numero_decision, date_decision, date_debut, date_fin):
+    def create_tranche(self, conge_id, numero_decision, date_decision, date_debut, date_fin, schedule=None):
         """
         Create a new tranche for a leave record with enhanced validation and logging
         
@@ -63,6 +60,7 @@ class TrancheController(BaseControllerWithHistory):
             date_decision (date): Decision date
             date_debut (date): Start date
             date_fin (date): End date
+            schedule (ScheduleIndex, optional): Edit-session index, updated with the new tranche
             
         Returns:
             dict: Dictionary with created tranche and updated conge
@@ -71,74 +69,131 @@ class TrancheController(BaseControllerWithHistory):
             ValueError: If validation fails
             SQLAlchemyError: For database errors
         """
+        result = self.create_tranches(conge_id, [{
+            "numero_decision": numero_decision,
+            "date_decision": date_decision,
+            "date_debut": date_debut,
+            "date_fin": date_fin
+        }], schedule=schedule)
+        return {"tranche": result["tranches"][0], "conge": result["conge"]}
+
+    def create_tranches(self, conge_id, tranches, schedule=None):
+        """
+        Create several tranches for a leave record in one transaction (all or nothing)
+        
+        Overlaps of the whole batch are checked by a single ScheduleIndex.validate_batch
+        call, against the employee's other periods and between the new tranches.
+        
+        Args:
+            conge_id (int): The leave ID
+            tranches (list): Dicts with numero_decision, date_decision, date_debut and date_fin
+            schedule (ScheduleIndex, optional): Edit-session index, updated with the new tranches
+            
+        Returns:
+            dict: Dictionary with created tranches and updated conge
+            
+        Raises:
+            ValueError: If validation fails (every overlapping period is listed)
+            SQLAlchemyError: For database errors
+        """
+        employee_id = None
         try:
             # Get the leave record
             conge = self.session.query(Conge).filter(Conge.idConge == conge_id).first()
-
+            if not conge:
+                raise ValueError(f"Leave record with ID {conge_id} not found")
             
-            # Check if employee has fewer than 5 existing tranches
+            # Check if employee keeps at most 5 tranches
             existing_tranches_count = self.session.query(Tranche).filter(Tranche.idConge == conge_id).count()
-            if existing_tranches_count >= 5:
-
+            if existing_tranches_count + len(tranches) > 5:
                 raise ValueError("Maximum of 5 tranches allowed per leave record")
             
-            # Validate dates are within current year
             current_year = datetime.now().year
-            if date_debut.year != current_year or date_fin.year != current_year:
-                raise ValueError(f"Dates must be within current year ({current_year})")
-            
-            # Validate date range
-            if date_debut > date_fin:
-
-                raise ValueError("Start date must be before end date")
-            
-            # Check for overlaps with existing tranches
-            self.validate_tranche_dates(conge_id, date_debut, date_fin)
-            
-            # Calculate tranche duration
-            tranche_days = (date_fin - date_debut).days + 1
-            
-            # Check if tranche duration exceeds remaining days
-            if tranche_days > conge.NbrJoursRestants:
-                raise ValueError(f"Tranche duration ({tranche_days} days) exceeds remaining days ({conge.NbrJoursRestants} days)")
-            
-            # Create new tranche
-            new_tranche = Tranche(
-                idConge=conge_id,
-                NumeroDecision=numero_decision,
-                DateDecision=date_decision,
-                DateDebut=date_debut,
-                DateFin=date_fin
-            )
-            
-            self.session.add(new_tranche)
+            for entry in tranches:
+                # Validate dates are within current year
+                if entry["date_debut"].year != current_year or entry["date_fin"].year != current_year:
+                    raise ValueError(f"Dates must be within current year ({current_year})")
+                
+                # Validate date range
+                if entry["date_debut"] > entry["date_fin"]:
+                    raise ValueError("Start date must be before end date")
+            
+            # Check if the tranches duration exceeds remaining days
+            tranche_days = [(entry["date_fin"] - entry["date_debut"]).days + 1 for entry in tranches]
+            if sum(tranche_days) > conge.NbrJoursRestants:
+                raise ValueError(f"Tranche duration ({sum(tranche_days)} days) exceeds remaining days ({conge.NbrJoursRestants} days)")
+            
+            # Check for overlaps, the whole batch in one pass over the index
+            if schedule is None:
+                schedule = ScheduleIndex(self.session, [conge.idemploye])
+            employee_id = conge.idemploye
+            report = schedule.validate_batch([
+                {
+                    "idemploye": conge.idemploye,
+                    "start": entry["date_debut"],
+                    "end": entry["date_fin"],
+                    "kind": "tranche",
+                    "label": entry["numero_decision"]
+                }
+                for entry in tranches
+            ])
+            if report:
+                if len(tranches) == 1:
+                    raise ValueError(f"Tranche dates overlap with existing periods:\n{describe_conflicts(report[0][2])}")
+                raise ValueError("Tranche dates overlap with existing periods:\n" + "\n".join(
+                    f"Tranche {position + 1}: {describe_conflicts(conflicts)}" for position, _, conflicts in report
+                ))
+            
+            # Create new tranches
+            new_tranches = []
+            for entry, days in zip(tranches, tranche_days):
+                new_tranche = Tranche(
+                    idConge=conge_id,
+                    NumeroDecision=entry["numero_decision"],
+                    DateDecision=entry["date_decision"],
+                    DateDebut=entry["date_debut"],
+                    DateFin=entry["date_fin"]
+                )
+                self.session.add(new_tranche)
+                new_tranches.append((new_tranche, days))
+            self.session.flush()  # Flush to get the tranche IDs
             
             # Update days taken and remaining days in conge
-            conge.NbrJoursPris += tranche_days
+            conge.NbrJoursPris += sum(tranche_days)
             conge.NbrJoursRestants = conge.NbrJoursAlloues - conge.NbrJoursPris
             
+            # Log successful creation (written by the same commit)
+            for new_tranche, days in new_tranches:
+                self.log_history(
+                    event="إضافة شطر جديد",
+                    details=f"إضافة شطر جديد للموظف {conge.idemploye} للإجازة {conge_id} من {new_tranche.DateDebut} إلى {new_tranche.DateFin} ({days} أيام) - قرار رقم: {new_tranche.NumeroDecision}",
+                    gestion="إدارة الإجازات",
+                    in_transaction=True,
+                    tranche_id=new_tranche.idTranche,
+                    conge_id=conge_id,
+                    employee_id=conge.idemploye
+                )
+            
             self.session.commit()
             
-            # Log successful creation
-            self.log_history(
-                event="إضافة شطر جديد",
-                details=f"إضافة شطر جديد للموظف {conge.idemploye} للإجازة {conge_id} من {date_debut} إلى {date_fin} ({tranche_days} أيام) - قرار رقم: {numero_decision}",
-                gestion="إدارة الإجازات",
-                tranche_id=new_tranche.idTranche,
-                conge_id=conge_id,
-                employee_id=conge.idemploye
-            )           
+            # The batch was indexed without IDs by validate_batch
+            schedule.remove(conge.idemploye, "tranche", None)
+            for new_tranche, _ in new_tranches:
+                schedule.add(conge.idemploye, Interval(new_tranche.DateDebut, new_tranche.DateFin, "tranche", new_tranche.idTranche, new_tranche.NumeroDecision))
             
             return {
-                "tranche": {
-                    "id": new_tranche.idTranche,
-                    "conge_id": new_tranche.idConge,
-                    "decision_id": new_tranche.NumeroDecision,
-                    "decision_date": new_tranche.DateDecision.strftime("%Y-%m-%d"),
-                    "start_date": new_tranche.DateDebut.strftime("%Y-%m-%d"),
-                    "end_date": new_tranche.DateFin.strftime("%Y-%m-%d"),
-                    "days": tranche_days
-                },
+                "tranches": [
+                    {
+                        "id": new_tranche.idTranche,
+                        "conge_id": new_tranche.idConge,
+                        "decision_id": new_tranche.NumeroDecision,
+                        "decision_date": new_tranche.DateDecision.strftime("%Y-%m-%d"),
+                        "start_date": new_tranche.DateDebut.strftime("%Y-%m-%d"),
+                        "end_date": new_tranche.DateFin.strftime("%Y-%m-%d"),
+                        "days": days
+                    }
+                    for new_tranche, days in new_tranches
+                ],
                 "conge": {
                     "id": conge.idConge,
                     "days_taken": conge.NbrJoursPris,
@@ -146,17 +201,22 @@ class TrancheController(BaseControllerWithHistory):
                 }
             }
             
-        except SQLAlchemyError as e:
-            self.session.rollback()
-            self.log_history(
-                event="خطأ قاعدة البيانات",
-                details=f"خطأ في قاعدة البيانات أثناء إنشاء شطر للإجازة {conge_id}: {str(e)}",
-                gestion="إدارة الإجازات",
-                conge_id=conge_id
-            )
+        except (ValueError, SQLAlchemyError) as e:
+            if employee_id is not None:
+                # validate_batch already indexed the batch (without IDs): drop it
+                schedule.remove(employee_id, "tranche", None)
+            if isinstance(e, SQLAlchemyError):
+                self.session.rollback()
+                self.log_history(
+                    event="خطأ قاعدة البيانات",
+                    details=f"خطأ في قاعدة البيانات أثناء إنشاء شطر للإجازة {conge_id}: {str(e)}",
+                    gestion="إدارة الإجازات",
+                    conge_id=conge_id
+                )
             raise e
     
-    def update_tranche(self, tranche_id, numero_decision=None, date_decision=None, date_debut=None, date_fin=None):
+    
+    def update_tranche(self, tranche_id, numero_decision=None, date_decision=None, date_debut=None, date_fin=None, schedule=None):
         """
         Update a tranche with enhanced validation and complete logging
         
@@ -166,6 +226,7 @@ class TrancheController(BaseControllerWithHistory):
             date_decision (date, optional): New decision date
             date_debut (date, optional): New start date
             date_fin (date, optional): New end date
+            schedule (ScheduleIndex, optional): Edit-session index, updated with the new dates
             
         Returns:
             dict: Dictionary with updated tranche and conge
@@ -230,7 +291,8 @@ class TrancheController(BaseControllerWithHistory):
             
             # Check for overlaps with other tranches (excluding this one)
             if date_debut is not None or date_fin is not None:
-                self.validate_tranche_dates(tranche.idConge, new_start, new_end, exclude_tranche_id=tranche_id)
+                self.validate_tranche_dates(tranche.idConge, new_start, new_end, exclude_tranche_id=tranche_id,
+                                            schedule=schedule, employee_id=conge.idemploye)
                 
             # Calculate new duration
             new_days = (new_end - new_start).days + 1
@@ -254,15 +316,14 @@ class TrancheController(BaseControllerWithHistory):
             conge.NbrJoursPris = conge.NbrJoursPris + days_difference
             conge.NbrJoursRestants = conge.NbrJoursAlloues - conge.NbrJoursPris
             
-            self.session.commit()
-            
-            # Log successful update
+            # Log successful update (written by the same commit)
             if changes:
                 changes_text = " | ".join(changes)
                 self.log_history(
                     event="تحديث الشطر",
                     details=f"تم تحديث الشطر {tranche_id} للموظف {conge.idemploye} - التغييرات: {changes_text} - المدة الجديدة: {new_days} أيام",
                     gestion="إدارة الإجازات",
+                    in_transaction=True,
                     tranche_id=tranche_id,
                     conge_id=conge.idConge,
                     employee_id=conge.idemploye
@@ -272,11 +333,16 @@ class TrancheController(BaseControllerWithHistory):
                     event="محاولة تحديث الشطر",
                     details=f"محاولة تحديث الشطر {tranche_id} للموظف {conge.idemploye} بدون تغييرات",
                     gestion="إدارة الإجازات",
+                    in_transaction=True,
                     tranche_id=tranche_id,
                     conge_id=conge.idConge,
                     employee_id=conge.idemploye
                 )
             
+            self.session.commit()
+            if schedule is not None:
+                schedule.replace(conge.idemploye, Interval(tranche.DateDebut, tranche.DateFin, "tranche", tranche_id, tranche.NumeroDecision))
+            
             return {
                 "tranche": {
                     "id": tranche.idTranche,
@@ -304,12 +370,13 @@ class TrancheController(BaseControllerWithHistory):
             )
             raise e
     
-    def delete_tranche(self, tranche_id):
+    def delete_tranche(self, tranche_id, schedule=None):
         """
         Delete a tranche by ID with complete logging
         
         Args:
             tranche_id (int): The tranche ID
+            schedule (ScheduleIndex, optional): Edit-session index, the tranche is removed from it
             
         Returns:
             dict: Dictionary with updated conge info
@@ -356,17 +423,19 @@ class TrancheController(BaseControllerWithHistory):
             # Delete the tranche
 
             
-            # Log successful deletion
+            # Log successful deletion (same commit, the deleted tranche is only named in the details)
             self.log_history(
                 event="حذف الشطر",
                 details=f"تم حذف الشطر {tranche_info['id']} للموظف {tranche_info['employee_id']} - قرار رقم: {tranche_info['numero_decision']} - من {tranche_info['date_debut']} إلى {tranche_info['date_fin']} ({tranche_days} أيام)",
                 gestion="إدارة الإجازات",
-                tranche_id=tranche_info['id'],
+                in_transaction=True,
                 conge_id=tranche_info['conge_id'],
                 employee_id=tranche_info['employee_id']
             )
             self.session.delete(tranche)
             self.session.commit()            
+            if schedule is not None:
+                schedule.remove(tranche_info['employee_id'], "tranche", tranche_info['id'])
             return {
                 "conge": {
                     "id": conge.idConge,
@@ -404,39 +473,35 @@ class TrancheController(BaseControllerWithHistory):
             
         return (date_fin - date_debut).days + 1
     
-    def validate_tranche_dates(self, conge_id, date_debut, date_fin, exclude_tranche_id=None):
+    def validate_tranche_dates(self, conge_id, date_debut, date_fin, exclude_tranche_id=None, schedule=None, employee_id=None):
         """
-        Validate that tranche dates don't overlap with existing tranches
+        Validate that tranche dates don't overlap with the employee's other busy periods
+        (leave tranches, absences, temporary departures and trainings)
         
         Args:
             conge_id (int): The leave ID
             date_debut (date): Start date
             date_fin (date): End date
             exclude_tranche_id (int, optional): Tranche ID to exclude from validation
+            schedule (ScheduleIndex, optional): Index loaded once for an edit session,
+                built for this employee if not provided
+            employee_id (int, optional): Owner of the leave record, looked up if not provided
             
         Returns:
             bool: True if valid
             
         Raises:
-            ValueError: If dates overlap with existing tranches
+            ValueError: If dates overlap, listing every conflicting period
         """
-        # Get existing tranches for this leave
-        query = self.session.query(Tranche).filter(Tranche.idConge == conge_id)
-        
-        # Exclude the current tranche if updating
-        if exclude_tranche_id:
-            query = query.filter(Tranche.idTranche != exclude_tranche_id)
-            
-        existing_tranches = query.all()
-        
-        # Check for overlaps
-        for tranche in existing_tranches:
-            # Check if new tranche overlaps with existing tranche
-            if (date_debut <= tranche.DateFin and date_fin >= tranche.DateDebut):
-                # Log the overlap attempt
-                conge = self.session.query(Conge).filter(Conge.idConge == conge_id).first()
+        if employee_id is None:
+            employee_id = self.session.query(Conge.idemploye).filter(Conge.idConge == conge_id).scalar()
+        if schedule is None:
+            schedule = ScheduleIndex(self.session, [employee_id])
 
-                raise ValueError(f"Tranche dates overlap with existing tranche (Decision: {tranche.NumeroDecision})")
+        exclude = ("tranche", exclude_tranche_id) if exclude_tranche_id else None
+        conflicts = schedule.conflicts(employee_id, date_debut, date_fin, exclude=exclude)
+        if conflicts:
+            raise ValueError(f"Tranche dates overlap with existing periods:\n{describe_conflicts(conflicts)}")
         
         return True
     
@@ -153,6 +153,9 @@ class UserController:
             
             self.session.commit()
             
+            # Le rôle ou le nom ont pu changer : l'identité en cache n'est plus valide
+            HistoryController.invalidate_user_identity(account_number)
+            
             # Enregistrement dans l'historique
             if self.current_user_account_number and self.history_controller:
                 self.history_controller.add_history_entry(
@@ -203,6 +206,8 @@ class UserController:
             self.session.delete(user)
             self.session.commit()
             
+            HistoryController.invalidate_user_identity(account_number)
+            
             return True, "تم حذف الحساب بنجاح"
             
         except Exception as e:
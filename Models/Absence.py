@@ -22,7 +22,8 @@ class Absence(Base):
 
     # Relationship to Employe
     employe = relationship("Employe", back_populates="absences")
-    history_entries = relationship("History", back_populates="absence")
+    history_entries = relationship("History", primaryjoin="foreign(History.idAbsence) == Absence.idAbsence",
+                                   back_populates="absence")
 
     def __repr__(self):
         return (f"<Absence {self.idAbsence}: {self.Type} | "
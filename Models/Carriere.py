@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from Models import Base
 
 
 class Carriere(Base):
     __tablename__ = "carrieres"
+    __table_args__ = (
+        # Recherche plein texte utilisée par EmployeeController.search_employees
+        Index('ft_carrieres_search', 'Nomposte', 'service', 'dependency',
+              mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
 
     # Primary & Foreign Key
     idcarriere = Column(Integer, primary_key=True, index=True , autoincrement=True , nullable=False)
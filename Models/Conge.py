@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from Models import Base
 
 class Conge(Base):
     __tablename__ = "conges"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Un seul congé par employé et par année (recherche et création idempotente)
+        Index('uq_conges_employe_annee', 'idemploye', 'Annee', unique=True),
+        {'extend_existing': True},
+    )
 
     idConge = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -20,7 +24,8 @@ class Conge(Base):
     # Relation vers Employe
     employe = relationship("Employe", back_populates="conges")
     tranches = relationship("Tranche", back_populates="conge", cascade="all, delete-orphan")
-    history_entries = relationship("History", back_populates="conge")
+    history_entries = relationship("History", primaryjoin="foreign(History.idConge) == Conge.idConge",
+                                   back_populates="conge")
     @classmethod
     def create(cls, session, idemploye, Annee, NbrJoursAlloues, NbrJoursPris, NbrJoursRestants):
         new_conge = cls(
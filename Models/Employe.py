@@ -1,12 +1,19 @@
 # models/employe.py
 
-from sqlalchemy import BigInteger, Column, Integer, String, Date, Boolean
+from sqlalchemy import BigInteger, Column, Integer, String, Date, Boolean, Index
 from sqlalchemy.orm import relationship
 from Models import Base
 
 class Employe(Base):
     __tablename__ = "employes"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Recherche plein texte (ngram pour l'arabe) utilisée par EmployeeController.search_employees
+        Index('ft_employes_search', 'Nom', 'Prenom', 'NomFR', 'PrenomFR', 'NomEpoux',
+              mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+        # Résolution exacte (Nom, Prenom) -> idemploye (EmployeController.resolve_employee_id)
+        Index('ix_employes_nom_prenom', 'Nom', 'Prenom'),
+        {'extend_existing': True},
+    )
 
     idemploye = Column(Integer, primary_key=True, autoincrement=True, nullable=False)  # Identifiant unique
 
@@ -60,7 +67,8 @@ class Employe(Base):
     
     departs_temporaires = relationship("DepartTemporaire", back_populates="employe", cascade="all, delete-orphan")
     depart_definitif = relationship("DepartDefinitif", back_populates="employe", uselist=False, cascade="all, delete-orphan")
-    history_entries = relationship("History", back_populates="employee")
+    history_entries = relationship("History", primaryjoin="foreign(History.idemploye) == Employe.idemploye",
+                                   back_populates="employee")
 
     __mapper_args__ = {
         'polymorphic_identity': 'employe',
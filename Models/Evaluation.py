@@ -21,7 +21,8 @@ class Evaluation(Base):
 
     # Relationship to Employe
     employe = relationship("Employe", back_populates="evaluations")
-    history_entries = relationship("History", back_populates="evaluation")
+    history_entries = relationship("History", primaryjoin="foreign(History.idEvaluation) == Evaluation.idEvaluation",
+                                   back_populates="evaluation")
 
     @classmethod
     def create(cls, session, idemploye, Annee, NoteAnnuelle, Note1=None, Note2=None, Note3=None, Note4=None):
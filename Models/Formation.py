@@ -20,7 +20,8 @@ class Formation(Base):
 
     # Relationship to Employe
     employe = relationship("Employe", back_populates="formations")
-    history_entries = relationship("History", back_populates="formation")
+    history_entries = relationship("History", primaryjoin="foreign(History.idFormation) == Formation.idFormation",
+                                   back_populates="formation")
     @classmethod
     def create(cls, session, idemploye, Type, DateDebut, DateFin, Duree=None, Etablissement="", Theme=None):
         new_formation = cls(
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, Index, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
@@ -13,29 +13,51 @@ class History(Base):
     Correspond aux données affichées dans la fenêtre d'historique
     """
     __tablename__ = 'history'
+    # Index composites : chaque filtre est suivi du timestamp pour éviter le tri (filesort)
+    # La table est partitionnée par mois (migration c5a8f3e6d104) : la clé primaire
+    # est (id, timestamp) et MySQL n'autorise pas les clés étrangères sur ces tables.
+    __table_args__ = (
+        Index('ix_history_timestamp_id', 'timestamp', 'id'),
+        Index('ix_history_gestion_timestamp', 'gestion', 'timestamp'),
+        Index('ix_history_user_timestamp', 'user_id', 'timestamp'),
+        Index('ix_history_employe_timestamp', 'idemploye', 'timestamp'),
+        Index('ix_history_formation_timestamp', 'idFormation', 'timestamp'),
+        Index('ix_history_conge_timestamp', 'idConge', 'timestamp'),
+        Index('ix_history_tranche_timestamp', 'idTranche', 'timestamp'),
+        Index('ix_history_evaluation_timestamp', 'idEvaluation', 'timestamp'),
+        Index('ix_history_absence_timestamp', 'idAbsence', 'timestamp'),
+    )
     
-    id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, default=datetime.now)
-    user_id = Column(Integer, ForeignKey('users.id'))
+    # Clé primaire (id, timestamp) et aucune clé étrangère, comme la table partitionnée
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    timestamp = Column(DateTime, primary_key=True, nullable=False, default=datetime.now)
+    user_id = Column(Integer, nullable=True)
     event = Column(String(100), nullable=False)
     details = Column(String(255), nullable=False)
     
     # Relations avec les autres entités (optionnelles)
-    idemploye = Column(Integer, ForeignKey('employes.idemploye'), nullable=True)
-    idFormation = Column(Integer, ForeignKey('formations.idFormation'), nullable=True)
-    idConge= Column(Integer, ForeignKey('conges.idConge'), nullable=True)
-    idTranche = Column(Integer, ForeignKey('tranches.idTranche'), nullable=True)
-    idEvaluation = Column(Integer, ForeignKey('evaluations.idEvaluation'), nullable=True)
-    idAbsence = Column(Integer, ForeignKey('absences.idAbsence'), nullable=True)
+    idemploye = Column(Integer, nullable=True)
+    idFormation = Column(Integer, nullable=True)
+    idConge= Column(Integer, nullable=True)
+    idTranche = Column(Integer, nullable=True)
+    idEvaluation = Column(Integer, nullable=True)
+    idAbsence = Column(Integer, nullable=True)
     gestion = Column(String(50), nullable=False, default="النظام")   
-    # Relations
-    user = relationship("User", back_populates="history_entries")
-    employee = relationship("Employe", back_populates="history_entries")
-    formation = relationship("Formation", back_populates="history_entries")
-    conge = relationship("Conge", back_populates="history_entries")
-    tranche = relationship("Tranche", back_populates="history_entries")
-    evaluation = relationship("Evaluation", back_populates="history_entries")
-    absence = relationship("Absence", back_populates="history_entries")
+    # Relations (jointures explicites, sans contrainte en base)
+    user = relationship("User", primaryjoin="foreign(History.user_id) == User.id",
+                        back_populates="history_entries")
+    employee = relationship("Employe", primaryjoin="foreign(History.idemploye) == Employe.idemploye",
+                            back_populates="history_entries")
+    formation = relationship("Formation", primaryjoin="foreign(History.idFormation) == Formation.idFormation",
+                             back_populates="history_entries")
+    conge = relationship("Conge", primaryjoin="foreign(History.idConge) == Conge.idConge",
+                         back_populates="history_entries")
+    tranche = relationship("Tranche", primaryjoin="foreign(History.idTranche) == Tranche.idTranche",
+                           back_populates="history_entries")
+    evaluation = relationship("Evaluation", primaryjoin="foreign(History.idEvaluation) == Evaluation.idEvaluation",
+                              back_populates="history_entries")
+    absence = relationship("Absence", primaryjoin="foreign(History.idAbsence) == Absence.idAbsence",
+                           back_populates="history_entries")
     
     def to_dict(self):
         return {
@@ -54,6 +76,36 @@ class History(Base):
             'idAbsence': self.idAbsence
         }
 
+class HistoryArchive(Base):
+    """
+    Entrées d'historique archivées (plus anciennes que l'horizon de rétention)
+
+    Mêmes colonnes que History, sans clés étrangères : les entités et utilisateurs
+    référencés peuvent avoir été supprimés depuis. Remplie par HistoryArchiver.
+    """
+    __tablename__ = 'history_archive'
+    __table_args__ = (
+        Index('ix_history_archive_timestamp_id', 'timestamp', 'id'),
+        Index('ix_history_archive_gestion_timestamp', 'gestion', 'timestamp'),
+        Index('ix_history_archive_user_timestamp', 'user_id', 'timestamp'),
+        Index('ix_history_archive_employe_timestamp', 'idemploye', 'timestamp'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Même id que dans history
+    timestamp = Column(DateTime, nullable=False)
+    user_id = Column(Integer)
+    event = Column(String(100), nullable=False)
+    details = Column(String(255), nullable=False)
+    idemploye = Column(Integer)
+    idFormation = Column(Integer)
+    idConge = Column(Integer)
+    idTranche = Column(Integer)
+    idEvaluation = Column(Integer)
+    idAbsence = Column(Integer)
+    gestion = Column(String(50), nullable=False, default="النظام")
+    archived_at = Column(DateTime, default=datetime.now)
+
+
 class GestionModules:
     """Constantes pour les différents modules de gestion"""
     EMPLOYES = "إدارة الموظفين"
@@ -0,0 +1,21 @@
+# models/StatisticsSnapshot.py
+
+from sqlalchemy import Column, Integer, String, Date
+from Models import Base
+
+
+class StatisticsSnapshot(Base):
+    """
+    Répartitions des employés pré-calculées pour la barre de statistiques
+
+    Une ligne par (dimension, catégorie), ex: ('sexe', 'ذكر', 42). Reconstruite
+    en une requête par stats_controller.refresh_statistics_snapshot, puis tenue
+    à jour à chaque ajout / modification / suppression d'employé.
+    """
+    __tablename__ = 'employee_stats_snapshot'
+    __table_args__ = {'extend_existing': True}
+
+    dimension = Column(String(30), primary_key=True)   # sexe, age, statut, statut_familial, wilaya
+    bucket = Column(String(100), primary_key=True)     # Catégorie affichée
+    total = Column(Integer, nullable=False, default=0)
+    computed_on = Column(Date, nullable=False)         # Jour du calcul (les âges changent chaque jour)
@@ -19,6 +19,7 @@ class Tranche(Base):
 
     # Relation inverse vers Conge
     conge = relationship("Conge", back_populates="tranches")
-    history_entries = relationship("History", back_populates="tranche")
+    history_entries = relationship("History", primaryjoin="foreign(History.idTranche) == Tranche.idTranche",
+                                   back_populates="tranche")
     def __repr__(self):
         return f"<Tranche {self.idTranche}: Décision {self.NumeroDecision}>"
\ No newline at end of file
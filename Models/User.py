@@ -21,7 +21,8 @@ class User(Base):
     creation_date = Column(DateTime, default=datetime.now)
     
     # Relation avec l'historique
-    history_entries = relationship("History", back_populates="user")
+    history_entries = relationship("History", primaryjoin="foreign(History.user_id) == User.id",
+                                   back_populates="user")
     
     @staticmethod
     def validate_email(email):
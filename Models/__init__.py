@@ -28,7 +28,9 @@ from Models.Conge import Conge
 
 from Models.Tranche import Tranche
 
-from Models.History import History
+from Models.History import History, HistoryArchive
 
 
 
+
+from Models.StatisticsSnapshot import StatisticsSnapshot
@@ -9,7 +9,7 @@ from Views.topbar import create_top_bar
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from datetime import datetime
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QPushButton, QTableWidget,
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QPushButton, QTableWidget, QTableView,
                              QTableWidgetItem, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel,
                              QFrame, QDialog, QMessageBox, QCheckBox, QComboBox, QDateEdit,
                              QScrollArea, QSizePolicy, QStackedWidget, QToolButton, QMenu,
@@ -21,11 +21,15 @@ from sqlalchemy.orm import Session
 import Controllers
 from Controllers import EmployeController
 from Controllers.Absence import AbsenceController
+from Controllers.schedule_index import ScheduleIndex, describe_conflicts
+from Controllers.table_filter import TableFilter
+from Controllers.employee_name_index import get_employee_name_index
 from Controllers.EmployeController import EmployeeController
 from Controllers.Evaluation import EvaluationController
 from DatabaseConnection import db
 from MessageBox import StyledMessageDialog
 from Views.TablePaginator1 import  tablepaginator
+from Views.RowTableModel import RowTableModel
 from weasyprint import HTML,CSS
 import openpyxl
 import html
@@ -144,7 +148,7 @@ class AbsenceManagementSystem(QMainWindow):
 
         # Table + action bar
         self.create_table()
-        self.action_bar = ActionBar(self, self.table)
+        self.action_bar = ActionBar(self, self.table, self.paginator)
         self.main_page_layout.insertWidget(0, self.action_bar)
 
         # Action buttons
@@ -161,20 +165,20 @@ class AbsenceManagementSystem(QMainWindow):
         table_layout.setContentsMargins(15, 15, 15, 15)
 
         # Create table
-        self.table = QTableWidget()
+        self.table = QTableView()
         self.table.setStyleSheet(f"""
-           QTableWidget {{
+           QTableView {{
                background-color: {MEDIUM_BG};
                color: {WHITE};
                border: none;
                gridline-color: {LIGHT_BG};
                font-size: 16px;
            }}
-           QTableWidget::item {{
+           QTableView::item {{
                padding: 8px;
                border-bottom: 1px solid {LIGHT_BG};
            }}
-           QTableWidget::item:selected {{
+           QTableView::item:selected {{
                background-color: {ORANGE};
                color: {WHITE};
            }}
@@ -203,21 +207,18 @@ class AbsenceManagementSystem(QMainWindow):
             "الغيابات\nالمأجورة", "الغيابات\nالغير المأجورة",
             "الغيابات\nالمرضية", "المجموع"
         ]
-        self.table.setColumnCount(len(columns))
-        self.table.setHorizontalHeaderLabels(columns)
+        self.table_model = RowTableModel(columns, alignment=Qt.AlignHCenter | Qt.AlignVCenter, parent=self)
+        self.table.setModel(self.table_model)
 
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Stretch)
         header.setSectionsMovable(False)
         header.setSectionsClickable(False)
         header.setStretchLastSection(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
         self.table.verticalHeader().setVisible(False)
 
-        for i in range(len(columns)):
-            self.table.horizontalHeaderItem(i).setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-
         table_layout.addWidget(self.table)
 
         # Add container to main layout
@@ -231,17 +232,11 @@ class AbsenceManagementSystem(QMainWindow):
         self.load_data()
 
     def load_data(self):
-        # Clear current rows
-        self.table.setRowCount(0)
-
         # Load data from controller
         absences = self.controller.load_table()  # Expected to be a list of dicts
 
-        for row_data in absences:
-            row_position = self.table.rowCount()
-            self.table.insertRow(row_position)
-
-            values = [
+        self.table_model.set_rows(
+            (
                 row_data.get("annee", ""),
                 row_data.get("mois", ""),
                 row_data.get("idemploye", ""),
@@ -251,12 +246,9 @@ class AbsenceManagementSystem(QMainWindow):
                 row_data.get("non_justifiees", 0),
                 row_data.get("maladies", 0),
                 row_data.get("total", 0)
-            ]
-
-            for col, value in enumerate(values):
-                item = QTableWidgetItem(str(value))
-                item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-                self.table.setItem(row_position, col, item)
+            )
+            for row_data in absences
+        )
 
         # After loading all rows, update paginator
         self.paginator.update_total_rows()
@@ -352,24 +344,20 @@ class AbsenceManagementSystem(QMainWindow):
             print(f"Erreur dans show_history: {e}")   
     def _get_table_data_as_lists(self):
         """Helper function to extract data ONLY from VISIBLE rows in self.table."""
-        if not hasattr(self, 'table') or not self.table or self.table.rowCount() == 0:
+        if not hasattr(self, 'table_model') or self.table_model.rowCount() == 0:
             # Gérer le cas où la table n'existe pas encore ou est vide
             # Cela peut arriver si la méthode est appelée avant que create_table() ne soit exécutée
             # ou si load_data() n'a pas encore été appelée ou n'a retourné aucune donnée.
             print(f"Avertissement dans _get_table_data_as_lists pour {self.__class__.__name__}: self.table non disponible ou vide.")
             return None, None
 
-        headers = [self.table.horizontalHeaderItem(i).text()
-                   for i in range(self.table.columnCount())]
+        headers = self.table_model.visible_headers()
 
-        visible_row_data = []
-        for row in range(self.table.rowCount()):
-            if not self.table.isRowHidden(row):
-                row_data = []
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    row_data.append(item.text() if item else "")
-                visible_row_data.append(row_data)
+        # The model only exposes the rows of the current page
+        visible_row_data = [
+            [str(value) for value in self.table_model.row_values(row)]
+            for row in range(self.table_model.rowCount())
+        ]
         return headers, visible_row_data
 
     def export_data_to_excel(self):
@@ -474,10 +462,11 @@ class AbsenceManagementSystem(QMainWindow):
 
 # ... (votre classe ActionBar reste la même) ...
 class ActionBar(QWidget):
-    def __init__(self, parent, table):
+    def __init__(self, parent, table, paginator=None):
 
         super().__init__(parent)
         self.table = table
+        self.paginator = paginator
         self.setFixedHeight(60)
 
         # Layout
@@ -647,24 +636,26 @@ class ActionBar(QWidget):
 
         filter_value = self.filter_value_input.text().strip().lower()
 
+        model = self.table.model()
+
         if not filter_value or not selected_filter_columns:
             # Reset filter if no value or no columns selected
-            for row in range(self.table.rowCount()):
-                self.table.setRowHidden(row, False)
+            self.paginator.reset_filter()
             self.filter_dialog.accept()
             return
 
+        # Table headers are split on two lines, the checkboxes are not
         column_indices = [
-            col_idx for col_idx in range(self.table.columnCount())
-            if self.table.horizontalHeaderItem(col_idx).text() in selected_filter_columns
+            col_idx for col_idx, header in enumerate(model.headers)
+            if header.replace("\n", " ") in selected_filter_columns
         ]
 
-        for row in range(self.table.rowCount()):
-            row_visible = any(
-                filter_value in self.table.item(row, col_idx).text().lower()
-                for col_idx in column_indices
-            )
-            self.table.setRowHidden(row, not row_visible)
+        # Filter the model rows (all pages), the paginator shows the matches
+        matching_rows = [
+            row_idx for row_idx, row in enumerate(model.all_rows())
+            if any(filter_value in str(row[col_idx]).lower() for col_idx in column_indices)
+        ]
+        self.paginator.handle_filter_changed(matching_rows)
 
         self.filter_dialog.accept()
 
@@ -853,15 +844,19 @@ class ConsultationPage(QMainWindow):
         for i in range(len(columns)):
             self.table.horizontalHeaderItem(i).setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
 
-        self.load_table()
-
         self.layout.addWidget(self.table)
 
     def load_table(self):
-        self.table.setRowCount(0)
-        table_data = self.controller.load_absences_with_employee_names()
-        if not table_data:
-            return
+        # Reload the current page from the database
+        self.paginator.update_page(self.paginator.current_page)
+
+    def load_absences_page(self, page, rows_per_page):
+        """Fill the table with one page of absences matching the filter and return the total count"""
+        table_data, total = self.controller.get_absences_page(
+            table_filter=self.table_filter,
+            page=page,
+            page_size=rows_per_page
+        )
         self.table.setRowCount(len(table_data))
 
         months_ar = [
@@ -898,11 +893,15 @@ class ConsultationPage(QMainWindow):
                 item.setTextAlignment(Qt.AlignCenter)
                 self.table.setItem(row_idx, col_idx, item)
 
+        return total
+
     def create_paginator(self):
-        # Add paginator below the table
+        # Add paginator below the table; only the current page of matching rows is loaded
+        self.table_filter = TableFilter()
         self.paginator = tablepaginator(self.table, rows_per_page=10)
         self.layout.addWidget(self.paginator)
-        self.paginator.connect_to_table(self.table)
+        self.paginator.set_page_loader(self.load_absences_page)
+        self.paginator.update_page(1)
 
     def create_edit_button(self):
         close_btn = QPushButton("إغلاق")
@@ -1280,37 +1279,12 @@ class ConsultationPage(QMainWindow):
             column for column, checkbox in self.filter_checkboxes.items() if checkbox.isChecked()
         ]
 
-        filter_value = self.filter_value_input.text().strip().lower()
-
-        if not filter_value or not selected_filter_columns:
-            # Reset filter if no value or no columns selected
-            for row in range(self.table.rowCount()):
-                self.table.setRowHidden(row, False)
-            self.filter_dialog.accept()
-            return
-
-        column_indices = [
-            col_idx for col_idx in range(self.table.columnCount())
-            if self.table.horizontalHeaderItem(col_idx).text() in selected_filter_columns
-        ]
-
-        for row in range(self.table.rowCount()):
-            row_visible = any(
-                filter_value in self.table.item(row, col_idx).text().lower()
-                for col_idx in column_indices
-                if self.table.item(row, col_idx)  # Avoid None
-            )
-            self.table.setRowHidden(row, not row_visible)
+        # Filtered in SQL over every absence (an empty filter shows everything)
+        self.table_filter = TableFilter(selected_filter_columns, self.filter_value_input.text())
+        self.paginator.update_page(1)
 
         self.filter_dialog.accept()
 
-    def load_table(self):
-        # ... (votre méthode load_table existante) ...
-        super_return_value = super().load_table() if hasattr(super(), 'load_table') else None # Au cas où
-        
-         # Mettre à jour l'état des boutons
-        return super_return_value
-
     # --- MÉTHODES D'EXPORTATION ET D'IMPRESSION POUR ConsultationPage ---
     # Elles sont identiques à celles de AbsenceManagementSystem, car elles lisent self.table
     # et utilisent les mêmes bibliothèques.
@@ -1415,6 +1389,8 @@ class EditForm(QDialog):
         if hasattr(parent, 'current_user_data') and parent.current_user_data:
             current_user_account_number = parent.current_user_data.get('account_number')
         self.controller = AbsenceController(self.db_session,current_user_account_number)
+        # Busy periods of the edited employee for this dialog only, loaded on first save
+        self.schedule = ScheduleIndex(self.db_session, [])
 
         self.data = data or {}
         self.row_index = row_index
@@ -1699,7 +1675,8 @@ class EditForm(QDialog):
             Raison=absence_reason,
             NumeroDecision=decision_number,
             DateDecision=date_decision.toPyDate() if date_decision.isValid() else None,
-            Raison2=absence_reason2
+            Raison2=absence_reason2,
+            schedule=self.schedule
         )
 
         if status == "success":
@@ -1719,6 +1696,10 @@ class EditForm(QDialog):
                                 message="تم تعديل البيانات بنجاح",
                                 message_type="info").exec_()
             self.accept()
+        elif status == "overlapping_absence":
+            StyledMessageDialog(self, title="تداخل",
+                                message="لدى الموظف فترة مسجلة تتداخل مع هذه الفترة:\n" + describe_conflicts(self.controller.last_conflicts),
+                                message_type="warning").exec_()
         else:
             StyledMessageDialog(self, title="فشل",
                                 message="لم يتم تعديل البيانات، يرجى المحاولة مرة أخرى.",
@@ -1747,6 +1728,8 @@ class AddForm(QDialog):
             current_user_account_number = parent.current_user_data.get('account_number')
         self.employee_controller = EmployeeController(self.db_session,current_user_account_number)
         self.controller = AbsenceController(self.db_session,current_user_account_number)
+        # Busy periods of the selected employee, loaded on first save and reused on retries
+        self.schedule = ScheduleIndex(self.db_session, [])
         # Main layout with scroll area
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -1794,27 +1777,14 @@ class AddForm(QDialog):
             {"name": "إضافة سبب آخر للغياب",  "is_date": False},
         ]
 
-        # Load employees for name/lastname combos
+        # Load employees for name/lastname combos: one item per employee in both combos,
+        # same order, with the employee id kept in the item data (Qt.UserRole)
         try:
-            self.employee_data = self.employee_controller.get_all_employees()  # list of (first, last)
-
-            print("Employees list:", self.employee_data)
-
-            self.employee_map = {first: last for first, last in self.employee_data}
-            # Reverse map for last name -> first name
-            self.reverse_employee_map = {}
-            for first, last in self.employee_data:
-                if last not in self.reverse_employee_map:
-                    self.reverse_employee_map[last] = first
-
-            employee_names = list(self.employee_map.keys())
-            employee_lastnames = list(set(last for _, last in self.employee_data))
+            # Shared in-memory name index: list of (id, first, last)
+            employees = get_employee_name_index(self.db_session).employees
         except Exception as e:
             print("Error loading employees:", e)
-            employee_names = []
-            employee_lastnames = []
-            self.employee_map = {}
-            self.reverse_employee_map = {}
+            employees = []
 
         self.add_form_fields = {}
         current_date = QDate.currentDate()
@@ -1830,12 +1800,14 @@ class AddForm(QDialog):
             if field["name"] == "الإسم":
                 input_field = QComboBox()
                 input_field.setEditable(True)
-                input_field.addItems(employee_names)
+                for employee_id, first, _ in employees:
+                    input_field.addItem(first or "", employee_id)
                 self.name_combo = input_field
             elif field["name"] == "اللقب":
                 input_field = QComboBox()
                 input_field.setEditable(True)
-                input_field.addItems(employee_lastnames)
+                for employee_id, _, last in employees:
+                    input_field.addItem(last or "", employee_id)
                 self.lastname_combo = input_field
             elif field.get("widget") == "combo":
                 input_field = QComboBox()
@@ -1873,9 +1845,9 @@ class AddForm(QDialog):
         self.updating_from_name = False
         self.updating_from_lastname = False
 
-        # Connect signals for syncing name and lastname
-        self.name_combo.currentTextChanged.connect(self.update_lastname_field)
-        self.lastname_combo.currentTextChanged.connect(self.update_name_field)
+        # Connect signals for syncing name and lastname (both combos share the same item order)
+        self.name_combo.currentIndexChanged.connect(self.update_lastname_field)
+        self.lastname_combo.currentIndexChanged.connect(self.update_name_field)
 
 
         # Buttons layout
@@ -1927,31 +1899,30 @@ class AddForm(QDialog):
         main_layout.addWidget(scroll_area)
         
 
-    def update_lastname_field(self, selected_name):
-        if self.updating_from_lastname:
+    def update_lastname_field(self, index):
+        if self.updating_from_lastname or index < 0:
             return
-        last_name = self.employee_map.get(selected_name)
-        if last_name:
-            self.updating_from_name = True
-            idx = self.lastname_combo.findText(last_name)
-            if idx != -1:
-                self.lastname_combo.setCurrentIndex(idx)
-            else:
-                self.lastname_combo.setEditText(last_name)
-            self.updating_from_name = False
+        self.updating_from_name = True
+        self.lastname_combo.setCurrentIndex(index)
+        self.updating_from_name = False
 
-    def update_name_field(self, selected_lastname):
-        if self.updating_from_name:
+    def update_name_field(self, index):
+        if self.updating_from_name or index < 0:
             return
-        first_name = self.reverse_employee_map.get(selected_lastname)
-        if first_name:
-            self.updating_from_lastname = True
-            idx = self.name_combo.findText(first_name)
-            if idx != -1:
-                self.name_combo.setCurrentIndex(idx)
-            else:
-                self.name_combo.setEditText(first_name)
-            self.updating_from_lastname = False
+        self.updating_from_lastname = True
+        self.name_combo.setCurrentIndex(index)
+        self.updating_from_lastname = False
+
+    def selected_employee_id(self, name, lastname):
+        """ID of the selected employee: item data of the chosen combo entry, or the only exact
+        match of the typed name in the shared name index (None when unknown or ambiguous)"""
+        index = self.name_combo.currentIndex()
+        if (index >= 0 and index == self.lastname_combo.currentIndex()
+                and self.name_combo.itemText(index) == name
+                and self.lastname_combo.itemText(index) == lastname):
+            return self.name_combo.itemData(index, Qt.UserRole)
+        matches = get_employee_name_index(self.db_session).find(name, lastname)
+        return matches[0][0] if len(matches) == 1 else None
 
     def save_new_entry(self):
         def show_error(msg):
@@ -1964,8 +1935,8 @@ class AddForm(QDialog):
         print(f"--- Tentative de recherche ---")
         print(f"Prénom récupéré du formulaire: '{name}'")
         print(f"Nom récupéré du formulaire: '{lastname}'")
-        employee_id = self.employee_controller.getidbynameandlastname(name=name, lastname=lastname)
-        print(f"ID retourné par getidbynameandlastname: {employee_id}")
+        employee_id = self.selected_employee_id(name, lastname)
+        print(f"ID retourné: {employee_id}")
         # 3. Vérifier si l'employé a été trouvé
         if employee_id is None:
             show_error("Employé non trouvé. Veuillez vérifier que le nom et le prénom sont corrects et existent.")
@@ -2045,11 +2016,12 @@ class AddForm(QDialog):
                 Raison2=reason2,
                 idemploye=employee_id,
                 name=name,
-                lastname=lastname
+                lastname=lastname,
+                schedule=self.schedule
             )
 
             if status == "overlapping_absence":
-                show_error("لدى الموظف غياب مسجل لهذه الفترة.")
+                show_error("لدى الموظف فترة مسجلة تتداخل مع هذه الفترة:\n" + describe_conflicts(controller.last_conflicts))
                 return
             elif status != "success":
                 show_error("يوجد عدم تطابق في اسم الموظف ولقبه")
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel,
                              QLineEdit, QComboBox, QDateEdit, QPushButton, QScrollArea,
                              QWidget, QMessageBox, QTextEdit,
@@ -7,6 +9,7 @@ from PyQt5.QtCore import Qt, QDate, QEvent, QRegExp
 from PyQt5.QtGui import QFont, QPixmap, QRegExpValidator, QIntValidator
 
 from Controllers.EmployeController import EmployeeController
+from Controllers.conge_controller import CongeController
 from DatabaseConnection import db
 from ui_constants import *
 
@@ -1554,6 +1557,14 @@ class AddEmployeeWindow(QDialog):
             self.controller.save_employee(employe, carriere)
             print("Employé, carrière et type enregistrés avec succès.")
 
+            # Congé de l'année en cours (conservé s'il existe déjà)
+            try:
+                CongeController(self.session, self.controller.current_user_account_number).get_or_create_conge(
+                    employe.idemploye, datetime.now().year
+                )
+            except Exception as e:
+                print(f"Erreur lors de la création du congé annuel : {e}")
+
             # Refresh the table in the main window before closing
             if self.parent() and hasattr(self.parent(), 'load_employees_to_table'):
                 self.parent().load_employees_to_table()
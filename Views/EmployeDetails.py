@@ -8,6 +8,7 @@ from PyQt5.QtGui import QPixmap, QRegExpValidator, QIntValidator, QIcon
 from ui_constants import *
 
 from Controllers.EmployeController import EmployeeController
+from Controllers.stats_controller import apply_employee_change, bump_data_version, employee_statistics_keys
 from DatabaseConnection import db
 from Models.Employe import Employe
 from Models.Carriere import Carriere
@@ -2231,6 +2232,8 @@ class EmployeeDetailsWindow(QDialog):
         try:
             # Update employee data in database
             if self.employee:
+                old_statistics_keys = employee_statistics_keys(self.employee)
+
                 # Update employee basic info
                 self.employee.Nom = self.surname.text()
                 self.employee.Prenom = self.name.text()
@@ -2384,8 +2387,12 @@ class EmployeeDetailsWindow(QDialog):
                         # Update employee type
                         self.employee.type = "contractuel"
 
+                # Keep the statistics snapshot in step with the changes
+                apply_employee_change(self.session, old_statistics_keys, employee_statistics_keys(self.employee))
+
                 # Commit changes to database
                 self.session.commit()
+                bump_data_version()
 
                 # Update the top bar with the new name and position
                 self.top_bar.employee_name_label.setText(f"{self.name.text()} {self.surname.text()}")
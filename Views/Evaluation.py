@@ -15,7 +15,9 @@ from PyQt5.QtCore import Qt, QSize, QDate, QTimer, QLocale, pyqtSignal
 
 from Absence import AddForm
 from Controllers.Evaluation import EvaluationController
+from Controllers.table_filter import TableFilter
 from Controllers.EmployeController import EmployeeController   
+from Controllers.employee_name_index import get_employee_name_index
 from DatabaseConnection import db
 from MessageBox import StyledMessageDialog
 from TablePaginator1 import tablepaginator
@@ -251,51 +253,38 @@ class Evaluation(QMainWindow):
         for i in range(len(columns)):
             self.table.horizontalHeaderItem(i).setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
 
-        # === Load data from database using the controller ===
-        table_data = self.controller.load_evaluations_with_employee_names_current_year()
-        print("Sample row:", table_data[0] if table_data else "No data")
-
-        self.table.setRowCount(len(table_data) if table_data else 0)
-
-        for row_idx, row_data in enumerate(table_data):
-            def safe_text(value):
-                return str(value) if value is not None else ""
-
-            self.table.setItem(row_idx, 0, QTableWidgetItem(safe_text(row_data["idEvaluation"])))
-            self.table.setItem(row_idx, 1, QTableWidgetItem(safe_text(row_data["Annee"])))
-            self.table.setItem(row_idx, 2, QTableWidgetItem(safe_text(row_data["idemploye"])))
-            self.table.setItem(row_idx, 3, QTableWidgetItem(safe_text(row_data["nom"])))
-            self.table.setItem(row_idx, 4, QTableWidgetItem(safe_text(row_data["prenom"])))
-            self.table.setItem(row_idx, 5, QTableWidgetItem(safe_text(row_data["NoteAnnuelle"])))
-            self.table.setItem(row_idx, 6, QTableWidgetItem(safe_text(row_data["Note1"])))
-            self.table.setItem(row_idx, 7, QTableWidgetItem(safe_text(row_data["Note2"])))
-            self.table.setItem(row_idx, 8, QTableWidgetItem(safe_text(row_data["Note3"])))
-            self.table.setItem(row_idx, 9, QTableWidgetItem(safe_text(row_data["Note4"])))
-            self.table.setItem(row_idx, 10, QTableWidgetItem(safe_text(row_data["Moyenne"])))
-
-            for col_idx in range(len(columns)):
-                self.table.item(row_idx, col_idx).setTextAlignment(Qt.AlignCenter)
-
         # Add table to layout
         table_layout.addWidget(self.table)
 
-        # Integrate pagination with loaded data
-        paginator = tablepaginator(self.table, rows_per_page=10)
+        # Server-side pagination: only the current page of matching rows is loaded
+        self.table_filter = TableFilter()
+        self.paginator = tablepaginator(self.table, rows_per_page=10)
+        self.paginator.set_page_loader(self.load_evaluations_page)
+        self.paginator.update_page(1)
 
-        table_layout.addWidget(paginator)
+        table_layout.addWidget(self.paginator)
 
         # Add container to main layout
         self.main_page_layout.addWidget(table_container)
 
     def reload_table(self):
-        # Clear existing rows
-        self.table.setRowCount(0)
-
-        # Load data from the database
-        table_data = self.controller.load_evaluations_with_employee_names_current_year()
-        print("Reloaded data:", table_data[0] if table_data else "No data")
+        # Reload the current page from the database
+        self.paginator.update_page(self.paginator.current_page)
+
+    def apply_table_filter(self, table_filter):
+        """Filter every current year row in SQL (not only the loaded page) and show the first page"""
+        self.table_filter = table_filter
+        self.paginator.update_page(1)
+
+    def load_evaluations_page(self, page, rows_per_page):
+        """Fill the table with one page of rows matching the filter and return the total count"""
+        table_data, total = self.controller.get_current_year_evaluations_page(
+            table_filter=self.table_filter,
+            page=page,
+            page_size=rows_per_page
+        )
 
-        self.table.setRowCount(len(table_data) if table_data else 0)
+        self.table.setRowCount(len(table_data))
 
         for row_idx, row_data in enumerate(table_data):
             def safe_text(value):
@@ -315,6 +304,9 @@ class Evaluation(QMainWindow):
 
             for col_idx in range(self.table.columnCount()):
                 self.table.item(row_idx, col_idx).setTextAlignment(Qt.AlignCenter)
+
+        return total
+
     def update_data(self):
         self.reload_table()
     def create_action_buttons(self):
@@ -581,6 +573,7 @@ class ActionBar(QWidget):
     def __init__(self, parent, table):
         super().__init__(parent)
         self.table = table
+        self.owner = parent  # Evaluation window, compiles the filter into SQL
         self.setFixedHeight(60)
 
         layout = QHBoxLayout(self)
@@ -750,26 +743,10 @@ class ActionBar(QWidget):
             column for column, checkbox in self.filter_checkboxes.items() if checkbox.isChecked()
         ]
 
-        filter_value = self.filter_value_input.text().strip().lower()
-
-        if not filter_value or not selected_filter_columns:
-            # Reset filter if no value or no columns selected
-            for row in range(self.table.rowCount()):
-                self.table.setRowHidden(row, False)
-            self.filter_dialog.accept()
-            return
-
-        column_indices = [
-            col_idx for col_idx in range(self.table.columnCount())
-            if self.table.horizontalHeaderItem(col_idx).text() in selected_filter_columns
-        ]
+        filter_value = self.filter_value_input.text().strip()
 
-        for row in range(self.table.rowCount()):
-            row_visible = any(
-                filter_value in self.table.item(row, col_idx).text().lower()
-                for col_idx in column_indices
-            )
-            self.table.setRowHidden(row, not row_visible)
+        # Empty value or no column selected: the filter is reset
+        self.owner.apply_table_filter(TableFilter(selected_filter_columns, filter_value))
 
         self.filter_dialog.accept()
 
@@ -1005,6 +982,16 @@ class AddForm(QDialog):
             show_error("مجموع نقاط المردودية لا يمكن أن يتجاوز النقطة السنوية.")
             return
 
+        # Employee entered in the form, from the shared in-memory name index
+        matches = get_employee_name_index(self.session).find(name, lastname)
+        if not matches:
+            show_error("الموظف غير موجود.")
+            return
+        if len(matches) > 1:
+            show_error("يوجد أكثر من موظف بنفس الاسم واللقب، تعذر تحديد الموظف.")
+            return
+        employee_id = matches[0][0]
+
         # Save evaluation via controller, catch errors
         
         try:
@@ -1012,6 +999,7 @@ class AddForm(QDialog):
             status = controller.save_evaluation_for_employee(
                 name=name.strip(),
                 lastname=lastname.strip(),
+                employee_id=employee_id,
                 annee=annee,
                 note_annuelle=str(note_annuelle_float),  # save as string if needed
                 note1=str(note1) if note1 is not None else None,
@@ -1205,8 +1193,9 @@ class PreviousYears(QMainWindow):
             }}
         """)
 
+        # Same order as the current year table: column 3 holds Nom (اللقب), column 4 Prenom (الإسم)
         columns = [
-            "رقم التنقيط", "السنة", "رقم الموظف", "الإسم", "اللقب",
+            "رقم التنقيط", "السنة", "رقم الموظف", "اللقب", "الإسم",
             "النقطة السنوية", "نقطة\nالمردودية 1", "نقطة\nالمردودية 2",
             "نقطة\nالمردودية 3", "نقطة\nالمردودية 4", "المعدل"
         ]
@@ -1281,20 +1270,22 @@ class PreviousYears(QMainWindow):
         buttons_layout.addWidget(close_btn)
         main_layout.addLayout(buttons_layout)
 
-        # Initial load
+        # Initial load (server-side pagination, filter compiled into SQL)
+        self.table_filter = TableFilter()
+        self.paginator.set_page_loader(self.load_evaluations_page)
         self.reload_table_past()
-        self.paginator.update_total_rows()
 
     def reload_table_past(self):
-        # Clear existing rows
-        self.consultation_table.setRowCount(0)
-
-        # Load data from the database
-        table_data = self.controller.load_evaluations_with_employee_names()
-        print("Reloaded data:", table_data[0] if table_data else "No data")
-
-        if not table_data:
-            return
+        # Reload the current page from the database
+        self.paginator.update_page(self.paginator.current_page)
+
+    def load_evaluations_page(self, page, rows_per_page):
+        """Fill the table with one page of evaluations matching the filter and return the total count"""
+        table_data, total = self.controller.get_evaluations_page(
+            table_filter=self.table_filter,
+            page=page,
+            page_size=rows_per_page
+        )
 
         self.consultation_table.setRowCount(len(table_data))
 
@@ -1316,6 +1307,9 @@ class PreviousYears(QMainWindow):
 
             for col_idx in range(self.consultation_table.columnCount()):
                 self.consultation_table.item(row_idx, col_idx).setTextAlignment(Qt.AlignCenter)
+
+        return total
+
     # --- MÉTHODES D'EXPORTATION ET D'IMPRESSION POUR PreviousYears ---
     def _get_table_data_as_lists(self): # Opère sur self.consultation_table
         """Helper function to extract data ONLY from VISIBLE rows in self.consultation_table."""
@@ -2031,36 +2025,12 @@ class PreviousYears(QMainWindow):
             column for column, checkbox in self.filter_checkboxes.items() if checkbox.isChecked()
         ]
 
-        print("Selected filter columns:", selected_filter_columns)
-
-        filter_value = self.filter_value_input.text().strip().lower()
-        print("Filter value:", filter_value)
+        filter_value = self.filter_value_input.text().strip()
 
-        # If no filter value is provided or no columns selected, reset the filter
-        if not filter_value or not selected_filter_columns:
-            print("Resetting filter")
-            for row in range(self.consultation_table.rowCount()):
-                self.consultation_table.setRowHidden(row, False)
-            self.filter_dialog.accept()
-            return
-
-        # Get the column indices based on selected columns
-        column_indices = [
-            col_idx for col_idx in range(self.consultation_table.columnCount())
-            if self.consultation_table.horizontalHeaderItem(col_idx).text() in selected_filter_columns
-        ]
-        print("Column indices for filtering:", column_indices)
-
-        # Apply the filter on each row
-        for row in range(self.consultation_table.rowCount()):
-            row_visible = False
-            for col_idx in column_indices:
-                item = self.consultation_table.item(row, col_idx)
-                if item and filter_value in item.text().lower():
-                    row_visible = True
-                    break
-            print(f"Row {row} visibility: {row_visible}")
-            self.consultation_table.setRowHidden(row, not row_visible)
+        # Every evaluation is searched in SQL, the matches are paginated on the server.
+        # Empty value or no column selected: the filter is reset
+        self.table_filter = TableFilter(selected_filter_columns, filter_value)
+        self.paginator.update_page(1)
 
         self.filter_dialog.accept()
 
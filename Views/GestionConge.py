@@ -19,7 +19,8 @@ from topbar import create_top_bar  # Import sidebar and topbar functions
 from custom_dialogs import CustomWarningDialog, CustomInfoDialog, CustomMessageBox  # Import custom dialogs
 from Controllers.conge_controller import CongeController
 from Controllers.tranche_controller import TrancheController
-from Controllers.EmployeController import EmployeeController
+from Controllers.schedule_index import ScheduleIndex
+from Controllers.table_filter import TableFilter
 from Controllers.BaseController import BaseControllerWithHistory
 from Models.Tranche import Tranche
 from DatabaseConnection import db
@@ -594,6 +595,9 @@ class LeaveDetailsDialog(QDialog):
         self.leave_id = leave_id
         self.employee_data = employee_data or {}
         self.tranches = tranches or []
+        # Busy periods of the employee, loaded once for all edits made from this dialog
+        self.schedule = ScheduleIndex(parent.session, [int(self.employee_data["employee_id"])]) \
+            if parent is not None and self.employee_data.get("employee_id") else None
         
         # Main layout
         main_layout = QVBoxLayout(self)
@@ -891,7 +895,7 @@ class LeaveDetailsDialog(QDialog):
                 self.tranches[row].update(updated_data)
                 
                 # Notify parent of the change
-                self.parent.update_tranche_by_id(tranche_id, updated_data)
+                self.parent.update_tranche_by_id(tranche_id, updated_data, schedule=self.schedule)
 
 
     
@@ -923,7 +927,7 @@ class LeaveDetailsDialog(QDialog):
                     
                     if tranche_id:
                         # Delete from database using tranche ID
-                        self.parent.delete_tranche_by_id(tranche_id)
+                        self.parent.delete_tranche_by_id(tranche_id, schedule=self.schedule)
                         
                         # Remove the row from the table
                         self.tranche_table.removeRow(row)
@@ -957,7 +961,7 @@ class PreviousYearsDialog(QDialog):
     """
     Dialog for showing previous years data with pagination and filtering
     """
-    def __init__(self, parent=None, previous_years_data=None):
+    def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
         self.setWindowTitle("عطلات السنوات السابقة")
@@ -967,13 +971,10 @@ class PreviousYearsDialog(QDialog):
         # Set window flags to allow maximize/minimize
         self.setWindowFlags(self.windowFlags() | Qt.WindowMaximizeButtonHint | Qt.WindowMinimizeButtonHint)
         
-        # Store data
-        self.previous_years_data = previous_years_data or []
-        self.original_data = previous_years_data or []  # Keep original data for filtering
-        
-        # Initialize filter state
+        # Initialize filter state (applied in SQL by the page loader)
         self.filter_dialog = None
         self.selected_filter_columns = []
+        self.table_filter = TableFilter()
         
         # Main layout
         main_layout = QVBoxLayout(self)
@@ -1063,8 +1064,9 @@ class PreviousYearsDialog(QDialog):
         # Add table to container
         table_layout.addWidget(self.previous_years_table)
         
-        # Add pagination to the table
+        # Add pagination to the table: only the current page of matching rows is loaded
         self.paginator = tablepaginator(self.previous_years_table, rows_per_page=10)
+        self.paginator.set_page_loader(self.load_previous_years_page)
         table_layout.addWidget(self.paginator)
         
         # Add all widgets to the center layout
@@ -1275,42 +1277,9 @@ class PreviousYearsDialog(QDialog):
             if checkbox.isChecked():
                 self.selected_filter_columns.append(column)
         
-        # Get filter value
-        filter_value = self.filter_value_input.text().strip().lower()
-        
-        if not filter_value or not self.selected_filter_columns:
-            # Reset filter if no value or no columns selected - show all data
-            self.previous_years_data = self.original_data.copy()
-            self.load_previous_years_data()
-            self.filter_dialog.accept()
-            return
-        
-        # Get column indices for selected columns
-        column_indices = []
-        for col_name in self.selected_filter_columns:
-            for col_idx in range(self.previous_years_table.columnCount()):
-                if self.previous_years_table.horizontalHeaderItem(col_idx).text() == col_name:
-                    column_indices.append(col_idx)
-        
-        # Filter the data
-        filtered_data = []
-        for row_data in self.original_data:
-            row_visible = False
-            
-            # Check if any selected column contains the filter value
-            for col_idx in column_indices:
-                if col_idx < len(row_data):
-                    cell_value = str(row_data[col_idx]).lower()
-                    if filter_value in cell_value:
-                        row_visible = True
-                        break
-            
-            if row_visible:
-                filtered_data.append(row_data)
-        
-        # Update the displayed data
-        self.previous_years_data = filtered_data
-        self.load_previous_years_data()
+        # Filtered in SQL over every previous year record (an empty filter shows everything)
+        self.table_filter = TableFilter(self.selected_filter_columns, self.filter_value_input.text())
+        self.paginator.update_page(1)
         
         # Close the dialog
         self.filter_dialog.accept()
@@ -1384,83 +1353,48 @@ class PreviousYearsDialog(QDialog):
 
     def load_previous_years_data(self):
         """
-        Load previous years data into the table with pagination
+        Load the first page of previous years data into the table
         """
-        # Clear existing rows
-        self.previous_years_table.setRowCount(0)
+        self.paginator.update_page(1)
+
+    def load_previous_years_page(self, page, rows_per_page):
+        """
+        Fill the table with one page of previous years records matching the filter
+        and return the total count
+        """
+        current_year = datetime.now().year
+        conges, total = self.parent.conge_controller.get_leave_overview_page(
+            table_filter=self.table_filter,
+            page=page,
+            page_size=rows_per_page,
+            before_year=current_year
+        )
         
-        # Add data to table
-        for row, data in enumerate(self.previous_years_data):
-            self.previous_years_table.insertRow(row)
-            for col, value in enumerate(data):
-                item = QTableWidgetItem(str(value))
+        self.previous_years_table.setRowCount(len(conges))
+        for row, conge in enumerate(conges):
+            for col, value in enumerate(self.parent.leave_row(conge)):
+                item = QTableWidgetItem(value)
                 item.setTextAlignment(Qt.AlignCenter)
                 self.previous_years_table.setItem(row, col, item)
         
-        # Update paginator with new data
-        self.paginator.update_total_rows()
-        self.paginator.update_page(1)  # Always start from page 1
+        return total
 
     def refresh_previous_years_data(self):
         """
         Refresh previous years data and reset pagination to first page
         """
         try:
-            # Get fresh data from parent
-            if self.parent:
-                # Get current year
-                current_year = datetime.now().year
-                
-                # Get previous years data from database
-                previous_conges = self.parent.conge_controller.get_previous_years_conges(current_year)
-                
-                # Format data for display
-                refreshed_data = []
-                
-                for conge in previous_conges:
-                    # Get tranches for this conge
-                    tranches = self.parent.tranche_controller.get_tranches_by_conge(conge.idConge)
-                    
-                    # Format tranche data
-                    tranche_values = ["0", "0", "0", "0", "0"]  # Default 5 empty tranches
-                    
-                    for i, tranche in enumerate(tranches[:5]):  # Limit to 5 tranches
-                        days = (tranche.DateFin - tranche.DateDebut).days + 1
-                        tranche_values[i] = str(days)
-                    
-                    # Add row data
-                    row_data = [
-                        str(conge.idConge),
-                        str(conge.Annee),
-                        str(conge.idemploye),
-                        conge.employe.Nom if conge.employe else "",
-                        conge.employe.Prenom if conge.employe else "",
-                        str(conge.NbrJoursAlloues),
-                        tranche_values[0],
-                        tranche_values[1],
-                        tranche_values[2],
-                        tranche_values[3],
-                        tranche_values[4],
-                        str(conge.NbrJoursPris),
-                        str(conge.NbrJoursRestants)
-                    ]
-                    
-                    refreshed_data.append(row_data)
-                
-                # Update both original and displayed data
-                self.original_data = refreshed_data
-                self.previous_years_data = refreshed_data.copy()
-                
-                # Reset any applied filters
-                self.selected_filter_columns = []
-                if hasattr(self, 'filter_value_input'):
-                    self.filter_value_input.clear()
-                if hasattr(self, 'filter_checkboxes'):
-                    for checkbox in self.filter_checkboxes.values():
-                        checkbox.setChecked(False)
-                
-                # Reload the table with fresh data
-                self.load_previous_years_data()
+            # Reset any applied filters
+            self.selected_filter_columns = []
+            self.table_filter = TableFilter()
+            if hasattr(self, 'filter_value_input'):
+                self.filter_value_input.clear()
+            if hasattr(self, 'filter_checkboxes'):
+                for checkbox in self.filter_checkboxes.values():
+                    checkbox.setChecked(False)
+            
+            # Reload the first page from the database
+            self.load_previous_years_data()
                 
         except Exception as e:
             CustomWarningDialog(self, "خطأ", f"خطأ في تحديث البيانات: {str(e)}").exec_()
@@ -1704,17 +1638,9 @@ class LeaveManagementSystem(QMainWindow):
     def refresh_data(self):
         """Refresh the table data from database and reset pagination to first page"""
         # Force refresh to ensure new employees are included
+        # (filters are reset and the first page is loaded)
         self.force_refresh_data()
-        
-        # Reset any applied filters
-        for row in range(self.table.rowCount()):
-            self.table.setRowHidden(row, False)
         self.selected_filter_columns = []
-        
-        # Reset pagination to first page with 10 rows per page
-        if hasattr(self, 'paginator'):
-            self.paginator.update_total_rows()
-            self.paginator.update_page(1)  # Go back to first page
     def update_data(self):
         self.refresh_data()
     def create_table_title(self):
@@ -1871,35 +1797,9 @@ class LeaveManagementSystem(QMainWindow):
             if checkbox.isChecked():
                 self.selected_filter_columns.append(column)
         
-        # Get filter value
-        filter_value = self.filter_value_input.text().strip().lower()
-        
-        if not filter_value or not self.selected_filter_columns:
-            # Reset filter if no value or no columns selected
-            for row in range(self.table.rowCount()):
-                self.table.setRowHidden(row, False)
-            self.filter_dialog.accept()
-            return
-        
-        # Get column indices for selected columns
-        column_indices = []
-        for col_name in self.selected_filter_columns:
-            for col_idx in range(self.table.columnCount()):
-                if self.table.horizontalHeaderItem(col_idx).text() == col_name:
-                    column_indices.append(col_idx)
-        
-        # Apply filter
-        for row in range(self.table.rowCount()):
-            row_visible = False
-            
-            # Check if any selected column contains the filter value
-            for col_idx in column_indices:
-                cell_value = self.table.item(row, col_idx).text().lower()
-                if filter_value in cell_value:
-                    row_visible = True
-                    break
-            
-            self.table.setRowHidden(row, not row_visible)
+        # Filtered in SQL over every current year record (an empty filter shows everything)
+        self.table_filter = TableFilter(self.selected_filter_columns, self.filter_value_input.text())
+        self.paginator.update_page(1)
         
         # Close the dialog
         self.filter_dialog.accept()
@@ -2143,9 +2043,10 @@ class LeaveManagementSystem(QMainWindow):
         
         self.main_page_layout.addWidget(buttons_widget)
 
-    def validate_tranche_dates(self, start_date, end_date, leave_id, exclude_tranche_id=None):
+    def validate_tranche_dates(self, start_date, end_date):
         """
-        Validate tranche dates for overlaps and year constraints
+        Validate tranche dates against the year constraints
+        (overlaps are checked by the tranche controller on the employee's schedule index)
         """
         current_year = datetime.now().year
         
@@ -2163,28 +2064,6 @@ class LeaveManagementSystem(QMainWindow):
         if start_date > end_date:
             raise ValueError("تاريخ البداية يجب أن يكون قبل تاريخ النهاية")
         
-        # Check for overlaps with existing tranches in database
-        try:
-            conge_id = int(leave_id)
-            existing_tranches = self.tranche_controller.get_tranches_by_conge(conge_id)
-            
-            for tranche in existing_tranches:
-                # Skip the tranche being edited
-                if exclude_tranche_id is not None and tranche.idTranche == exclude_tranche_id:
-                    continue
-                    
-                existing_start = tranche.DateDebut
-                existing_end = tranche.DateFin
-                
-                # Check for overlap
-                if (start_date <= existing_end and end_date >= existing_start):
-                    raise ValueError(f"التواريخ تتداخل مع شطر موجود (القرار رقم: {tranche.NumeroDecision})")
-        except Exception as e:
-            if "التواريخ تتداخل" in str(e):
-                raise e
-            # If there's an error getting tranches, continue without overlap check
-            pass
-        
         return True
 
     def show_add_leave_form(self):
@@ -2230,11 +2109,7 @@ class LeaveManagementSystem(QMainWindow):
                 leave_data = add_dialog.leave_data
                 
                 # Validate dates before saving
-                self.validate_tranche_dates(
-                    leave_data["start_date"], 
-                    leave_data["end_date"], 
-                    leave_id
-                )
+                self.validate_tranche_dates(leave_data["start_date"], leave_data["end_date"])
                 
                 # Get conge ID
                 conge_id = int(leave_id)
@@ -2250,7 +2125,8 @@ class LeaveManagementSystem(QMainWindow):
                     numero_decision=int(leave_data["decision_id"]),
                     date_decision=decision_date,
                     date_debut=start_date,
-                    date_fin=end_date
+                    date_fin=end_date,
+                    schedule=ScheduleIndex(self.session, [int(employee_id)])
                 )
                 self.tranche_controller.log_history(
                 event="إضافة عطلة",
@@ -2347,53 +2223,14 @@ class LeaveManagementSystem(QMainWindow):
         Show the previous years dialog with pagination
         """
         try:
-            # Get current year
-            current_year = datetime.now().year
-            
-            # Get previous years data from database
-            previous_conges = self.conge_controller.get_previous_years_conges(current_year)
-            
-            # Format data for display
-            previous_years_data = []
-            
-            for conge in previous_conges:
-                # Get tranches for this conge
-                tranches = self.tranche_controller.get_tranches_by_conge(conge.idConge)
-                
-                # Format tranche data
-                tranche_values = ["0", "0", "0", "0", "0"]  # Default 5 empty tranches
-                
-                for i, tranche in enumerate(tranches[:5]):  # Limit to 5 tranches
-                    days = (tranche.DateFin - tranche.DateDebut).days + 1
-                    tranche_values[i] = str(days)
-                
-                # Add row data
-                row_data = [
-                    str(conge.idConge),
-                    str(conge.Annee),
-                    str(conge.idemploye),
-                    conge.employe.Prenom if conge.employe else "",
-                    conge.employe.Nom if conge.employe else "",
-                    str(conge.NbrJoursAlloues),
-                    tranche_values[0],
-                    tranche_values[1],
-                    tranche_values[2],
-                    tranche_values[3],
-                    tranche_values[4],
-                    str(conge.NbrJoursPris),
-                    str(conge.NbrJoursRestants)
-                ]
-                
-                previous_years_data.append(row_data)
-            
-            # Create and show previous years dialog
-            previous_years_dialog = PreviousYearsDialog(self, previous_years_data)
+            # Create and show previous years dialog (pages are loaded from the database)
+            previous_years_dialog = PreviousYearsDialog(self)
             previous_years_dialog.exec_()
         except Exception as e:
             CustomWarningDialog(self, "خطأ", str(e)).exec_()
 
 
-    def update_tranche_by_id(self, tranche_id, tranche_data):
+    def update_tranche_by_id(self, tranche_id, tranche_data, schedule=None):
    
         try:
             # Get the selected leave ID from the main table
@@ -2406,12 +2243,7 @@ class LeaveManagementSystem(QMainWindow):
             leave_id = int(self.table.item(row, 0).text())  # ✅ use local variable
 
             # Validate dates before updating
-            self.validate_tranche_dates(
-                tranche_data["start_date"], 
-                tranche_data["end_date"], 
-                leave_id,
-                exclude_tranche_id=tranche_id
-            )
+            self.validate_tranche_dates(tranche_data["start_date"], tranche_data["end_date"])
 
             # Convert dates to datetime objects
             decision_date = datetime.strptime(tranche_data["decision_date"], "%Y-%m-%d").date()
@@ -2424,7 +2256,8 @@ class LeaveManagementSystem(QMainWindow):
                 numero_decision=int(tranche_data["decision_id"]),
                 date_decision=decision_date,
                 date_debut=start_date,
-                date_fin=end_date
+                date_fin=end_date,
+                schedule=schedule
             )
 
             # ✅ Force reload of updated data from DB
@@ -2440,13 +2273,13 @@ class LeaveManagementSystem(QMainWindow):
             CustomWarningDialog(self, "خطأ", f"خطأ في تعديل الشطر: {str(e)}").exec_()
 
 
-    def delete_tranche_by_id(self, tranche_id):
+    def delete_tranche_by_id(self, tranche_id, schedule=None):
         """
         Delete a tranche using its database ID instead of table index
         """
         try:
             # Delete tranche from database using the controller
-            result = self.tranche_controller.delete_tranche(tranche_id)
+            result = self.tranche_controller.delete_tranche(tranche_id, schedule=schedule)
             
             # Get the selected row in the main table
             selected_rows = self.table.selectionModel().selectedRows()
@@ -2510,57 +2343,53 @@ class LeaveManagementSystem(QMainWindow):
         # Print to console for debugging
         print(f"Action logged: {timestamp} | {user} | {action_type} | {details}")
 
+    @staticmethod
+    def leave_row(conge):
+        """Table row (strings, in column order) of a get_leave_overview_page record"""
+        return [
+            str(conge['idConge']),
+            str(conge['Annee']),
+            str(conge['idemploye']),
+            conge['Nom'],
+            conge['Prenom'],
+            str(conge['NbrJoursAlloues']),
+            *(str(days) for days in conge['tranche_days']),
+            str(conge['NbrJoursPris']),
+            str(conge['NbrJoursRestants'])
+        ]
+
     def load_data_from_database(self):
-        session = self.session
         try:
-            current_year = datetime.now().year
-            conges = self.conge_controller.get_all_conges(current_year)
-            employe_controller = EmployeeController(self.session)
-
-            # 🚨 Get list of definitively departed employee IDs
-            departed_ids = set(depart.idemploye for depart in employe_controller.get_final_departures())
-
-            self.table.setRowCount(0)
-
-            for conge in conges:
-                if conge.idemploye in departed_ids:
-                    continue  # Skip archived employees
-
-                tranches = self.tranche_controller.get_tranches_by_conge(conge.idConge)
-                tranche_values = ["0", "0", "0", "0", "0"]
-
-                for i, tranche in enumerate(tranches[:5]):
-                    days = (tranche.DateFin - tranche.DateDebut).days + 1
-                    tranche_values[i] = str(days)
-
-                row_idx = self.table.rowCount()
-                self.table.insertRow(row_idx)
-
-                self.table.setItem(row_idx, 0, QTableWidgetItem(str(conge.idConge)))
-                self.table.setItem(row_idx, 1, QTableWidgetItem(str(conge.Annee)))
-                self.table.setItem(row_idx, 2, QTableWidgetItem(str(conge.idemploye)))
-                self.table.setItem(row_idx, 3, QTableWidgetItem(conge.employe.Nom if conge.employe else ""))
-                self.table.setItem(row_idx, 4, QTableWidgetItem(conge.employe.Prenom if conge.employe else ""))
-                self.table.setItem(row_idx, 5, QTableWidgetItem(str(conge.NbrJoursAlloues)))
-                self.table.setItem(row_idx, 6, QTableWidgetItem(tranche_values[0]))
-                self.table.setItem(row_idx, 7, QTableWidgetItem(tranche_values[1]))
-                self.table.setItem(row_idx, 8, QTableWidgetItem(tranche_values[2]))
-                self.table.setItem(row_idx, 9, QTableWidgetItem(tranche_values[3]))
-                self.table.setItem(row_idx, 10, QTableWidgetItem(tranche_values[4]))
-                self.table.setItem(row_idx, 11, QTableWidgetItem(str(conge.NbrJoursPris)))
-                self.table.setItem(row_idx, 12, QTableWidgetItem(str(conge.NbrJoursRestants)))
-
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row_idx, col)
-                    if item:
-                        item.setTextAlignment(Qt.AlignCenter)
-
-            self.paginator.update_total_rows()
+            # Server-side pagination: only the current page of matching rows is loaded
+            self.table_filter = TableFilter()
+            self.paginator.set_page_loader(self.load_leaves_page)
             self.paginator.update_page(1)
 
         except Exception as e:
             CustomWarningDialog(self, "خطأ", f"خطأ في تحميل البيانات: {str(e)}").exec_()
 
+    def load_leaves_page(self, page, rows_per_page):
+        """Fill the table with one page of current year leaves matching the filter and return the total count"""
+        current_year = datetime.now().year
+        # Archived employees (final departure) are excluded in SQL,
+        # names and tranche durations come with the page
+        conges, total = self.conge_controller.get_leave_overview_page(
+            table_filter=self.table_filter,
+            page=page,
+            page_size=rows_per_page,
+            year=current_year,
+            active_only=True
+        )
+
+        self.table.setRowCount(len(conges))
+        for row_idx, conge in enumerate(conges):
+            for col, value in enumerate(self.leave_row(conge)):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(Qt.AlignCenter)
+                self.table.setItem(row_idx, col, item)
+
+        return total
+
 
     def migrate_previous_year_data(self):
         """
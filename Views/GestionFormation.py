@@ -14,6 +14,8 @@ from TablePaginator1 import tablepaginator
 from ui_constants import *
 from custom_dialogs import CustomWarningDialog, CustomInfoDialog, CustomMessageBox
 from Controllers.formation_controller import FormationController
+from Controllers.employee_name_index import get_employee_name_index
+from Controllers.table_filter import TableFilter
 from sqlalchemy.orm import sessionmaker
 from DatabaseConnection import db
 import openpyxl
@@ -29,30 +31,37 @@ class EmployeeCompleter(QCompleter):
         self.setCompletionMode(QCompleter.PopupCompletion)
         self.setMaxVisibleItems(10)
         
-        # Store employee data for lookup
+        # Store employee data for lookup: (idemploye, Prenom, Nom)
         self.employees = []
         
     def update_employees(self, first_name):
-        """Update the list of employees from the database based on first name"""
+        """Update the list of employees from the shared in-memory name index"""
         if not first_name or len(first_name) < 2:
             self.model().setStringList([])
             return
             
-        self.employees = self.controller.search_employees_by_first_name(first_name)
+        self.employees = get_employee_name_index(self.controller.session).contains(first_name, limit=50)
         
-        # Create a list of first names
-        employee_names = [emp.Prenom for emp in self.employees]
+        # Create a list of unique first names
+        employee_names = list(dict.fromkeys(prenom for _, prenom, _ in self.employees if prenom))
         
         # Update the model
         self.model().setStringList(employee_names)
     
     def get_last_name(self, first_name):
         """Get the last name for a given first name"""
-        for emp in self.employees:
-            if emp.Prenom == first_name:
-                return emp.Nom
+        for _, prenom, nom in self.employees:
+            if prenom == first_name:
+                return nom or ""
         return ""
 
+    def get_employee_id(self, first_name, last_name):
+        """Get the ID of the suggested employee with this first and last name"""
+        for idemploye, prenom, nom in self.employees:
+            if prenom == first_name and nom == last_name:
+                return idemploye
+        return None
+
 # New class for form windows
 class FormationFormWindow(QMainWindow):
     # Signal to send form data back to main window
@@ -64,6 +73,8 @@ class FormationFormWindow(QMainWindow):
         """
         super().__init__(parent)
         self.controller = controller
+        # Employee of the edited formation: (idemploye, Prenom, Nom), kept while the names are unchanged
+        self.loaded_employee = None
         self.setWindowTitle(title)
         self.setGeometry(100, 100, 600, 650)  # Reduced height since duration field is removed
         self.setStyleSheet(f"background-color: {DARK_BG}; color: {WHITE};")
@@ -334,6 +345,22 @@ class FormationFormWindow(QMainWindow):
             if last_name:
                 self.form_fields["اللقب"].setText(last_name)
     
+    def selected_employee_id(self):
+        """ID of the employee named in the form, from the completer or the shared name index"""
+        first_name = self.form_fields["الإسم"].text().strip()
+        last_name = self.form_fields["اللقب"].text().strip()
+        if self.loaded_employee and self.loaded_employee[1:] == (first_name, last_name):
+            return self.loaded_employee[0]
+        if hasattr(self, 'name_completer'):
+            employee_id = self.name_completer.get_employee_id(first_name, last_name)
+            if employee_id is not None:
+                return employee_id
+        if self.controller:
+            matches = get_employee_name_index(self.controller.session).find(first_name, last_name)
+            if len(matches) == 1:
+                return matches[0][0]
+        return None
+
     def validate_form(self):
         """
         Validate the form fields
@@ -352,10 +379,7 @@ class FormationFormWindow(QMainWindow):
                 return False
                 
         # Validate employee exists
-        first_name = self.form_fields["الإسم"].text().strip()
-        last_name = self.form_fields["اللقب"].text().strip()
-        
-        if self.controller and not self.controller.get_employee_by_name(first_name, last_name):
+        if self.controller and self.selected_employee_id() is None:
             warning_dialog = CustomWarningDialog(self, "تحذير", "الموظف غير موجود. الرجاء التأكد من الاسم واللقب")
             warning_dialog.exec_()
             self.form_fields["الإسم"].setFocus()
@@ -387,8 +411,9 @@ class FormationFormWindow(QMainWindow):
         # Add placeholder for Annee (will be calculated from DateDebut)
         form_data.append("")
         
-        # Add placeholder for idemploye (will be looked up from name)
-        form_data.append("")
+        # idemploye of the selected employee (looked up from name if empty)
+        employee_id = self.selected_employee_id() if self.controller else None
+        form_data.append(employee_id if employee_id is not None else "")
         
         # Add the rest of the form fields
         for field_name, field in self.form_fields.items():
@@ -407,6 +432,9 @@ class FormationFormWindow(QMainWindow):
 
     def fill_form_with_data(self, data):
         """Fill form fields with provided data (adjusted for removed duration field)"""
+        if len(data) > 3 and str(data[1]).isdigit():
+            self.loaded_employee = (int(data[1]), data[2].strip(), data[3].strip())
+
         # Map data to form fields (updated mapping without duration)
         field_mapping = {
             0: None,  # Skip Annee
@@ -672,10 +700,11 @@ class FormationManagementSystem(QMainWindow):
         # Show main page by default
         self.stacked_widget.setCurrentIndex(0)
         
-        self.load_data_from_database()
-        
-        # Initialize filter state
+        # Initialize filter state (compiled into SQL by the controller)
         self.selected_filter_columns = []
+        self.table_filter = TableFilter()
+        
+        self.load_data_from_database()
         
         # Get current date for validation
         self.today = QDate.currentDate()
@@ -770,11 +799,10 @@ class FormationManagementSystem(QMainWindow):
 
     def refresh_data(self):
         """Refresh the table data from database"""
-        self.load_data_from_database()
         # Reset any applied filters
-        for row in range(self.table.rowCount()):
-            self.table.setRowHidden(row, False)
+        self.table_filter = TableFilter()
         self.selected_filter_columns = []
+        self.load_data_from_database()
     def update_data(self):
         self.refresh_data()
     def show_filter_dialog(self):
@@ -795,35 +823,14 @@ class FormationManagementSystem(QMainWindow):
     def apply_filter(self, selected_columns, filter_value):
         """
         Apply the filter to the table based on selected columns and input value
+
+        The filter is compiled into SQL by the controller: every formation is searched,
+        not only the loaded rows, and the matches are paginated on the server.
         """
         # Store selected columns
         self.selected_filter_columns = selected_columns
-        
-        if not filter_value or not selected_columns:
-            # Reset filter if no value or no columns selected
-            for row in range(self.table.rowCount()):
-                self.table.setRowHidden(row, False)
-            return
-        
-        # Get column indices for selected columns
-        column_indices = []
-        for col_name in selected_columns:
-            for col_idx in range(self.table.columnCount()):
-                if self.table.horizontalHeaderItem(col_idx).text() == col_name:
-                    column_indices.append(col_idx)
-        
-        # Apply filter
-        for row in range(self.table.rowCount()):
-            row_visible = False
-            
-            # Check if any selected column contains the filter value
-            for col_idx in column_indices:
-                cell_value = self.table.item(row, col_idx).text().lower()
-                if filter_value.lower() in cell_value:
-                    row_visible = True
-                    break
-            
-            self.table.setRowHidden(row, not row_visible)
+        self.table_filter = TableFilter(selected_columns, filter_value)
+        self.paginator.update_page(1)
 
     def create_table(self):
         """
@@ -978,6 +985,7 @@ class FormationManagementSystem(QMainWindow):
         new_formation = self.controller.create_formation(
             first_name=first_name,
             last_name=last_name,
+            employee_id=formation_data[1] or None,
             type_formation=type_formation,
             date_debut=date_debut,
             date_fin=date_fin,
@@ -1038,6 +1046,7 @@ class FormationManagementSystem(QMainWindow):
                 formation_id=formation_id,
                 first_name=first_name,
                 last_name=last_name,
+                employee_id=formation_data[1] or None,
                 type_formation=type_formation,
                 date_debut=date_debut,
                 date_fin=date_fin,
@@ -1119,17 +1128,28 @@ class FormationManagementSystem(QMainWindow):
         print(f"Action logged: {timestamp} | {user} | {action_type} | {details}")
 
     def load_data_from_database(self):
+        # Server-side pagination: only the current page of matching formations is loaded
+        self.paginator.set_page_loader(self.load_formations_page)
+        self.paginator.update_page(1)
+
+    def load_formations_page(self, page, rows_per_page):
+        """Fill the table with one page of formations matching the filter and return the total count"""
+        rows, total = self.controller.get_formations_page(
+            table_filter=self.table_filter,
+            page=page,
+            page_size=rows_per_page
+        )
+
         self.table.setRowCount(0)
-        formations = self.controller.get_all_formations()
-        for formation in formations:
+        for formation, prenom, nom in rows:
             row_pos = self.table.rowCount()
             self.table.insertRow(row_pos)
 
             values = [
                 str(formation.DateDebut.year),
                 str(formation.idemploye),
-                formation.employe.Prenom if formation.employe else "",
-                formation.employe.Nom if formation.employe else "",
+                prenom or "",
+                nom or "",
                 formation.Type,
                 formation.DateDebut.strftime("%Y-%m-%d"),
                 formation.DateFin.strftime("%Y-%m-%d"),
@@ -1146,8 +1166,7 @@ class FormationManagementSystem(QMainWindow):
             # Store hidden ID
             self.table.item(row_pos, 0).setData(Qt.UserRole, formation.idFormation)
 
-        self.paginator.update_total_rows()
-        self.paginator.update_page(1)
+        return total
 
 
     def _get_table_data_as_lists(self):
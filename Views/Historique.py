@@ -3,7 +3,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                             QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+                             QHBoxLayout, QLabel, QTableView,
                              QPushButton, QHeaderView, QDialog, QFormLayout,
                              QLineEdit, QDateEdit, QComboBox, QCheckBox, QToolButton,
                              QMessageBox)
@@ -13,6 +13,7 @@ from Views.ui_constants import *
 
 # Import du contrôleur d'historique
 from Controllers.history_controller import HistoryController
+from Views.RowTableModel import RowTableModel
 from Models import init_db
 
 
@@ -48,12 +49,39 @@ class FilterDialog(QDialog):
         """)
         form_layout.addRow("اسم المستخدم:", self.username_filter)
 
-        # Date filter
+        # Date filter : période du ... au ... (jours inclus)
         self.date_filter = QDateEdit()
-        self.date_filter.setCalendarPopup(True)
-        self.date_filter.setDate(QDate.currentDate())
-        self.date_filter.setStyleSheet(f"""
-            QDateEdit {{
+        self.date_to_filter = QDateEdit()
+        for date_edit in [self.date_filter, self.date_to_filter]:
+            date_edit.setCalendarPopup(True)
+            date_edit.setDate(QDate.currentDate())
+            date_edit.setStyleSheet(f"""
+                QDateEdit {{
+                    background-color: {MEDIUM_BG};
+                    color: {WHITE};
+                    border: none;
+                    border-radius: 5px;
+                    padding: 8px;
+                    font-size: 14px;
+                }}
+            """)
+        self.use_date = QCheckBox("تفعيل تصفية التاريخ")
+        self.use_date.setStyleSheet(f"color: {WHITE}; font-size: 14px;")
+
+        date_layout = QHBoxLayout()
+        date_layout.addWidget(self.date_filter)
+        date_layout.addWidget(QLabel("إلى"))
+        date_layout.addWidget(self.date_to_filter)
+        date_layout.addWidget(self.use_date)
+        form_layout.addRow("من:", date_layout)
+
+        # Période relative (prioritaire sur les dates)
+        self.range_filter = QComboBox()
+        self.range_filter.addItem("بدون", None)
+        for key, (label, _) in HistoryController.RELATIVE_RANGES.items():
+            self.range_filter.addItem(label, key)
+        self.range_filter.setStyleSheet(f"""
+            QComboBox {{
                 background-color: {MEDIUM_BG};
                 color: {WHITE};
                 border: none;
@@ -61,14 +89,16 @@ class FilterDialog(QDialog):
                 padding: 8px;
                 font-size: 14px;
             }}
+            QComboBox::drop-down {{
+                border: none;
+            }}
+            QComboBox QAbstractItemView {{
+                background-color: {MEDIUM_BG};
+                color: {WHITE};
+                selection-background-color: {ORANGE};
+            }}
         """)
-        self.use_date = QCheckBox("تفعيل تصفية التاريخ")
-        self.use_date.setStyleSheet(f"color: {WHITE}; font-size: 14px;")
-
-        date_layout = QHBoxLayout()
-        date_layout.addWidget(self.date_filter)
-        date_layout.addWidget(self.use_date)
-        form_layout.addRow("التاريخ:", date_layout)
+        form_layout.addRow("الفترة:", self.range_filter)
 
         # Event filter - Dynamique selon le module
         self.event_filter = QComboBox()
@@ -210,18 +240,24 @@ class FilterDialog(QDialog):
         if self.parent:
             username = self.username_filter.text()
             event = self.event_filter.currentText() if self.event_filter.currentIndex() > 0 else ""
-            date = self.date_filter.date().toString("yyyy-MM-dd") if self.use_date.isChecked() else ""
+            date_from = self.date_filter.date().toPyDate() if self.use_date.isChecked() else None
+            date_to = self.date_to_filter.date().toPyDate() if self.use_date.isChecked() else None
+            if date_from and date_to and date_to < date_from:
+                date_from, date_to = date_to, date_from
+            relative_range = self.range_filter.currentData()
             gestion = self.gestion_filter.currentText() if self.gestion_filter.currentIndex() > 0 else ""  # NOUVEAU
             self.current_page = 0
 
-            self.parent.apply_filter(username, date, event, gestion)  # NOUVEAU : Passer la gestion
+            self.parent.apply_filter(username, date_from, date_to, event, gestion, relative_range)  # NOUVEAU : Passer la gestion
             self.accept()
 
     def reset_filter(self):
         """Reset the filter fields"""
         self.username_filter.clear()
         self.date_filter.setDate(QDate.currentDate())
+        self.date_to_filter.setDate(QDate.currentDate())
         self.use_date.setChecked(False)
+        self.range_filter.setCurrentIndex(0)
         self.event_filter.setCurrentIndex(0)
         self.gestion_filter.setCurrentIndex(0)  # NOUVEAU : Reset gestion filter
         self.current_page = 0
@@ -251,9 +287,13 @@ class HistoryDialog(QMainWindow):
         
         self.history_controller = HistoryController(self.session)
         
-        # Données d'historique
-        self.history_data = []
-        self.filtered_data = []
+        # Données d'historique : seule la page affichée est chargée
+        self.page_entries = []
+        self.filters = {}
+        self.page_cursors = [None]  # Curseur de début de chaque page visitée
+        self.next_cursor = None
+        self.total_entries = 0
+        self.total_is_exact = True
         self.rows_per_page = 10
         self.current_page = 0
 
@@ -358,19 +398,19 @@ class HistoryDialog(QMainWindow):
         table_layout.setContentsMargins(15, 15, 15, 15)
 
         # Create table
-        self.table = QTableWidget()
+        self.table = QTableView()
         self.table.setStyleSheet(f"""
-            QTableWidget {{
+            QTableView {{
                 background-color: {MEDIUM_BG};
                 color: {WHITE};
                 border: none;
                 gridline-color: {LIGHT_BG};
             }}
-            QTableWidget::item {{
+            QTableView::item {{
                 padding: 8px;
                 border-bottom: 1px solid {LIGHT_BG};
             }}
-            QTableWidget::item:selected {{
+            QTableView::item:selected {{
                 background-color: {ORANGE};
                 color: {WHITE};
             }}
@@ -399,12 +439,12 @@ class HistoryDialog(QMainWindow):
         # Set up columns - NOUVEAU : Ajouter la colonne "الإدارة"
         columns = ["التاريخ", "الوقت", "اسم المستخدم", "الحدث", "الإدارة", "التفاصيل"]
 
-        self.table.setColumnCount(len(columns))
-        self.table.setHorizontalHeaderLabels(columns)
+        self.table_model = RowTableModel(columns, alignment=Qt.AlignLeading | Qt.AlignVCenter, parent=self)
+        self.table.setModel(self.table_model)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
 
         # Set column widths - NOUVEAU : Ajuster pour la nouvelle colonne
         header = self.table.horizontalHeader()
@@ -451,6 +491,13 @@ class HistoryDialog(QMainWindow):
 
         main_layout.addLayout(pagination_layout)
 
+        # Nombre d'entrées par jour pour le filtre actuel
+        self.daily_counts_label = QLabel()
+        self.daily_counts_label.setAlignment(Qt.AlignCenter)
+        self.daily_counts_label.setWordWrap(True)
+        self.daily_counts_label.setStyleSheet(f"color: {WHITE}; font-size: 13px;")
+        main_layout.addWidget(self.daily_counts_label)
+
         # Create buttons layout
         buttons_layout = QHBoxLayout()
         buttons_layout.setSpacing(15)
@@ -489,95 +536,103 @@ class HistoryDialog(QMainWindow):
         self.load_history()
 
     def load_history(self):
-        """Load history data using the controller with access control"""
+        """Load the first page of the history using the controller with access control"""
+        self.filters = {'gestion': self.gestion_filter} if self.gestion_filter else {}
+        self.load_page(reset=True)
+
+    def load_page(self, reset=False, log_access=True):
+        """
+        Load one page of history (keyset pagination on the server)
+
+        Parameters:
+        - reset: Go back to the first page (new filter or refresh)
+        - log_access: Log the consultation when the first page is loaded
+        """
         try:
-            print(f"DEBUG - current_user_data reçu: {self.current_user_data}")
             user_id = self.current_user_data.get('account_number')
             username = self.current_user_data.get('username')
-            print(f"DEBUG - user_id extrait: {user_id}")
-            print(f"DEBUG - username extrait: {username}")           
             if not user_id:
                 print("DEBUG - user_id est None ou vide")
                 QMessageBox.warning(self, "خطأ", "لم يتم العثور على معرف المستخدم")
                 return
-            
-            # Use the controller's access control method with gestion filter
-            success, data, message = self.history_controller.get_history_with_access_control(
-                user_id, username, self.gestion_filter  # NOUVEAU : Passer le filtre de gestion
+
+            if reset:
+                self.current_page = 0
+                self.page_cursors = [None]
+
+            success, page, message = self.history_controller.get_history_page_with_access_control(
+                user_id,
+                username,
+                cursor=self.page_cursors[self.current_page],
+                page_size=self.rows_per_page,
+                log_access=log_access,
+                **self.filters
             )
-            
+
             if success:
-                self.history_data = data
-                self.filtered_data = self.history_data.copy()
+                self.page_entries = page['entries']
+                self.next_cursor = page['next_cursor']
+                self.total_entries = page['total']
+                self.total_is_exact = page['total_is_exact']
                 self.populate_table()
-                
-                # Log successful access - NOUVEAU : Inclure la gestion
-                access_details = f"تم الوصول إلى سجل الأنشطة من {self.module_name} بنجاح من قبل المدير: {username}"
-                if self.gestion_filter:
-                    access_details += f" - مرشح حسب: {self.gestion_filter}"
-
+                if reset:
+                    self.update_daily_counts()
             else:
                 QMessageBox.warning(self, "غير مصرح", message)
                 self.close()
-                
+
         except Exception as e:
             QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء تحميل السجل:\n{str(e)}")
             print(f"Error loading history: {e}")
 
     def refresh_history(self):
         """Refresh the history data"""
-        self.load_history()
+        self.load_page(reset=True, log_access=False)
 
     def show_filter_dialog(self):
         """Show the filter dialog"""
         dialog = FilterDialog(self)
         dialog.exec_()
 
-    def apply_filter(self, username, date, event, gestion=""):
+    def update_daily_counts(self, max_days=7):
+        """Show the number of entries of the most recent days matching the filter"""
+        daily_counts = self.history_controller.get_daily_counts(**self.filters)
+        text = " | ".join(f"{day}: {count}" for day, count in daily_counts[:max_days])
+        self.daily_counts_label.setText(f"عدد الأنشطة حسب اليوم: {text}" if text else "")
+
+    def apply_filter(self, username, date_from, date_to, event, gestion="", relative_range=None):
         """Apply filter to the history data using the controller - NOUVEAU : Inclure gestion"""
-        try:
-            user_id = self.current_user_data.get('account_number')
-            requesting_username = self.current_user_data.get('username')
-            
-            success, data, message = self.history_controller.filter_history_with_access_control(
-                user_id, username, date, event, requesting_username, gestion  # NOUVEAU : Passer gestion
-            )
-            
-            if success:
-                self.filtered_data = data
-                self.populate_table()
-            else:
-                QMessageBox.warning(self, "خطأ", message)
-                
-        except Exception as e:
-            QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء التصفية:\n{str(e)}")
+        self.filters = {
+            'username': username,
+            'date_from': date_from,
+            'date_to': date_to,
+            'event': event,
+            'gestion': gestion or self.gestion_filter,
+            'relative_range': relative_range
+        }
+        self.load_page(reset=True)
 
     def reset_filter(self):
         """Reset the filter and show all data"""
-        self.filtered_data = self.history_data.copy()
-        self.populate_table()
+        self.filters = {'gestion': self.gestion_filter} if self.gestion_filter else {}
+        self.load_page(reset=True, log_access=False)
 
     def go_to_next_page(self):
-     if (self.current_page + 1) * self.rows_per_page < len(self.filtered_data):
-        self.current_page += 1
-        self.populate_table()
+        if self.next_cursor is not None:
+            # Le curseur de la page suivante est la dernière entrée affichée
+            del self.page_cursors[self.current_page + 1:]
+            self.page_cursors.append(self.next_cursor)
+            self.current_page += 1
+            self.load_page()
 
     def go_to_previous_page(self):
-     if self.current_page > 0:
-        self.current_page -= 1
-        self.populate_table()
+        if self.current_page > 0:
+            self.current_page -= 1
+            self.load_page()
 
     def populate_table(self):
-        self.table.setRowCount(0)
-
-        start_index = self.current_page * self.rows_per_page
-        end_index = start_index + self.rows_per_page
-        page_data = self.filtered_data[start_index:end_index]
-
-        for entry in page_data:
-            row_position = self.table.rowCount()
-            self.table.insertRow(row_position)
-
+        rows = []
+        for entry in self.page_entries:
             timestamp_str = entry.get('timestamp', '')
             if isinstance(timestamp_str, str):
                 timestamp_parts = timestamp_str.split()
@@ -587,24 +642,28 @@ class HistoryDialog(QMainWindow):
                 date = timestamp_str.strftime('%Y-%m-%d') if timestamp_str else ""
                 time = timestamp_str.strftime('%H:%M:%S') if timestamp_str else ""
 
-            self.table.setItem(row_position, 0, QTableWidgetItem(date))
-            self.table.setItem(row_position, 1, QTableWidgetItem(time))
-            self.table.setItem(row_position, 2, QTableWidgetItem(entry.get('username', 'غير معروف')))
-            self.table.setItem(row_position, 3, QTableWidgetItem(entry.get('event', '')))
-            self.table.setItem(row_position, 4, QTableWidgetItem(entry.get('gestion', 'غير محدد')))  # NOUVEAU : Colonne gestion
-            self.table.setItem(row_position, 5, QTableWidgetItem(entry.get('details', '')))
-
-        # Mettre à jour l'état des boutons
-        total_pages = max(1, (len(self.filtered_data) + self.rows_per_page - 1) // self.rows_per_page)
-        self.page_label.setText(f"الصفحة {self.current_page + 1} من {total_pages}")
+            rows.append((
+                date,
+                time,
+                entry.get('username', 'غير معروف'),
+                entry.get('event', ''),
+                entry.get('gestion', 'غير محدد'),  # NOUVEAU : Colonne gestion
+                entry.get('details', '')
+            ))
+        self.table_model.set_rows(rows)
+
+        # Mettre à jour l'état des boutons (le total est une estimation sur les grandes tables)
+        total_pages = max(1, (self.total_entries + self.rows_per_page - 1) // self.rows_per_page)
+        total_pages_text = str(total_pages) if self.total_is_exact else f"~{total_pages}"
+        self.page_label.setText(f"الصفحة {self.current_page + 1} من {total_pages_text}")
         self.prev_button.setEnabled(self.current_page > 0)
-        self.next_button.setEnabled((self.current_page + 1) * self.rows_per_page < len(self.filtered_data))
+        self.next_button.setEnabled(self.next_cursor is not None)
 
         # NOUVEAU : Titre mis à jour avec info de filtrage
         title = f"سجل الأنشطة - {self.module_name}"
         if self.gestion_filter:
             title += f" ({self.gestion_filter})"
-        title += f" ({len(self.filtered_data)} عنصر)"
+        title += f" ({self.total_entries if self.total_is_exact else '~' + str(self.total_entries)} عنصر)"
         self.setWindowTitle(title)
 
 if __name__ == "__main__":
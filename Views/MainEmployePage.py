@@ -8,7 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="PyQt5.sip")
 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
+                             QPushButton, QLabel, QLineEdit, QTableView,
                              QHeaderView, QFrame, QToolButton, QScrollArea,QSizePolicy)
 from PyQt5.QtGui import QIcon, QPixmap, QFont
 from PyQt5.QtCore import Qt, QSize
@@ -28,6 +28,9 @@ from AddEmploye import AddEmployeeWindow
 from EmployeDetails import EmployeeDetailsWindow
 from Filter import FilterWindow
 from FilterTableColumns import FilterTableColumnsWindow
+from TablePaginator1 import tablepaginator
+from RowTableModel import RowTableModel
+from SearchWorker import AsyncEmployeeSearch
 from Controllers.EmployeController import EmployeeController  # Updated import
 from DatabaseConnection import db
 from temporaryDepartureForm import TemporaryDepartureForm
@@ -53,6 +56,11 @@ class MainEmployeeWindow(QMainWindow):
         
         # Initialize controller with session and current user account number
         self.controller = EmployeeController(self.session, current_user_account_number)
+
+        # Debounced search, run on a worker thread with its own session
+        self.employee_search = AsyncEmployeeSearch(self.session, self.employee_row, parent=self)
+        self.employee_search.rowsReady.connect(self.show_search_rows)
+        self.employee_search.searchFailed.connect(self.show_search_error)
         
         self.setWindowTitle("نظام إدارة الموظفين")
         self.setGeometry(100, 100, 1400, 800)
@@ -397,6 +405,7 @@ class MainEmployeeWindow(QMainWindow):
         """)
 
         search_btn.clicked.connect(self.search_employees)
+        self.search_box.textChanged.connect(self.schedule_search)
 
         search_layout.addWidget(self.search_box)
         search_layout.addWidget(search_btn)
@@ -495,17 +504,16 @@ class MainEmployeeWindow(QMainWindow):
         table_scroll_area.setFrameShape(QFrame.NoFrame)  # no frame that specify the scroll frame
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(19)
+        self.table = QTableView()
         self.table.setStyleSheet(f"""
-            QTableWidget {{
+            QTableView {{
                 background-color: {MEDIUM_BG};
                 color: {WHITE};
                 border: none;
                 gridline-color: {LIGHT_BG};
                 font-size: 16px;
             }}
-            QTableWidget::item {{
+            QTableView::item {{
                 padding: 10px;
                 border-bottom: 1px solid {LIGHT_BG};
                 color: {WHITE};
@@ -514,7 +522,7 @@ class MainEmployeeWindow(QMainWindow):
                 font-size: 16px;
                 text-align: right;
             }}
-            QTableWidget::item:selected {{
+            QTableView::item:selected {{
                 background-color: {ORANGE};
                 color: {WHITE};
             }}
@@ -565,16 +573,13 @@ class MainEmployeeWindow(QMainWindow):
             "المصلحة"
         ]
 
-        self.table.setColumnCount(len(self.headers))
-        self.table.setHorizontalHeaderLabels(self.headers)
+        # Rows are kept as tuples in the model, only visible cells are rendered
+        self.table_model = RowTableModel(self.headers, parent=self)
+        self.table.setModel(self.table_model)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-
-        # Set text alignment for all columns to right-aligned
-        for i in range(len(self.headers)):
-            self.table.horizontalHeaderItem(i).setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
 
         # Add table to layout
         table_layout.addWidget(self.table)
@@ -584,7 +589,7 @@ class MainEmployeeWindow(QMainWindow):
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)  # Fixed width columns
 
         # Define column widths based on content length
-        column_widths = {
+        self.column_widths = column_widths = {
             "رقم الموظف": 100,
             "التفعيل": 100,  # Added (was not in original widths)
             "الاسم": 150,
@@ -613,15 +618,18 @@ class MainEmployeeWindow(QMainWindow):
                 self.table.setColumnWidth(i, width)
 
         self.table.setAlternatingRowColors(False)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
 
         # Connect double-click event to open employee details
-        self.table.cellDoubleClicked.connect(self.open_employee_details)
+        self.table.doubleClicked.connect(lambda index: self.open_employee_details(index.row(), index.column()))
 
         table_layout.addWidget(self.table)
         table_scroll_area.setWidget(table_container)
 
+        # Paginator: only the displayed page is fetched from the database
+        self.sort_key = "id"
+        self.paginator = tablepaginator(rows_per_page=10)
+        self.paginator.table = self.table
+
         # Action buttons at bottom
         action_buttons = QWidget()
         action_buttons_layout = QHBoxLayout(action_buttons)
@@ -769,6 +777,7 @@ class MainEmployeeWindow(QMainWindow):
         content_layout.addWidget(filter_section)
         content_layout.addWidget(table_title)
         content_layout.addWidget(table_scroll_area)
+        content_layout.addWidget(self.paginator)
         content_layout.addWidget(action_buttons)
 
         # Add sidebars and content to main layout
@@ -789,70 +798,64 @@ class MainEmployeeWindow(QMainWindow):
         """Refresh the table data from database"""
         self.load_employees_to_table()
         # Reset any applied filters
-        for row in range(self.table.rowCount()):
-            self.table.setRowHidden(row, False)
         self.selected_filter_columns = []
     def update_data(self):
         self.refresh_data()
     # for getting the data into the main table 
     def load_employees_to_table(self):
+        # A late search result must not replace the reloaded list
+        self.employee_search.cancel()
         self.session.expire_all()
-        self.table.setRowCount(0)  # Vider les lignes existantes
-
-        # Récupérer les employés avec informations de carrière
-        employees_data = self.controller.get_employees_with_career()
-
-        # Récupérer la liste des ID des employés ayant quitté définitivement
-        departed_ids = set(depart.idemploye for depart in self.controller.get_final_departures())
-
-        # Vérifier si des colonnes filtrées sont définies
-        has_filtered_columns = hasattr(self, 'visible_headers') and hasattr(self, 'selected_columns')
-
-        for emp, carriere in employees_data:
-            # ⚠️ Ignorer les employés archivés (départ définitif)
-            if emp.idemploye in departed_ids:
-                continue
-
-            row_position = self.table.rowCount()
-            self.table.insertRow(row_position)
-
-            emp_type = "موظف" if emp.type == "permanent" else "عون متعاقد"
-
-            all_data = [
-                str(emp.idemploye),                         # رقم الموظف
-                "مفعل" if emp.Statut else "غير مفعل",       # التفعيل
-                emp.Prenom or "",                              # الاسم
-                emp.Nom or "",                           # اللقب
-                emp.NomEpoux or "",                         # لقب الزوج
-                emp.Datedenaissance.strftime("%Y-%m-%d") if emp.Datedenaissance else "",  # تاريخ الميلاد
-                emp.Lieudenaissance or "",                  # ولاية الميلاد
-                emp.Sexe or "",                             # الجنس
-                emp.Statutfamilial or "",                   # الوضعية العائلية
-                emp.Servicesnationale or "",                # الوضعية تجاه الخدمة الوطنية
-                carriere.Dipinitial or "",                  # الشهادة الأصلية
-                carriere.Dipactuel or "",                   # الشهادة الحالية
-                carriere.GRec or "",                        # رتبة التوظيف الأصلي
-                carriere.Nomposte or "",                    # الرتبة أو المنصب الحالي
-                carriere.current_class or "",               # الصنف الحالي
-                str(carriere.current_reference_number or ""), # الرقم الاستدلالي
-                carriere.effectiveDate.strftime("%Y-%m-%d") if carriere.effectiveDate else "",  # تاريخ المفعول
-                carriere.dependency or "",                  # التبعية
-                carriere.service or "",                     # المصلحة
-            ]
-
-            if has_filtered_columns:
-                for col, header in enumerate(self.visible_headers):
-                    original_index = self.headers.index(header)
-                    if original_index < len(all_data):
-                        self.table.setItem(row_position, col, QTableWidgetItem(all_data[original_index]))
-            else:
-                for col, value in enumerate(all_data):
-                    if col < self.table.columnCount():
-                        self.table.setItem(row_position, col, QTableWidgetItem(value))
+
+        # Pagination côté serveur : seule la page courante est chargée
+        self.paginator.set_page_loader(self.load_employees_page)
+        self.paginator.update_page(self.paginator.current_page)
 
         # Mettre à jour les statistiques dans la sidebar
         self.stats_sidebar_widget.refresh_statistics()
 
+    def load_employees_page(self, page, rows_per_page):
+        """Fill the table with a single page of employees and return the total count"""
+        # Récupérer la page demandée (employés archivés exclus côté serveur)
+        employees_data, total = self.controller.get_employees_page(
+            page=page,
+            page_size=rows_per_page,
+            sort_key=self.sort_key
+        )
+
+        self.table_model.set_rows(self.employee_row(emp, carriere) for emp, carriere in employees_data)
+
+        return total
+
+    def employee_row(self, emp, carriere):
+        """Build the table tuple of an employee, in the order of self.headers"""
+        return (
+            str(emp.idemploye),                         # رقم الموظف
+            "مفعل" if emp.Statut else "غير مفعل",       # التفعيل
+            emp.Prenom or "",                              # الاسم
+            emp.Nom or "",                           # اللقب
+            emp.NomEpoux or "",                         # لقب الزوج
+            emp.Datedenaissance.strftime("%Y-%m-%d") if emp.Datedenaissance else "",  # تاريخ الميلاد
+            emp.Lieudenaissance or "",                  # ولاية الميلاد
+            emp.Sexe or "",                             # الجنس
+            emp.Statutfamilial or "",                   # الوضعية العائلية
+            emp.Servicesnationale or "",                # الوضعية تجاه الخدمة الوطنية
+            carriere.Dipinitial or "",                  # الشهادة الأصلية
+            carriere.Dipactuel or "",                   # الشهادة الحالية
+            carriere.GRec or "",                        # رتبة التوظيف الأصلي
+            carriere.Nomposte or "",                    # الرتبة أو المنصب الحالي
+            carriere.current_class or "",               # الصنف الحالي
+            str(carriere.current_reference_number or ""), # الرقم الاستدلالي
+            carriere.effectiveDate.strftime("%Y-%m-%d") if carriere.effectiveDate else "",  # تاريخ المفعول
+            carriere.dependency or "",                  # التبعية
+            carriere.service or "",                     # المصلحة
+        )
+
+    def show_employee_rows(self, employees_data):
+        """Show fully loaded (Employe, Carriere) results, paginated client-side"""
+        self.table_model.set_rows(self.employee_row(emp, carriere) for emp, carriere in employees_data)
+        self.paginator.set_page_loader(None)
+        self.paginator.reset_filter()
 
     def show_history(self):
         """Show the activity history using the  history dialog with shared session"""
@@ -886,84 +889,23 @@ class MainEmployeeWindow(QMainWindow):
     # for reordering the table
     def apply_column_filter(self, selected_columns, column_order):
         """Apply column filter to the table - with proper reordering"""
-        # Save the current data
-        saved_data = []
-        for row in range(self.table.rowCount()):
-            row_data = {}
-            for col, header in enumerate(self.headers):
-                item = self.table.item(row, col)
-                if item:
-                    row_data[header] = item.text()
-                else:
-                    row_data[header] = ""
-            saved_data.append(row_data)
-
-        # Remember the current row count
-        row_count = self.table.rowCount()
-
-        # Clear the table
-        self.table.clear()
-
-        # Set up the table with the new column order
-        self.table.setColumnCount(len(selected_columns))
+        # The model keeps every column, reordering does not reload the data
+        self.table_model.set_column_order(selected_columns)
 
         # Create new headers list based on the selected columns and their order
-        new_headers = []
-        for i, original_index in enumerate(selected_columns):
-            new_headers.append(self.headers[original_index])
-
-        self.table.setHorizontalHeaderLabels(new_headers)
-
-        # Set text alignment for all columns to right-aligned (for Arabic)
-        for i in range(len(new_headers)):
-            header_item = self.table.horizontalHeaderItem(i)
-            if header_item:
-                header_item.setTextAlignment(Qt.AlignVCenter)
-
-        # Define column widths based on content length
-        column_widths = {
-            "رقم الموظف": 100,
-            "التفعيل": 100,
-            "الاسم": 150,
-            "اللقب": 150,
-            "لقب الزوج ": 150,
-            "تاريخ الميلاد": 150,
-            "ولاية الميلاد": 150,
-            "الجنس": 100,
-            " الوضعية العائلية": 150,
-            " الوضعية تجاه الخدمة الوطنية": 300,
-            "الشهادة التي تم على أساسهاالتوظيف الأصلي": 400,
-            "الشهادة الحالية ": 150,
-            "رتبة التوظيف الأصلي": 200,
-            "الرتبة أو منصب الشغل الحالي ": 300,
-            "الصنف الحالي ": 150,
-            "الدرجة الحالية": 150,
-            "تاريخ المفعول ": 150,
-            "التبعية": 150,
-            "المصلحة": 150
-        }
+        new_headers = self.table_model.visible_headers()
 
         # Set column widths
         for i, header in enumerate(new_headers):
-            width = column_widths.get(header, 200)  # Default to 200 if not specified
+            width = self.column_widths.get(header, 200)  # Default to 200 if not specified
             self.table.setColumnWidth(i, width)
 
-        # Restore the data in the new order
-        self.table.setRowCount(row_count)
-        for row, row_data in enumerate(saved_data):
-            for col, header in enumerate(new_headers):
-                if header in row_data:
-                    self.table.setItem(row, col, QTableWidgetItem(row_data[header]))
-
         # Make the last column stretch
         self.table.horizontalHeader().setStretchLastSection(True)
 
         # Store the new column configuration
         self.visible_headers = new_headers
         self.selected_columns = selected_columns
-        
-        # Update the table after applying filters
-        self.load_employees_to_table()
 
     def update_statistics(self):
         """Update the statistics based on the current table data"""
@@ -977,11 +919,7 @@ class MainEmployeeWindow(QMainWindow):
         active_count = 0
         inactive_count = 0
 
-        for row in range(self.table.rowCount()):
-            # Check employment type
-            job_type_col = -1  # Not directly in the table, need to get from employee data
-            activation_col = 1  # "التفعيل" column index
-
+        for row in range(self.table_model.rowCount()):
             # Get the employee data
             employee_data = self.get_employee_data_from_row(row)
 
@@ -993,12 +931,11 @@ class MainEmployeeWindow(QMainWindow):
                     contractors_count += 1
 
             # Count by activation status
-            activation_item = self.table.item(row, activation_col)
-            if activation_item:
-                if activation_item.text() == "مفعل":
-                    active_count += 1
-                elif activation_item.text() == "غير مفعل":
-                    inactive_count += 1
+            activation = self.table_model.value(row, "التفعيل")
+            if activation == "مفعل":
+                active_count += 1
+            elif activation == "غير مفعل":
+                inactive_count += 1
 
         # Update statistics widgets
         #self.stats_widgets_dict["employees"].setText(str(employees_count))
@@ -1033,7 +970,7 @@ class MainEmployeeWindow(QMainWindow):
 
     def open_employee_details(self, row, column):
         """Open employee details window when double-clicking a table cell"""
-        if row < 0 or row >= self.table.rowCount():
+        if row < 0 or row >= self.table_model.rowCount():
             return
         
         # Get employee ID from the correct column regardless of order
@@ -1056,7 +993,7 @@ class MainEmployeeWindow(QMainWindow):
 
     def open_employee_details_from_button(self):
         """Open employee details window from the button"""
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row < 0:
             QMessageBox.warning(self, "تحذير", "يرجى تحديد موظف من الجدول")
             return
@@ -1081,12 +1018,12 @@ class MainEmployeeWindow(QMainWindow):
 
     def open_departT_from_button(self):
         """Ouvre le formulaire de départ temporaire en modal, après vérification qu'une ligne est sélectionnée"""
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row < 0:
             QMessageBox.warning(self, "تحذير", "يرجى تحديد موظف من الجدول")
             return
         # Récupère l'ID de l'employé à partir de la table (colonne 0 par exemple)
-        employee_id = int(self.table.item(current_row, 0).text())
+        employee_id = int(self.table_model.value(current_row, "رقم الموظف"))
         employe = self.session.query(Employe).filter_by(idemploye=employee_id).first()
         if not employe:
             QMessageBox.warning(self, "خطأ", "الموظف غير موجود في قاعدة البيانات")
@@ -1105,11 +1042,11 @@ class MainEmployeeWindow(QMainWindow):
 
     def open_archive_form_button(self):
         """Ouvre le formulaire de départ temporaire en modal, après vérification qu'une ligne est sélectionnée"""
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row < 0:
             QMessageBox.warning(self, "تحذير", "يرجى تحديد موظف من الجدول")
             return
-        employee_id = int(self.table.item(current_row, 0).text())
+        employee_id = int(self.table_model.value(current_row, "رقم الموظف"))
         employe = self.session.query(Employe).filter_by(idemploye=employee_id).first()
         if not employe:
             QMessageBox.warning(self, "خطأ", "الموظف غير موجود في قاعدة البيانات")
@@ -1125,120 +1062,21 @@ class MainEmployeeWindow(QMainWindow):
 
     def get_employee_id_from_row(self, row):
         """Get employee ID from a table row regardless of column order"""
-        # Check if we have filtered columns
-        has_filtered_columns = hasattr(self, 'visible_headers') and hasattr(self, 'selected_columns')
-        
-        if has_filtered_columns:
-            # Find the column index for "رقم الموظف" in the visible headers
-            try:
-                id_column_index = self.visible_headers.index("رقم الموظف")
-                item = self.table.item(row, id_column_index)
-                if item:
-                    return item.text()
-            except ValueError:
-                # "رقم الموظف" is not in visible columns, need to get it from database
-                # Get any available data to identify the employee
-                employee_data = self.get_employee_data_from_row(row)
-                return self.find_employee_id_by_data(employee_data)
-        else:
-            # Use original column order
-            id_column_index = 0  # "رقم الموظف" is the first column in original order
-            item = self.table.item(row, id_column_index)
-            if item:
-                return item.text()
-        
+        # The model keeps every column, even those hidden by the column filter
+        if 0 <= row < self.table_model.rowCount():
+            return self.table_model.value(row, "رقم الموظف")
         return None
 
     def get_employee_data_from_row(self, row):
         """Get all employee data from a table row"""
-        employee_data = {}
-        
-        # Check if we have filtered columns
-        has_filtered_columns = hasattr(self, 'visible_headers') and hasattr(self, 'selected_columns')
-        
-        if has_filtered_columns:
-            # Use visible headers
-            headers_to_use = self.visible_headers
-        else:
-            # Use all headers
-            headers_to_use = self.headers
-        
-        # Get data from each visible column
-        for col, header in enumerate(headers_to_use):
-            if col < self.table.columnCount():
-                item = self.table.item(row, col)
-                if item:
-                    employee_data[header] = item.text()
-                else:
-                    employee_data[header] = ""
-        
-        return employee_data
-    
-    def find_employee_id_by_data(self, employee_data):
-        """Find employee ID using other available data when ID column is not visible"""
-        try:
-            # Try to find employee by name and surname combination
-            name = employee_data.get("الاسم", "")
-            surname = employee_data.get("اللقب", "")
-            
-            if name and surname:
-                # Query database to find employee by name and surname
-                employees_data = self.controller.get_employees_with_career()
-                for emp, carriere in employees_data:
-                    if emp.Prenom.strip().lower() == name.strip().lower() and emp.Nom.strip().lower() == surname.strip().lower():
-                        return str(emp.idemploye)
-                print(f"Comparing: DB({emp.Prenom}, {emp.Nom}) vs UI({name}, {surname})")
-            # Try to find by other unique fields if available
-            position = employee_data.get("الرتبة أو منصب الشغل الحالي ", "")
-            service = employee_data.get("المصلحة", "")
-            
-            if position and service:
-                employees_data = self.controller.get_employees_with_career()
-                for emp, carriere in employees_data:
-                    if carriere.Nomposte == position and carriere.service == service:
-                        # Additional check to ensure uniqueness
-                        if name and surname:
-                            if emp.Prenom == name and emp.Nom == surname:
-                                return str(emp.idemploye)
-                        else:
-                            return str(emp.idemploye)
-            
-            return None
-        except Exception as e:
-            print(f"Error finding employee ID: {e}")
-            return None
-
-    def add_employee_to_table(self, employee_data):
-        """Add a new employee to the table"""
-        row_position = self.table.rowCount()
-        self.table.insertRow(row_position)
-
-        # Map the employee data to the correct columns based on the headers
-        # This ensures data is displayed in the correct order
-        column_mapping = {
-            0: 0,  # رقم الموظف
-            1: 2,  # الاسم
-            2: 3,  # اللقب
-            3: 5,  # تاريخ الميلاد
-            4: 6,  # ولاية الميلاد
-            5: 7,  # الجنس
-            10: 8,  # الوضعية العائلية
-            # Add more mappings as needed
-        }
-
-        # Fill in the data we have
-        for src_col, dest_col in column_mapping.items():
-            if src_col < len(employee_data) and dest_col < self.table.columnCount():
-                self.table.setItem(row_position, dest_col, QTableWidgetItem(str(employee_data[src_col])))
-
-        # Set default value for activation status (مفعل)
-        self.table.setItem(row_position, 1, QTableWidgetItem("مفعل"))
-
-        # Update statistics
-        self.update_statistics()
-        if hasattr(self, 'stats_sidebar') and self.stats_sidebar_visible:
-            self.stats_sidebar.refresh_statistics()
+        values = self.table_model.row_values(row)
 
+        # Use the visible headers (all headers when no column filter is applied)
+        return {
+            header: values[self.headers.index(header)]
+            for header in self.table_model.visible_headers()
+        }
+    
     def open_filter_window(self):
         """Open the filter window"""
         self.filter_window = FilterWindow(self, self.headers)
@@ -1246,9 +1084,6 @@ class MainEmployeeWindow(QMainWindow):
 
     def apply_filter_criteria(self, criteria):
         """Apply filter criteria to the table using database query"""
-        # Clear the table
-        self.table.setRowCount(0)
-
         # If no criteria, show all employees
         if not criteria:
             self.load_employees_to_table()
@@ -1257,102 +1092,19 @@ class MainEmployeeWindow(QMainWindow):
         # Use the controller to filter employees from the database
         filtered_employees = self.controller.filter_employees(criteria)
 
-                    
-        # Check if we have filtered columns
-        has_filtered_columns = hasattr(self, 'visible_headers') and hasattr(self, 'selected_columns')
-
-        # Add filtered employees to the table
-        for emp, carriere in filtered_employees:
-            row_position = self.table.rowCount()
-            self.table.insertRow(row_position)
-
-            all_data = [
-                str(emp.idemploye),
-                "مفعل" if emp.Statut else "غير مفعل",
-                emp.Nom or "",
-                emp.Prenom or "",
-                emp.NomEpoux or "",
-                emp.Datedenaissance.strftime("%Y-%m-%d") if emp.Datedenaissance else "",
-                emp.Lieudenaissance or "",
-                emp.Sexe or "",
-                emp.Statutfamilial or "",
-                emp.Servicesnationale or "",
-                carriere.Dipinitial or "",
-                carriere.Dipactuel or "",
-                carriere.GRec or "",
-                carriere.Nomposte or "",
-                carriere.current_class or "",
-                str(carriere.current_reference_number or ""),
-                carriere.effectiveDate.strftime("%Y-%m-%d") if carriere.effectiveDate else "",
-                carriere.dependency or "",
-                carriere.service or "",
-            ]
-
-            if has_filtered_columns:
-                for col, header in enumerate(self.visible_headers):
-                    original_index = self.headers.index(header)
-                    if original_index < len(all_data):
-                        self.table.setItem(row_position, col, QTableWidgetItem(all_data[original_index]))
-            else:
-                for col, value in enumerate(all_data):
-                    if col < self.table.columnCount():
-                        self.table.setItem(row_position, col, QTableWidgetItem(value))
-
-
+        # Filtered results are fully loaded: paginate them client-side
+        self.show_employee_rows(filtered_employees)
         
         self.update_statistics()
 
     def apply_filter(self, filter_criteria):
         """Apply filter criteria to the table"""
         try:
-            # Clear the table
-            self.table.setRowCount(0)
-            
             # Get filtered employees from controller
             filtered_employees = self.controller.filter_employees(filter_criteria)
-            
-            # Check if we have filtered columns
-            has_filtered_columns = hasattr(self, 'visible_headers') and hasattr(self, 'selected_columns')
-            
-            # Populate table with filtered data
-            for emp, carriere in filtered_employees:
-                row_position = self.table.rowCount()
-                self.table.insertRow(row_position)
-                
-                # Prepare all possible data
-                all_data = [
-                    str(emp.idemploye),                         # رقم الموظف
-                    "مفعل" if emp.Statut else "غير مفعل",       # التفعيل
-                    emp.Nom or "",                              # الاسم
-                    emp.Prenom or "",                           # اللقب
-                    emp.NomEpoux or "",                         # لقب الزوج
-                    emp.Datedenaissance.strftime("%Y-%m-%d") if emp.Datedenaissance else "",  # تاريخ الميلاد
-                    emp.Lieudenaissance or "",                  # ولاية الميلاد
-                    emp.Sexe or "",                             # الجنس
-                    emp.Statutfamilial or "",                   # الوضعية العائلية
-                    emp.Servicesnationale or "",                # الوضعية تجاه الخدمة الوطنية
-                    carriere.Dipinitial or "",                  # الشهادة الأصلية
-                    carriere.Dipactuel or "",                   # الشهادة الحالية
-                    carriere.GRec or "",                        # رتبة التوظيف الأصلي
-                    carriere.Nomposte or "",                    # الرتبة أو المنصب الحالي
-                    carriere.current_class or "",               # الصنف الحالي
-                    str(carriere.current_reference_number or ""), # الرقم الاستدلالي
-                    carriere.effectiveDate.strftime("%Y-%m-%d") if carriere.effectiveDate else "",  # تاريخ المفعول
-                    carriere.dependency or "",                  # التبعية
-                    carriere.service or "",                     # المصلحة
-                ]
-                
-                # If we have filtered columns, use them
-                if has_filtered_columns:
-                    for col, header in enumerate(self.visible_headers):
-                        original_index = self.headers.index(header)
-                        if original_index < len(all_data):
-                            self.table.setItem(row_position, col, QTableWidgetItem(all_data[original_index]))
-                else:
-                    # Otherwise use all columns
-                    for col, value in enumerate(all_data):
-                        if col < self.table.columnCount():
-                            self.table.setItem(row_position, col, QTableWidgetItem(value))
+
+            # Filtered results are fully loaded: paginate them client-side
+            self.show_employee_rows(filtered_employees)
                             
         except Exception as e:
             QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء تطبيق الترشيح: {str(e)}")
@@ -1366,67 +1118,53 @@ class MainEmployeeWindow(QMainWindow):
             self.load_employees_to_table()
             return
         
-        # Clear the table
-        self.table.setRowCount(0)
-        
-        # Get all employees with career information
-        employees_data = self.controller.get_employees_with_career()
-        
-        # Check if we have filtered columns
-        has_filtered_columns = hasattr(self, 'visible_headers') and hasattr(self, 'selected_columns')
-        
-        # Filter employees based on search term
-        for emp, carriere in employees_data:
-            # Check if search term matches any field
-            if (search_term in str(emp.idemploye) or
-                search_term in (emp.Nom or "") or
-                search_term in (emp.Prenom or "") or
-                search_term in (carriere.Nomposte or "") or
-                search_term in (carriere.service or "") or
-                search_term in (carriere.dependency or "")):
-                
-                row_position = self.table.rowCount()
-                self.table.insertRow(row_position)
-                
-                # Prepare all possible data
-                all_data = [
-                    str(emp.idemploye),                         # رقم الموظف
-                    "مفعل" if emp.Statut else "غير مفعل",       # التفعيل
-                    emp.Nom or "",                              # الاسم
-                    emp.Prenom or "",                           # اللقب
-                    emp.NomEpoux or "",                         # لقب الزوج
-                    emp.Datedenaissance.strftime("%Y-%m-%d") if emp.Datedenaissance else "",  # تاريخ الميلاد
-                    emp.Lieudenaissance or "",                  # ولاية الميلاد
-                    emp.Sexe or "",                             # الجنس
-                    emp.Statutfamilial or "",                   # الوضعية العائلية
-                    emp.Servicesnationale or "",                # الوضعية تجاه الخدمة الوطنية
-                    carriere.Dipinitial or "",                  # الشهادة الأصلية
-                    carriere.Dipactuel or "",                   # الشهادة الحالية
-                    carriere.GRec or "",                        # رتبة التوظيف الأصلي
-                    carriere.Nomposte or "",                    # الرتبة أو المنصب الحالي
-                    carriere.current_class or "",               # الصنف الحالي
-                    str(carriere.current_reference_number or ""), # الرقم الاستدلالي
-                    carriere.effectiveDate.strftime("%Y-%m-%d") if carriere.effectiveDate else "",  # تاريخ المفعول
-                    carriere.dependency or "",                  # التبعية
-                    carriere.service or "",                     # المصلحة
-                ]
-                
-                # If we have filtered columns, use them
-                if has_filtered_columns:
-                    for col, header in enumerate(self.visible_headers):
-                        original_index = self.headers.index(header)
-                        if original_index < len(all_data):
-                            self.table.setItem(row_position, col, QTableWidgetItem(all_data[original_index]))
-                else:
-                    # Otherwise use all columns
-                    for col, value in enumerate(all_data):
-                        if col < self.table.columnCount():
-                            self.table.setItem(row_position, col, QTableWidgetItem(value))
+        # Ranked search on the FULLTEXT indexes (names, post, service), off the GUI thread
+        self.employee_search.search_now(search_term)
+
+    def schedule_search(self, text):
+        """Search while typing, once the user pauses"""
+        search_term = text.strip()
+        if not search_term:
+            self.load_employees_to_table()
+            return
+        self.employee_search.schedule(search_term)
+
+    def show_search_rows(self, rows, first_chunk):
+        """Show the rows streamed by the latest search, paginated client-side"""
+        if first_chunk:
+            self.table_model.set_rows(rows)
+            self.paginator.set_page_loader(None)
+            self.paginator.reset_filter()
+        else:
+            self.table_model.append_rows(rows)
+            self.paginator.update_total_rows()
+            self.paginator.update_page(self.paginator.current_page)
+
+    def show_search_error(self, message):
+        """Search failed (lost connection, FULLTEXT error...): back to the unfiltered list"""
+        self.load_employees_to_table()
+        QMessageBox.warning(self, "خطأ في البحث", f"تعذر إجراء البحث، تم عرض جميع الموظفين.\n{message}")
+
+
+    def export_rows(self):
+        """Return (headers, rows) of the current table content for Excel/PDF export"""
+        if self.paginator.page_loader:
+            # Server-side pagination: the model only holds one page, export every employee
+            employees_data, _ = self.controller.get_employees_page(
+                page=1,
+                page_size=max(1, self.paginator.total_rows),
+                sort_key=self.sort_key
+            )
+            export_model = RowTableModel(self.headers)
+            export_model.set_rows(self.employee_row(emp, carriere) for emp, carriere in employees_data)
+            export_model.set_column_order(getattr(self, 'selected_columns', range(len(self.headers))))
+            return export_model.visible_headers(), export_model.display_rows()
+        return self.table_model.visible_headers(), self.table_model.display_rows()
 
     def export_to_excel(self):
-        """Exporte les données actuelles du QTableWidget vers un fichier Excel,
+        """Exporte les données actuelles du tableau vers un fichier Excel,
            en utilisant une boîte de dialogue de sauvegarde simplifiée."""
-        if self.table.rowCount() == 0:
+        if self.table_model.total_rows() == 0:
             QMessageBox.information(self, "لا توجد بيانات", "لا توجد بيانات في الجدول للتصدير.")
             return
 
@@ -1476,26 +1214,15 @@ class MainEmployeeWindow(QMainWindow):
             workbook = openpyxl.Workbook()
             sheet = workbook.active
             sheet.sheet_view.rightToLeft = True
-            headers_to_export = []
-            if hasattr(self, 'visible_headers') and self.visible_headers:
-                headers_to_export = self.visible_headers
-            else:
-                for col in range(self.table.columnCount()):
-                    header_item = self.table.horizontalHeaderItem(col)
-                    if header_item:
-                        headers_to_export.append(header_item.text())
-                    else:
-                        headers_to_export.append(f"Colonne {col+1}")
+            headers_to_export, rows_to_export = self.export_rows()
 
             for col_num, header_title in enumerate(headers_to_export, 1):
                 cell = sheet.cell(row=1, column=col_num)
                 cell.value = header_title
                 cell.font = openpyxl.styles.Font(bold=True)
 
-            for row_num in range(self.table.rowCount()):
-                for col_num_table in range(len(headers_to_export)):
-                    item = self.table.item(row_num, col_num_table)
-                    value = item.text() if item else ""
+            for row_num, row_values in enumerate(rows_to_export):
+                for col_num_table, value in enumerate(row_values):
                     sheet.cell(row=row_num + 2, column=col_num_table + 1).value = value
 
             for col_idx, column_cells in enumerate(sheet.columns, 1):
@@ -1522,7 +1249,7 @@ class MainEmployeeWindow(QMainWindow):
 
     def generate_current_table_as_pdf_action(self):
         """Action appelée par le bouton pour générer et sauvegarder le PDF du tableau."""
-        if self.table.rowCount() == 0:
+        if self.table_model.total_rows() == 0:
             QMessageBox.information(self, "لا توجد بيانات", "لا توجد بيانات في الجدول لتوليد PDF.")
             return
 
@@ -1558,7 +1285,7 @@ class MainEmployeeWindow(QMainWindow):
 
     def _generate_pdf_from_table_data(self, output_pdf_path, report_title="تقرير الموظفين"):
         """
-        Génère un fichier PDF à partir des données actuelles du QTableWidget.
+        Génère un fichier PDF à partir des données actuelles du tableau.
 
         Args:
             output_pdf_path (str): Chemin complet où sauvegarder le fichier PDF.
@@ -1567,28 +1294,13 @@ class MainEmployeeWindow(QMainWindow):
         Returns:
             bool: True si la génération a réussi, False sinon.
         """
-        if self.table.rowCount() == 0:
+        if self.table_model.total_rows() == 0:
             print("Avertissement: Tentative de génération de PDF avec une table vide.")
             return False
 
         # 1. Extraire les données et les en-têtes de la table
-        headers_for_pdf = []
-        # Utiliser les en-têtes visibles s'ils sont définis (après filtrage de colonnes)
-        if hasattr(self, 'visible_headers') and self.visible_headers:
-            headers_for_pdf = self.visible_headers
-        else: # Sinon, prendre tous les en-têtes de la table actuelle
-            for col in range(self.table.columnCount()):
-                header_item = self.table.horizontalHeaderItem(col)
-                headers_for_pdf.append(header_item.text() if header_item else f"العمود {col+1}")
-
-        employee_data_rows = []
-        for row_num in range(self.table.rowCount()):
-            row_data = []
-            # Itérer sur le nombre de colonnes défini par les en-têtes que nous allons utiliser
-            for col_num_in_headers in range(len(headers_for_pdf)):
-                item = self.table.item(row_num, col_num_in_headers) # Lire la cellule à la position actuelle de la table
-                row_data.append(item.text() if item else "")
-            employee_data_rows.append(row_data)
+        # Les en-têtes visibles (après filtrage de colonnes) et toutes les lignes du modèle
+        headers_for_pdf, employee_data_rows = self.export_rows()
 
         # 2. Préparer le contexte pour Jinja2
         context = {
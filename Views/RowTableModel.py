@@ -0,0 +1,191 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class RowTableModel(QAbstractTableModel):
+    """
+    A reusable read-only table model for QTableView
+    Rows are kept as compact tuples (one value per source column) and only the
+    cells the view asks for are converted to text. Rows are exposed lazily
+    through canFetchMore/fetchMore, and the model can be windowed by the
+    tablepaginator or reordered by the FilterTableColumns dialog.
+    """
+
+    def __init__(self, headers, batch_size=100, alignment=Qt.AlignCenter | Qt.AlignVCenter, parent=None):
+        """
+        Initialize the model
+
+        Parameters:
+        - headers: The source column headers (tuple values follow this order)
+        - batch_size: Number of rows exposed by each fetchMore call
+        - alignment: Text alignment used for cells and headers
+        """
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.batch_size = batch_size
+        self.alignment = alignment
+        self._rows = []
+        self._columns = list(range(len(self.headers)))  # Visible source columns, in display order
+        self._visible_rows = None  # Source row indices kept by a filter (None = all rows)
+        self._window = None  # (start, end) slice set by the paginator
+        self._fetched = 0
+
+    # ---------- Data loading ----------
+
+    def set_rows(self, rows):
+        """
+        Replace the model content
+
+        Parameters:
+        - rows: Iterable of tuples, one value per source header
+        """
+        self.beginResetModel()
+        self._rows = [tuple(row) for row in rows]
+        self._visible_rows = None
+        self._window = None
+        self._fetched = min(self.batch_size, len(self._rows))
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """
+        Add rows at the end (results streamed in chunks)
+
+        Parameters:
+        - rows: Iterable of tuples, one value per source header
+        """
+        self.beginResetModel()
+        self._rows.extend(tuple(row) for row in rows)
+        self._fetched = max(self._fetched, min(self.batch_size, self.total_rows()))
+        self.endResetModel()
+
+    def clear(self):
+        """Remove all rows"""
+        self.set_rows([])
+
+    def set_column_order(self, columns):
+        """
+        Show only the given source columns, in the given order
+
+        Parameters:
+        - columns: List of source column indices (as built by FilterTableColumnsWindow)
+        """
+        self.beginResetModel()
+        self._columns = list(columns)
+        self.endResetModel()
+
+    def set_visible_rows(self, row_indices=None):
+        """
+        Keep only the given source rows (filtering without reloading)
+
+        Parameters:
+        - row_indices: List of source row indices, or None to show all rows
+        """
+        self.beginResetModel()
+        self._visible_rows = list(row_indices) if row_indices is not None else None
+        self._fetched = min(self.batch_size, self.total_rows())
+        self.endResetModel()
+
+    def set_window(self, start, end):
+        """
+        Expose only rows [start, end) of the (filtered) data, used for pagination
+
+        Parameters:
+        - start: First row index, or None to remove the window
+        - end: Row index after the last row
+        """
+        self.beginResetModel()
+        self._window = (start, end) if start is not None else None
+        self.endResetModel()
+
+    # ---------- Helpers ----------
+
+    def total_rows(self):
+        """Number of rows after filtering, regardless of lazy loading or window"""
+        if self._visible_rows is not None:
+            return len(self._visible_rows)
+        return len(self._rows)
+
+    def source_row(self, row):
+        """Map a view row to an index in the source rows"""
+        position = row + (self._window[0] if self._window else 0)
+        if self._visible_rows is not None:
+            return self._visible_rows[position]
+        return position
+
+    def row_values(self, row):
+        """Return the full source tuple of a view row (including hidden columns)"""
+        return self._rows[self.source_row(row)]
+
+    def all_rows(self):
+        """Return every source tuple"""
+        return list(self._rows)
+
+    def visible_headers(self):
+        """Return the headers of the displayed columns, in display order"""
+        return [self.headers[column] for column in self._columns]
+
+    def value(self, row, header):
+        """Return the value of a view row for a source header"""
+        return self.row_values(row)[self.headers.index(header)]
+
+    def display_rows(self):
+        """Return the displayed columns of every (filtered) row as text, for export"""
+        rows = self._rows if self._visible_rows is None else [self._rows[i] for i in self._visible_rows]
+        return [[self._to_text(row[column]) for column in self._columns] for row in rows]
+
+    @staticmethod
+    def _to_text(value):
+        return "" if value is None else str(value)
+
+    # ---------- QAbstractTableModel interface ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self._window:
+            start, end = self._window
+            return max(0, min(end, self.total_rows()) - start)
+        return self._fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self._to_text(self.row_values(index.row())[self._columns[index.column()]])
+        if role == Qt.TextAlignmentRole:
+            return int(self.alignment)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal:
+            return None
+        if role == Qt.DisplayRole:
+            return self.headers[self._columns[section]]
+        if role == Qt.TextAlignmentRole:
+            return int(self.alignment)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._window:
+            return False
+        return self._fetched < self.total_rows()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        remaining = self.total_rows() - self._fetched
+        count = min(self.batch_size, remaining)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
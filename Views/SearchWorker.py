@@ -0,0 +1,168 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from sqlalchemy.orm import sessionmaker
+
+from Controllers.EmployeController import EmployeeController
+
+
+class SearchSignals(QObject):
+    """Signals emitted by the search workers (delivered on the GUI thread)"""
+    rows_ready = pyqtSignal(int, list, bool)  # request id, rows, first chunk
+    finished = pyqtSignal(int)                # request id, sent by every worker when it stops
+    failed = pyqtSignal(int, str)             # request id, error message
+
+
+class EmployeeSearchWorker(QRunnable):
+    """
+    Runs one employee search on a QThreadPool thread
+
+    The worker opens its own session (a session must not be shared between threads),
+    builds the table tuples off the GUI thread and sends them back in chunks.
+    It stops as soon as a newer search has been started.
+    """
+
+    def __init__(self, request_id, search_term, session_factory, row_builder, is_current, signals,
+                 limit=200, chunk_size=50):
+        """
+        Initialize the worker
+
+        Parameters:
+        - request_id: Identifier of this search, echoed in every signal
+        - search_term: Text to search
+        - session_factory: Callable returning a new SQLAlchemy session
+        - row_builder: callable(Employe, Carriere) returning the table tuple
+        - is_current: callable(request_id) telling whether this search is still the latest one
+        - signals: SearchSignals used to report results
+        - limit: Maximum number of results
+        - chunk_size: Number of rows sent per rows_ready signal
+        """
+        super().__init__()
+        self.request_id = request_id
+        self.search_term = search_term
+        self.session_factory = session_factory
+        self.row_builder = row_builder
+        self.is_current = is_current
+        self.signals = signals
+        self.limit = limit
+        self.chunk_size = chunk_size
+
+    def run(self):
+        if not self.is_current(self.request_id):
+            self.signals.finished.emit(self.request_id)
+            return
+
+        session = self.session_factory()
+        try:
+            results = EmployeeController(session).search_employees(self.search_term, self.limit)
+            rows = [self.row_builder(emp, carriere) for emp, carriere in results]
+
+            # Always send at least one chunk so an empty result clears the table
+            chunks = [rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size)] or [[]]
+            for index, chunk in enumerate(chunks):
+                if not self.is_current(self.request_id):
+                    return
+                self.signals.rows_ready.emit(self.request_id, chunk, index == 0)
+        except Exception as e:
+            print(f"Error in search worker: {e}")
+            self.signals.failed.emit(self.request_id, str(e))
+        finally:
+            session.close()
+            self.signals.finished.emit(self.request_id)
+
+
+class AsyncEmployeeSearch(QObject):
+    """
+    Debounced, cancellable employee search
+
+    Typing restarts a short timer, the query only runs once the user pauses.
+    Every new search supersedes the previous one: queued workers are removed
+    from the pool and results of older searches are dropped, so only the
+    latest query's rows reach the view.
+    """
+    rowsReady = pyqtSignal(list, bool)  # rows, first chunk (replace instead of append)
+    searchFinished = pyqtSignal()
+    searchFailed = pyqtSignal(str)
+
+    def __init__(self, session, row_builder, delay_ms=300, limit=200, parent=None):
+        """
+        Initialize the search
+
+        Parameters:
+        - session: Session of the window, only used to get the database engine
+        - row_builder: callable(Employe, Carriere) returning the table tuple
+        - delay_ms: Debounce delay after the last keystroke
+        - limit: Maximum number of results per search
+        """
+        super().__init__(parent)
+        self.session_factory = sessionmaker(bind=session.get_bind())
+        self.row_builder = row_builder
+        self.limit = limit
+
+        self.request_id = 0
+        self.pending_term = ""
+        self.workers = {}  # request id -> worker, kept alive until the worker stops
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.start_search)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+        self.signals = SearchSignals()
+        self.signals.rows_ready.connect(self.handle_rows_ready)
+        self.signals.finished.connect(self.handle_finished)
+        self.signals.failed.connect(self.handle_failed)
+
+    def schedule(self, search_term):
+        """Search after the debounce delay (restarted on each call)"""
+        self.pending_term = search_term
+        self.timer.start()
+
+    def search_now(self, search_term):
+        """Search immediately (search button)"""
+        self.timer.stop()
+        self.pending_term = search_term
+        self.start_search()
+
+    def cancel(self):
+        """Drop the pending and running searches"""
+        self.timer.stop()
+        # Workers still in the queue never start, running ones stop at their next check
+        for request_id, worker in list(self.workers.items()):
+            if self.pool.tryTake(worker):
+                del self.workers[request_id]
+        self.request_id += 1
+
+    def is_current(self, request_id):
+        return request_id == self.request_id
+
+    def start_search(self):
+        self.cancel()
+
+        worker = EmployeeSearchWorker(
+            self.request_id,
+            self.pending_term,
+            self.session_factory,
+            self.row_builder,
+            self.is_current,
+            self.signals,
+            limit=self.limit
+        )
+        # The pool must not delete the worker: a newer search may still take it out of the queue
+        worker.setAutoDelete(False)
+        self.workers[self.request_id] = worker
+        self.pool.start(worker)
+
+    def handle_rows_ready(self, request_id, rows, first_chunk):
+        if self.is_current(request_id):
+            self.rowsReady.emit(rows, first_chunk)
+
+    def handle_finished(self, request_id):
+        self.workers.pop(request_id, None)
+        if self.is_current(request_id):
+            self.searchFinished.emit()
+
+    def handle_failed(self, request_id, message):
+        if self.is_current(request_id):
+            self.searchFailed.emit(message)
@@ -6,7 +6,7 @@ from ui_constants import *
 
 class tablepaginator(QWidget):
     """
-    A reusable pagination widget for QTableWidget
+    A reusable pagination widget for QTableWidget, or for a QTableView backed by a RowTableModel
     Provides navigation controls and handles pagination logic
     """
     pageChanged = pyqtSignal(int)  # Signal emitted when page changes
@@ -27,6 +27,7 @@ class tablepaginator(QWidget):
         self.total_rows = 0
         self.filtered_rows = []  # For storing filtered row indices
         self.is_filtered = False
+        self.page_loader = None  # Server-side mode: callable(page, rows_per_page) -> total rows
 
         # Set up the UI
         self.setup_ui()
@@ -114,12 +115,34 @@ class tablepaginator(QWidget):
         self.update_total_rows()
         self.update_page(1)
 
+    def set_page_loader(self, page_loader):
+        """
+        Switch the paginator to server-side mode
+
+        Parameters:
+        - page_loader: callable(page, rows_per_page) that fills the table with that page only
+          and returns the total number of rows. Pass None to go back to hiding the rows
+          of a fully loaded table.
+        """
+        self.page_loader = page_loader
+        self.is_filtered = False
+        self.filtered_rows = []
+
+    def row_model(self):
+        """Return the RowTableModel behind the table, or None for a QTableWidget"""
+        model = self.table.model() if self.table is not None else None
+        return model if hasattr(model, "set_window") else None
+
     def update_total_rows(self):
         """Update the total number of rows and pages"""
         if not self.table:
             return
 
-        if self.is_filtered:
+        if self.page_loader:
+            pass  # total_rows is reported by the page loader
+        elif self.row_model():
+            self.total_rows = self.row_model().total_rows()
+        elif self.is_filtered:
             self.total_rows = len(self.filtered_rows)
         else:
             self.total_rows = self.table.rowCount()
@@ -147,6 +170,10 @@ class tablepaginator(QWidget):
         if not self.table:
             return
 
+        if self.page_loader:
+            self.load_page(page)
+            return
+
         # Validate page number
         page = max(1, min(page, self.total_pages))
         self.current_page = page
@@ -155,6 +182,15 @@ class tablepaginator(QWidget):
         start_idx = (page - 1) * self.rows_per_page
         end_idx = min(start_idx + self.rows_per_page, self.total_rows)
 
+        model = self.row_model()
+        if model:
+            # The model only exposes the rows of the current page
+            model.set_window(start_idx, end_idx)
+            self.page_label.setText(f"صفحة {self.current_page} من {self.total_pages}")
+            self.update_button_states()
+            self.pageChanged.emit(self.current_page)
+            return
+
         # Hide all rows first
         for row in range(self.table.rowCount()):
             self.table.setRowHidden(row, True)
@@ -175,6 +211,31 @@ class tablepaginator(QWidget):
         # Emit signal
         self.pageChanged.emit(self.current_page)
 
+    def load_page(self, page):
+        """
+        Ask the page loader for a single page (server-side mode)
+
+        Parameters:
+        - page: The page number to load
+        """
+        page = max(1, page)
+        self.total_rows = self.page_loader(page, self.rows_per_page)
+        self.total_pages = max(1, (self.total_rows + self.rows_per_page - 1) // self.rows_per_page)
+
+        # The data may have shrunk since the last load (deletion, archive...)
+        if page > self.total_pages:
+            page = self.total_pages
+            self.total_rows = self.page_loader(page, self.rows_per_page)
+
+        self.current_page = page
+
+        # Update page label and button states
+        self.page_label.setText(f"صفحة {self.current_page} من {self.total_pages}")
+        self.update_button_states()
+
+        # Emit signal
+        self.pageChanged.emit(self.current_page)
+
     def go_to_prev_page(self):
         """Go to the previous page"""
         self.update_page(self.current_page - 1)
@@ -190,6 +251,12 @@ class tablepaginator(QWidget):
         Parameters:
         - filtered_rows: List of row indices that match the filter
         """
+        model = self.row_model()
+        if model:
+            # The model filters its own rows, no need to track indices here
+            model.set_visible_rows(filtered_rows)
+            filtered_rows = None
+
         if filtered_rows is not None:
             self.filtered_rows = filtered_rows
             self.is_filtered = True
@@ -202,6 +269,8 @@ class tablepaginator(QWidget):
 
     def reset_filter(self):
         """Reset any applied filters"""
+        if self.row_model():
+            self.row_model().set_visible_rows(None)
         self.is_filtered = False
         self.filtered_rows = []
         self.update_total_rows()
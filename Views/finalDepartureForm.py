@@ -7,6 +7,7 @@ from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont,QIntValidator
 from Models.DepartDefinitif import DepartDefinitif
 from Models.Employe import Employe
+from Controllers.stats_controller import bump_data_version
 class FinalDepartureForm(QWidget):
     def __init__(self, session, employe, refresh_callback=None, employe_view = None):
         super().__init__()
@@ -229,6 +230,7 @@ class FinalDepartureForm(QWidget):
             
             self.session.add(depart_def)
             self.session.commit()
+            bump_data_version()
 
             print("Départ définitif enregistré.")
             if self.refresh_callback:
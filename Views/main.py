@@ -17,6 +17,7 @@ from Views.MainEmployePage import MainEmployeeWindow
 from sidebar import create_sidebar
 from topbar import create_top_bar
 from gestionComptes import CompteManagementSystem
+from Controllers.history_writer import HistoryWriter
 
 class HRMSMainWindow(QMainWindow):
     def __init__(self, session, current_user_data=None):
@@ -84,6 +85,9 @@ class HRMSMainWindow(QMainWindow):
         """Log out and return to login screen"""
         from login_integrated import DatabaseIntegratedLoginWindow
 
+        # Écrire l'historique en attente avant de quitter la session
+        HistoryWriter.flush_all()
+
         # Create and show the login window
         self.login_window = DatabaseIntegratedLoginWindow()
         self.login_window.show()
@@ -91,6 +95,11 @@ class HRMSMainWindow(QMainWindow):
         # Close the current window
         self.close()
 
+    def closeEvent(self, event):
+        """Flush the pending history entries when the window is closed"""
+        HistoryWriter.flush_all()
+        super().closeEvent(event)
+
     def initialize_modules(self):
         """
         Initialize all modules and add them to the stacked widget
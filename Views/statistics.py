@@ -1,16 +1,13 @@
+from datetime import date
 from sqlalchemy.orm import Session
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QFrame, QScrollArea, QPushButton
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QScrollArea, QPushButton, QSpinBox
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 
 # Import de vos contrôleurs
-from Controllers.stats_controller import (
-    repartition_par_sexe,
-    repartition_par_wilaya, 
-    repartition_par_age,
-    repartition_par_statut,
-    repartition_par_statut_familial
-)
+from Controllers.stats_controller import AGE_BUCKETS, get_data_version, get_employee_statistics
+from Controllers.cohort_analytics import DEFAULT_RETIREMENT_AGE, get_employee_cohort
+from Controllers.headcount_projection import get_headcount_projection
 
 # Couleurs du thème
 DARK_BG = "#263238"
@@ -30,6 +27,10 @@ class StatisticsSidebar(QWidget):
     def __init__(self, session: Session, parent=None):
         super().__init__(parent)
         self.session = session
+        self.loaded_key = None  # (version des données, jour) des statistiques affichées
+        # Paramètres de la projection des effectifs, conservés entre les actualisations
+        self.retirement_age = DEFAULT_RETIREMENT_AGE
+        self.projection_months = 60
         self.setup_ui()
         self.load_statistics()
         
@@ -201,19 +202,26 @@ class StatisticsSidebar(QWidget):
             # Effacer le contenu existant
             self.clear_content()
             
+            # Toutes les répartitions en une seule lecture (cache mémoire / snapshot)
+            # Clé lue avant la requête, retenue seulement si le chargement réussit
+            loaded_key = (get_data_version(), date.today())
+            statistics = get_employee_statistics(self.session)
+            self.loaded_key = loaded_key
+
             # Statistiques par sexe
             try:
-                sexe_stats = repartition_par_sexe(self.session)
+                sexe_stats = statistics.get("sexe")
                 if sexe_stats:
                     sexe_section = self.create_section("توزيع حسب الجنس", sexe_stats, show_percentage=True)
                     self.content_layout.addWidget(sexe_section)
             except Exception as e:
                 self.add_error_section("خطأ في إحصائيات الجنس", str(e))
             
-            # Statistiques par âge
+            # Statistiques par âge (toutes les tranches, dans l'ordre)
             try:
-                age_stats = repartition_par_age(self.session)
-                if age_stats:
+                age_counts = statistics.get("age", {})
+                age_stats = {label: age_counts.get(label, 0) for label, _ in AGE_BUCKETS}
+                if any(age_stats.values()):
                     age_section = self.create_section("توزيع حسب العمر", age_stats)
                     self.content_layout.addWidget(age_section)
             except Exception as e:
@@ -221,7 +229,7 @@ class StatisticsSidebar(QWidget):
             
             # Statistiques par statut
             try:
-                statut_stats = repartition_par_statut(self.session)
+                statut_stats = statistics.get("statut")
                 if statut_stats:
                     statut_section = self.create_section("توزيع حسب الحالة", statut_stats, show_percentage=True)
                     self.content_layout.addWidget(statut_section)
@@ -230,7 +238,7 @@ class StatisticsSidebar(QWidget):
             
             # Statistiques par statut familial
             try:
-                statut_familial_stats = repartition_par_statut_familial(self.session)
+                statut_familial_stats = statistics.get("statut_familial")
                 if statut_familial_stats:
                     statut_familial_section = self.create_section("الحالة العائلية", statut_familial_stats)
                     self.content_layout.addWidget(statut_familial_section)
@@ -239,20 +247,134 @@ class StatisticsSidebar(QWidget):
             
             # Top 5 Wilayas seulement pour économiser l'espace
             try:
-                wilaya_stats = repartition_par_wilaya(self.session)
+                wilaya_stats = statistics.get("wilaya")
                 if wilaya_stats:
                     top_wilayas = dict(sorted(wilaya_stats.items(), key=lambda x: x[1], reverse=True)[:5])
                     wilaya_section = self.create_section("أعلى 5 ولايات", top_wilayas)
                     self.content_layout.addWidget(wilaya_section)
             except Exception as e:
                 self.add_error_section("خطأ في إحصائيات الولايات", str(e))
+
+            # Analyses de la cohorte des employés actifs (calculs vectoriels)
+            try:
+                cohort = get_employee_cohort(self.session)
+                if len(cohort):
+                    labels, pyramid = cohort.age_pyramid(bin_width=10)
+                    pyramid_stats = {
+                        label: " | ".join(f"{sexe}: {int(counts[index])}" for sexe, counts in pyramid.items())
+                        for index, label in enumerate(labels)
+                        if any(counts[index] for counts in pyramid.values())
+                    }
+                    self.content_layout.addWidget(self.create_section("الهرم العمري", pyramid_stats))
+
+                    self.content_layout.addWidget(
+                        self.create_section("الأقدمية (بالسنوات)", cohort.seniority_histogram())
+                    )
+
+                    projection = cohort.retirement_projection(years=5)
+                    retirement_stats = {str(year): count for year, count in projection.items() if year != "overdue"}
+                    if projection["overdue"]:
+                        retirement_stats["تجاوزوا سن التقاعد"] = projection["overdue"]
+                    self.content_layout.addWidget(self.create_section("التقاعد المتوقع", retirement_stats))
+            except Exception as e:
+                self.add_error_section("خطأ في تحليل الأقدمية والتقاعد", str(e))
+
+            # Projection des effectifs, recalculée en mémoire à chaque changement de paramètre
+            try:
+                self.content_layout.addWidget(self.create_projection_section())
+                self.update_projection()
+            except Exception as e:
+                self.add_error_section("خطأ في توقع عدد الموظفين", str(e))
             
             # Spacer pour pousser le contenu vers le haut
             self.content_layout.addStretch()
             
         except Exception as e:
+            # Le prochain refresh_statistics réessaiera
+            self.loaded_key = None
             self.add_error_section("خطأ عام", f"حدث خطأ عام في تحميل الإحصائيات: {str(e)}")
 
+    def create_projection_section(self):
+        """Section de projection des effectifs : âge de la retraite et horizon modifiables"""
+        section_frame = QFrame()
+        section_frame.setStyleSheet(f"""
+            QFrame {{
+                border: 1px solid {LIGHT_BG};
+                border-radius: 8px;
+                background-color: {MEDIUM_BG};
+                margin: 2px;
+            }}
+        """)
+        section_layout = QVBoxLayout(section_frame)
+        section_layout.setContentsMargins(12, 10, 12, 10)
+        section_layout.setSpacing(6)
+
+        spin_style = f"""
+            QSpinBox {{
+                background-color: {DARKER_BG};
+                color: {WHITE};
+                border: none;
+                border-radius: 4px;
+                padding: 4px;
+                font-size: 12pt;
+            }}
+        """
+        label_style = f"color: {WHITE}; font-size: 12pt; border: none;"
+
+        self.retirement_age_spin = QSpinBox()
+        self.retirement_age_spin.setRange(50, 70)
+        self.retirement_age_spin.setValue(self.retirement_age)
+        self.retirement_age_spin.setStyleSheet(spin_style)
+
+        self.projection_months_spin = QSpinBox()
+        self.projection_months_spin.setRange(12, 120)
+        self.projection_months_spin.setSingleStep(12)
+        self.projection_months_spin.setValue(self.projection_months)
+        self.projection_months_spin.setStyleSheet(spin_style)
+
+        for text, spin in (("سن التقاعد", self.retirement_age_spin),
+                           ("المدة (بالأشهر)", self.projection_months_spin)):
+            row_layout = QHBoxLayout()
+            label = QLabel(text)
+            label.setStyleSheet(label_style)
+            row_layout.addWidget(spin)
+            row_layout.addWidget(label)
+            section_layout.addLayout(row_layout)
+            spin.valueChanged.connect(self.update_projection)
+
+        # Résultats remplacés à chaque recalcul
+        self.projection_layout = QVBoxLayout()
+        section_layout.addLayout(self.projection_layout)
+        return section_frame
+
+    def update_projection(self):
+        """Recalcule la projection avec les paramètres saisis (sans requête si les données n'ont pas changé)"""
+        self.retirement_age = self.retirement_age_spin.value()
+        self.projection_months = self.projection_months_spin.value()
+
+        for i in reversed(range(self.projection_layout.count())):
+            child = self.projection_layout.itemAt(i).widget()
+            if child:
+                child.setParent(None)
+
+        try:
+            projection = get_headcount_projection(self.session)
+            result = projection.project(months=self.projection_months, retirement_age=self.retirement_age)
+            retirements = projection.retirements_per_month(
+                months=self.projection_months, retirement_age=self.retirement_age
+            )
+
+            # Effectif au début de chaque année de l'horizon et au dernier mois
+            shown = sorted(set(range(0, self.projection_months, 12)) | {self.projection_months - 1})
+            headcount_stats = {result['months'][index]: result['total'][index] for index in shown}
+            headcount_stats["حالات التقاعد خلال المدة"] = sum(retirements)
+            self.projection_layout.addWidget(self.create_section("توقع عدد الموظفين", headcount_stats))
+        except Exception as e:
+            error_label = QLabel(f"خطأ: {e}")
+            error_label.setStyleSheet(f"color: {RED}; border: none;")
+            error_label.setWordWrap(True)
+            self.projection_layout.addWidget(error_label)
+
     def clear_content(self):
         """Efface tout le contenu de la sidebar"""
         for i in reversed(range(self.content_layout.count())):
@@ -289,9 +411,11 @@ class StatisticsSidebar(QWidget):
         
         self.content_layout.addWidget(error_frame)
 
-    def refresh_statistics(self):
-        """Actualise les statistiques"""
+    def refresh_statistics(self, force=False):
+        """Actualise les statistiques (sans reconstruire l'affichage si les données n'ont pas changé)"""
         try:
+            if not force and self.loaded_key == (get_data_version(), date.today()):
+                return
             self.load_statistics()
             print("Statistiques actualisées avec succès")
         except Exception as e:
@@ -300,4 +424,4 @@ class StatisticsSidebar(QWidget):
     def update_session(self, new_session: Session):
         """Met à jour la session de base de données"""
         self.session = new_session
-        self.refresh_statistics()
\ No newline at end of file
+        self.refresh_statistics(force=True)
\ No newline at end of file
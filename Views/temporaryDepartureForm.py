@@ -10,6 +10,7 @@ from PyQt5.QtGui import QFont,QIntValidator
 from Models import Employe
 from Models.DepartTemporaire import DepartTemporaire
 from Models.Depart import Depart
+from Controllers.stats_controller import apply_employee_change, bump_data_version, employee_statistics_keys
 class TemporaryDepartureForm(QWidget):
     def __init__(self, session, employe, refresh_callback=None):
         super().__init__()
@@ -256,10 +257,13 @@ class TemporaryDepartureForm(QWidget):
             )
 
             # Modifier le statut de l’employé
+            old_statistics_keys = employee_statistics_keys(employe)
             employe.Statut = False
+            apply_employee_change(self.session, old_statistics_keys, employee_statistics_keys(employe))
 
             self.session.add(depart)
             self.session.commit()
+            bump_data_version()
 
             print("Départ temporaire enregistré avec succès.")
 
@@ -0,0 +1,35 @@
+"""add fulltext search indexes on employes and carrieres
+
+Revision ID: a3c9e1f0b7d2
+Revises: fc175a5606c1
+Create Date: 2025-06-02 10:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e1f0b7d2'
+down_revision: Union[str, None] = 'fc175a5606c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ngram parser: Arabic names are not separated the way the default parser expects
+    op.create_index('ft_employes_search', 'employes',
+                    ['Nom', 'Prenom', 'NomFR', 'PrenomFR', 'NomEpoux'],
+                    unique=False, mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+    op.create_index('ft_carrieres_search', 'carrieres',
+                    ['Nomposte', 'service', 'dependency'],
+                    unique=False, mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ft_carrieres_search', table_name='carrieres')
+    op.drop_index('ft_employes_search', table_name='employes')
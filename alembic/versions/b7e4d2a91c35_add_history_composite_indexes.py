@@ -0,0 +1,45 @@
+"""add composite indexes on history
+
+Revision ID: b7e4d2a91c35
+Revises: a3c9e1f0b7d2
+Create Date: 2025-06-04 09:41:12.587310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a91c35'
+down_revision: Union[str, None] = 'a3c9e1f0b7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, columns) - kept in sync with History.__table_args__
+HISTORY_INDEXES = [
+    ('ix_history_timestamp_id', ['timestamp', 'id']),
+    ('ix_history_gestion_timestamp', ['gestion', 'timestamp']),
+    ('ix_history_user_timestamp', ['user_id', 'timestamp']),
+    ('ix_history_employe_timestamp', ['idemploye', 'timestamp']),
+    ('ix_history_formation_timestamp', ['idFormation', 'timestamp']),
+    ('ix_history_conge_timestamp', ['idConge', 'timestamp']),
+    ('ix_history_tranche_timestamp', ['idTranche', 'timestamp']),
+    ('ix_history_evaluation_timestamp', ['idEvaluation', 'timestamp']),
+    ('ix_history_absence_timestamp', ['idAbsence', 'timestamp']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in HISTORY_INDEXES:
+        op.create_index(name, 'history', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The single-column foreign key indexes are untouched, the constraints stay covered
+    for name, _ in reversed(HISTORY_INDEXES):
+        op.drop_index(name, table_name='history')
@@ -0,0 +1,121 @@
+"""partition history by month and add history_archive
+
+Revision ID: c5a8f3e6d104
+Revises: b7e4d2a91c35
+Create Date: 2025-06-06 14:22:05.913264
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a8f3e6d104'
+down_revision: Union[str, None] = 'b7e4d2a91c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MONTHS_AHEAD = 3
+
+# Foreign keys of history, restored by downgrade: (column, referred table, referred column)
+HISTORY_FOREIGN_KEYS = [
+    ('user_id', 'users', 'id'),
+    ('idemploye', 'employes', 'idemploye'),
+    ('idFormation', 'formations', 'idFormation'),
+    ('idConge', 'conges', 'idConge'),
+    ('idTranche', 'tranches', 'idTranche'),
+    ('idEvaluation', 'evaluations', 'idEvaluation'),
+    ('idAbsence', 'absences', 'idAbsence'),
+]
+
+
+def _next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _monthly_partitions(first_month, last_month):
+    partitions = []
+    month = first_month
+    while month <= last_month:
+        upper_bound = _next_month(month).strftime('%Y-%m-%d')
+        partitions.append(f"PARTITION p{month.year}{month.month:02d} VALUES LESS THAN (TO_DAYS('{upper_bound}'))")
+        month = _next_month(month)
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return partitions
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # Archive tier (no foreign keys: referenced rows may be deleted later)
+    op.create_table(
+        'history_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('event', sa.String(length=100), nullable=False),
+        sa.Column('details', sa.String(length=255), nullable=False),
+        sa.Column('idemploye', sa.Integer(), nullable=True),
+        sa.Column('idFormation', sa.Integer(), nullable=True),
+        sa.Column('idConge', sa.Integer(), nullable=True),
+        sa.Column('idTranche', sa.Integer(), nullable=True),
+        sa.Column('idEvaluation', sa.Integer(), nullable=True),
+        sa.Column('idAbsence', sa.Integer(), nullable=True),
+        sa.Column('gestion', sa.String(length=50), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_history_archive_timestamp_id', 'history_archive', ['timestamp', 'id'], unique=False)
+    op.create_index('ix_history_archive_gestion_timestamp', 'history_archive', ['gestion', 'timestamp'], unique=False)
+    op.create_index('ix_history_archive_user_timestamp', 'history_archive', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_history_archive_employe_timestamp', 'history_archive', ['idemploye', 'timestamp'], unique=False)
+
+    # MySQL does not allow foreign keys on partitioned tables
+    foreign_keys = bind.execute(sa.text(
+        "SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS "
+        "WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'history'"
+    )).scalars().all()
+    for name in foreign_keys:
+        op.drop_constraint(name, 'history', type_='foreignkey')
+
+    # The partitioning column must be part of the primary key
+    op.execute("UPDATE history SET timestamp = NOW() WHERE timestamp IS NULL")
+    op.execute("ALTER TABLE history MODIFY timestamp DATETIME NOT NULL, "
+               "DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)")
+
+    oldest = bind.execute(sa.text("SELECT MIN(timestamp) FROM history")).scalar() or datetime.now()
+    first_month = datetime(oldest.year, oldest.month, 1)
+    last_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD):
+        last_month = _next_month(last_month)
+
+    op.execute(
+        "ALTER TABLE history PARTITION BY RANGE (TO_DAYS(timestamp)) ("
+        + ", ".join(_monthly_partitions(first_month, last_month))
+        + ")"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE history REMOVE PARTITIONING")
+    op.execute("ALTER TABLE history DROP PRIMARY KEY, ADD PRIMARY KEY (id), MODIFY timestamp DATETIME NULL")
+
+    for column, referred_table, referred_column in HISTORY_FOREIGN_KEYS:
+        # Without foreign keys, entries may reference deleted rows: detach them first
+        op.execute(
+            f"UPDATE history h LEFT JOIN {referred_table} r ON r.{referred_column} = h.{column} "
+            f"SET h.{column} = NULL WHERE h.{column} IS NOT NULL AND r.{referred_column} IS NULL"
+        )
+        op.create_foreign_key(None, 'history', referred_table, [column], [referred_column])
+
+    op.drop_index('ix_history_archive_employe_timestamp', table_name='history_archive')
+    op.drop_index('ix_history_archive_user_timestamp', table_name='history_archive')
+    op.drop_index('ix_history_archive_gestion_timestamp', table_name='history_archive')
+    op.drop_index('ix_history_archive_timestamp_id', table_name='history_archive')
+    op.drop_table('history_archive')
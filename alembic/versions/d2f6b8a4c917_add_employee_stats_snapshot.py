@@ -0,0 +1,36 @@
+"""add employee statistics snapshot
+
+Revision ID: d2f6b8a4c917
+Revises: c5a8f3e6d104
+Create Date: 2025-06-11 10:17:45.301928
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b8a4c917'
+down_revision: Union[str, None] = 'c5a8f3e6d104'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled on first read by stats_controller.load_statistics_snapshot
+    op.create_table(
+        'employee_stats_snapshot',
+        sa.Column('dimension', sa.String(length=30), nullable=False),
+        sa.Column('bucket', sa.String(length=100), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('computed_on', sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('employee_stats_snapshot')
@@ -0,0 +1,37 @@
+"""add unique index on conges (idemploye, Annee)
+
+Revision ID: e8a1c3f5b290
+Revises: d2f6b8a4c917
+Create Date: 2025-06-13 08:52:06.114370
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a1c3f5b290'
+down_revision: Union[str, None] = 'd2f6b8a4c917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplicates carry their own tranches and days taken: they must be merged by hand
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT idemploye, Annee, GROUP_CONCAT(idConge ORDER BY idConge) AS ids "
+        "FROM conges GROUP BY idemploye, Annee HAVING COUNT(*) > 1"
+    )).all()
+    if duplicates:
+        listing = ", ".join(f"employe {row.idemploye} / {row.Annee}: conges {row.ids}" for row in duplicates)
+        raise RuntimeError(f"Duplicate leave records, merge them before upgrading: {listing}")
+
+    op.create_index('uq_conges_employe_annee', 'conges', ['idemploye', 'Annee'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_conges_employe_annee', table_name='conges')
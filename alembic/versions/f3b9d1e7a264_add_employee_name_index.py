@@ -0,0 +1,29 @@
+"""add (Nom, Prenom) index on employes
+
+Revision ID: f3b9d1e7a264
+Revises: e8a1c3f5b290
+Create Date: 2025-06-18 11:02:37.846215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d1e7a264'
+down_revision: Union[str, None] = 'e8a1c3f5b290'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Equality lookups by name used to resolve an employee id (kept in sync with Employe.__table_args__)
+    op.create_index('ix_employes_nom_prenom', 'employes', ['Nom', 'Prenom'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_employes_nom_prenom', table_name='employes')
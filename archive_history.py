@@ -0,0 +1,37 @@
+"""
+Archivage de l'historique
+
+Usage :
+    python archive_history.py                          # > 365 jours vers la table history_archive
+    python archive_history.py --days 180 --target jsonl --archive-dir archives/history
+    python archive_history.py --partitions-only        # crée seulement les partitions à venir
+
+À planifier (cron / tâche planifiée) une fois par mois.
+"""
+import argparse
+
+from DatabaseConnection import Database
+from Controllers.history_archiver import HistoryArchiver
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivage des anciennes entrées de l'historique")
+    parser.add_argument("--days", type=int, default=365, help="Horizon de rétention en jours")
+    parser.add_argument("--target", choices=["table", "jsonl"], default="table",
+                        help="Table history_archive ou fichiers JSONL compressés")
+    parser.add_argument("--archive-dir", default="archives/history", help="Dossier des fichiers JSONL")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Nombre d'entrées déplacées par transaction")
+    parser.add_argument("--months-ahead", type=int, default=3, help="Partitions mensuelles à préparer")
+    parser.add_argument("--partitions-only", action="store_true", help="Ne pas archiver, préparer les partitions")
+    args = parser.parse_args()
+
+    db = Database(user="hr", password="hr", host="localhost", db_name="HR", port=3306)
+    session = db.get_session()
+    try:
+        archiver = HistoryArchiver(session, batch_size=args.batch_size)
+        if not args.partitions_only:
+            count = archiver.archive_older_than(args.days, args.target, args.archive_dir)
+            print(f"Terminé : {count} entrées archivées")
+        archiver.ensure_future_partitions(args.months_ahead)
+    finally:
+        db.close()
@@ -0,0 +1,124 @@
+"""
+Benchmark des requêtes de l'historique (plans d'exécution et temps)
+
+Usage :
+    python benchmark_history.py --seed 1000000   # ajoute 1M lignes de test puis mesure
+    python benchmark_history.py                  # mesure sur les données existantes
+
+À lancer avant et après la migration b7e4d2a91c35 (alembic upgrade head)
+pour comparer les plans : sans index, EXPLAIN montre "Using filesort" et un
+parcours complet ; avec les index composites, un parcours d'index limité.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from DatabaseConnection import Database
+from Models import History, User, Employe
+from Controllers.history_controller import HistoryController
+
+GESTIONS = ["إدارة الموظفين", "إدارة الإجازات", "إدارة الغياب", "إدارة التكوين",
+            "إدارة التقييمات", "إدارة الشرائح", "إدارة الحسابات", "النظام"]
+EVENTS = ["إضافة موظف جديد", "تحديث بيانات موظف", "إضافة شطر جديد", "تحديث غياب",
+          "عرض سجل الأنشطة", "تصفية سجل الأنشطة"]
+
+
+def seed_history(session, rows, batch_size=10000):
+    """Insère `rows` entrées réparties sur les 3 dernières années"""
+    user_ids = [user_id for (user_id,) in session.query(User.id).all()] or [None]
+    employee_ids = [employee_id for (employee_id,) in session.query(Employe.idemploye).all()] or [None]
+    start = datetime.now() - timedelta(days=3 * 365)
+    seconds = 3 * 365 * 24 * 3600
+
+    insert = History.__table__.insert()
+    for offset in range(0, rows, batch_size):
+        batch = [{
+            'timestamp': start + timedelta(seconds=random.randrange(seconds)),
+            'user_id': random.choice(user_ids),
+            'event': random.choice(EVENTS),
+            'details': "entrée de test (benchmark)",
+            'gestion': random.choice(GESTIONS),
+            'idemploye': random.choice(employee_ids) if random.random() < 0.5 else None,
+        } for _ in range(min(batch_size, rows - offset))]
+        session.execute(insert, batch)
+        session.commit()
+        print(f"  {offset + len(batch)} / {rows} lignes insérées")
+    session.execute(text("ANALYZE TABLE history"))
+
+
+def explain(session, sql, params):
+    print("  EXPLAIN :")
+    for row in session.execute(text("EXPLAIN " + sql), params).mappings():
+        print(f"    table={row['table']} type={row['type']} key={row['key']} rows={row['rows']} extra={row['Extra']}")
+
+
+def timed(label, function, repeat=5):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - started) * 1000)
+    print(f"{label}: min {min(durations):.1f} ms / moyenne {sum(durations) / len(durations):.1f} ms")
+
+
+def run_benchmark(session):
+    controller = HistoryController(session)
+    user_id = session.query(History.user_id).filter(History.user_id.isnot(None)).limit(1).scalar()
+    employee_id = session.query(History.idemploye).filter(History.idemploye.isnot(None)).limit(1).scalar()
+    gestion = GESTIONS[0]
+    total = session.execute(text("SELECT COUNT(*) FROM history")).scalar()
+    print(f"\nTable history : {total} lignes\n")
+
+    # (libellé, SQL équivalent pour EXPLAIN, paramètres, appel mesuré)
+    cases = [
+        ("Première page (timestamp, id)",
+         "SELECT id FROM history ORDER BY timestamp DESC, id DESC LIMIT 11", {},
+         lambda: controller.get_history_page(page_size=10)),
+        ("Page filtrée par gestion",
+         "SELECT id FROM history WHERE gestion = :gestion ORDER BY timestamp DESC, id DESC LIMIT 11",
+         {'gestion': gestion},
+         lambda: controller.get_history_page(page_size=10, gestion=gestion)),
+        ("get_history_by_gestion(limit=100)",
+         "SELECT id FROM history WHERE gestion = :gestion ORDER BY timestamp DESC LIMIT 100",
+         {'gestion': gestion},
+         lambda: controller.get_history_by_gestion(gestion, 100)),
+        ("Historique d'un utilisateur",
+         "SELECT id FROM history WHERE user_id = :user_id ORDER BY timestamp DESC LIMIT 11",
+         {'user_id': user_id},
+         lambda: session.query(History.id).filter(History.user_id == user_id)
+                        .order_by(History.timestamp.desc()).limit(11).all()),
+        ("get_history_by_entity('employee')",
+         "SELECT id FROM history WHERE idemploye = :employee_id ORDER BY timestamp DESC",
+         {'employee_id': employee_id},
+         lambda: controller.get_history_by_entity('employee', employee_id)),
+        ("Intervalle d'un jour",
+         "SELECT id FROM history WHERE timestamp >= :day AND timestamp < :next_day ORDER BY timestamp DESC",
+         {'day': datetime.now().date() - timedelta(days=30), 'next_day': datetime.now().date() - timedelta(days=29)},
+         lambda: controller.get_history_page(page_size=10, date_from=datetime.now().date() - timedelta(days=30),
+                                             date_to=datetime.now().date() - timedelta(days=30))),
+    ]
+
+    for label, sql, params, call in cases:
+        print(f"- {label}")
+        explain(session, sql, params)
+        timed("  temps", call)
+        session.expire_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des requêtes de l'historique")
+    parser.add_argument("--seed", type=int, default=0, help="Nombre de lignes de test à insérer avant la mesure")
+    args = parser.parse_args()
+
+    db = Database(user="hr", password="hr", host="localhost", db_name="HR", port=3306)
+    session = db.get_session()
+    try:
+        if args.seed:
+            print(f"Insertion de {args.seed} lignes de test...")
+            seed_history(session, args.seed)
+        run_benchmark(session)
+    finally:
+        db.close()
@@ -0,0 +1,50 @@
+import unittest
+from datetime import date
+
+import numpy as np
+
+from Controllers.cohort_analytics import EmployeeCohort, to_day_array
+
+
+def make_cohort(birth_dates, sexes, today):
+    count = len(birth_dates)
+    return EmployeeCohort(
+        employee_ids=range(1, count + 1),
+        birth_dates=to_day_array(birth_dates),
+        sexes=sexes,
+        services=[None] * count,
+        dependencies=[None] * count,
+        effective_dates=to_day_array([None] * count),
+        recruitment_dates=to_day_array([None] * count),
+        seniority_days=np.full(count, np.nan),
+        today=today
+    )
+
+
+class AgePyramidTest(unittest.TestCase):
+    def test_width_not_dividing_the_age_range(self):
+        today = date(2025, 6, 1)
+        # Âges : 19, 25, 62, 64, 65, 71
+        cohort = make_cohort(
+            [date(2006, 1, 1), date(2000, 1, 1), date(1963, 1, 1),
+             date(1961, 1, 1), date(1960, 1, 1), date(1954, 1, 1)],
+            ["ذكر"] * 6,
+            today
+        )
+
+        labels, pyramid = cohort.age_pyramid(bin_width=10)
+
+        self.assertEqual(labels, ["< 20", "20-29", "30-39", "40-49", "50-59", "60-64", "65+"])
+        self.assertEqual(list(pyramid["ذكر"]), [1, 1, 0, 0, 0, 2, 2])
+
+    def test_width_dividing_the_age_range(self):
+        cohort = make_cohort([date(1990, 1, 1)], ["أنثى"], date(2025, 6, 1))
+
+        labels, pyramid = cohort.age_pyramid(bin_width=5, min_age=20, max_age=40)
+
+        self.assertEqual(labels, ["< 20", "20-24", "25-29", "30-34", "35-39", "40+"])
+        self.assertEqual(list(pyramid["أنثى"]), [0, 0, 0, 0, 1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from datetime import date
+
+import numpy as np
+
+from Controllers.cohort_analytics import EmployeeCohort, to_day_array
+from Controllers.headcount_projection import HeadcountProjection
+
+
+def make_projection():
+    """
+    Cinq employés, projection à partir de janvier 2025 :
+    1 recruté en 2020 ; 2 recruté le 1er mars 2025 (date d'effet seulement) ;
+    3 atteint 60 ans le 20 avril 2025 ; 4 part définitivement le 1er février 2025 ;
+    5 en départ temporaire du 10 février au 5 avril 2025.
+    """
+    cohort = EmployeeCohort(
+        employee_ids=[1, 2, 3, 4, 5],
+        birth_dates=to_day_array([date(1980, 1, 1), date(1980, 1, 1), date(1965, 4, 20),
+                                  date(1980, 1, 1), date(1980, 1, 1)]),
+        sexes=["ذكر"] * 5,
+        services=["A", "A", "B", "B", None],
+        dependencies=["D1", "D1", "D1", "D2", "D2"],
+        effective_dates=to_day_array([None, date(2025, 3, 1), None, None, None]),
+        recruitment_dates=to_day_array([date(2020, 1, 1), None, date(2010, 1, 1),
+                                        date(2010, 1, 1), date(2010, 1, 1)]),
+        seniority_days=np.full(5, np.nan),
+        final_departure_dates=to_day_array([None, None, None, date(2025, 2, 1), None]),
+        today=date(2025, 1, 15)
+    )
+    # Le départ de l'employé 99 (absent de la cohorte) est ignoré
+    return HeadcountProjection(
+        cohort,
+        [5, 99],
+        to_day_array([date(2025, 2, 10), date(2025, 1, 1)]),
+        to_day_array([date(2025, 4, 5), date(2025, 12, 31)])
+    )
+
+
+class HeadcountProjectionTest(unittest.TestCase):
+    def test_monthly_headcount_by_service(self):
+        result = make_projection().project(months=6, retirement_age=60)
+
+        self.assertEqual(result['months'], ["2025-01", "2025-02", "2025-03", "2025-04", "2025-05", "2025-06"])
+        # A : hired in March ; B : departure in February, retirement in April ; غير محدد : temporary departure
+        self.assertEqual(result['groups'], {
+            "A": [1, 1, 2, 2, 2, 2],
+            "B": [2, 1, 1, 1, 0, 0],
+            "غير محدد": [1, 1, 0, 0, 1, 1],
+        })
+        self.assertEqual(result['total'], [4, 3, 3, 3, 3, 3])
+
+    def test_retirement_age_only_moves_the_cutoff(self):
+        projection = make_projection()
+        projection.project(months=6, retirement_age=60)
+
+        result = projection.project(months=6, retirement_age=65)
+
+        self.assertEqual(result['groups']["B"], [2, 1, 1, 1, 1, 1])
+        self.assertEqual(result['total'], [4, 3, 3, 3, 4, 4])
+
+    def test_group_by_dependency(self):
+        result = make_projection().project(months=6, retirement_age=60, group_by="dependency")
+
+        self.assertEqual(result['groups'], {
+            "D1": [2, 2, 3, 3, 2, 2],
+            "D2": [2, 1, 0, 0, 1, 1],
+        })
+
+    def test_unknown_grouping(self):
+        with self.assertRaises(ValueError):
+            make_projection().project(months=6, group_by="wilaya")
+
+    def test_retirements_per_month(self):
+        projection = make_projection()
+
+        self.assertEqual(projection.retirements_per_month(months=6, retirement_age=60), [0, 0, 0, 1, 0, 0])
+        self.assertEqual(projection.retirements_per_month(months=6, retirement_age=65), [0] * 6)
+
+    def test_projection_start(self):
+        result = make_projection().project(months=2, retirement_age=60, start=date(2025, 5, 1))
+
+        self.assertEqual(result['months'], ["2025-05", "2025-06"])
+        self.assertEqual(result['total'], [3, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+import random
+import unittest
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from sqlalchemy.exc import OperationalError
+
+from Controllers.schedule_index import Interval, IntervalTree, ScheduleIndex
+from Controllers.tranche_controller import TrancheController
+
+
+def day(offset):
+    return date(2025, 1, 1) + timedelta(days=offset)
+
+
+def brute_force(intervals, start, end):
+    return sorted(interval for interval in intervals if interval.start <= end and interval.end >= start)
+
+
+def random_interval(rng, record_id):
+    start = rng.randrange(0, 365)
+    return Interval(day(start), day(start + rng.randrange(0, 30)), rng.choice(["absence", "tranche"]), record_id, None)
+
+
+class FakeSession:
+    """Session sans base : aucune période enregistrée, compte les requêtes"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def execute(self, query):
+        self.queries += 1
+        return []
+
+
+class IntervalTreeTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(20250601)
+        for size in (0, 1, 2, 7, 64, 300):
+            intervals = [random_interval(rng, record_id) for record_id in range(size)]
+            tree = IntervalTree(intervals)
+            for _ in range(200):
+                start = rng.randrange(-10, 400)
+                end = start + rng.randrange(0, 40)
+                self.assertEqual(
+                    sorted(tree.overlapping(day(start), day(end))),
+                    brute_force(intervals, day(start), day(end))
+                )
+
+    def test_pending_buffer_and_rebuild(self):
+        rng = random.Random(7)
+        tree = IntervalTree([random_interval(rng, record_id) for record_id in range(10)])
+        intervals = list(tree)
+
+        # Au-delà de REBUILD_THRESHOLD ajouts, le tampon est fusionné dans l'arbre
+        for record_id in range(10, 10 + 2 * IntervalTree.REBUILD_THRESHOLD + 5):
+            interval = random_interval(rng, record_id)
+            tree.add(interval)
+            intervals.append(interval)
+            self.assertEqual(len(tree), len(intervals))
+            start = rng.randrange(0, 365)
+            self.assertEqual(
+                sorted(tree.overlapping(day(start), day(start + 10))),
+                brute_force(intervals, day(start), day(start + 10))
+            )
+        self.assertLessEqual(len(tree._pending), IntervalTree.REBUILD_THRESHOLD)
+
+    def test_remove(self):
+        rng = random.Random(11)
+        intervals = [random_interval(rng, record_id) for record_id in range(50)]
+        tree = IntervalTree(intervals[:40])
+        for interval in intervals[40:]:
+            tree.add(interval)
+
+        tree.remove(lambda interval: interval.record_id % 3 == 0)
+
+        kept = [interval for interval in intervals if interval.record_id % 3]
+        self.assertEqual(sorted(tree), sorted(kept))
+        for start in range(0, 365, 5):
+            self.assertEqual(
+                sorted(tree.overlapping(day(start), day(start + 3))),
+                brute_force(kept, day(start), day(start + 3))
+            )
+
+    def test_bounds_are_inclusive(self):
+        tree = IntervalTree([Interval(day(10), day(20), "absence", 1, None)])
+
+        self.assertEqual(len(tree.overlapping(day(20), day(25))), 1)
+        self.assertEqual(len(tree.overlapping(day(0), day(10))), 1)
+        self.assertEqual(tree.overlapping(day(21), day(25)), [])
+        self.assertEqual(tree.overlapping(day(0), day(9)), [])
+
+
+class ScheduleIndexTest(unittest.TestCase):
+    def make_index(self, intervals):
+        session = FakeSession()
+        index = ScheduleIndex(session, [])
+        index.trees[1] = IntervalTree(intervals)
+        return index, session
+
+    def test_conflicts_exclude_and_kinds(self):
+        absence = Interval(day(10), day(20), "absence", 5, "مبرر")
+        formation = Interval(day(15), day(25), "formation", 5, None)
+        index, _ = self.make_index([absence, formation])
+
+        self.assertEqual(index.conflicts(1, day(12), day(16)), [absence, formation])
+        # Même record_id mais autre type : seul l'enregistrement modifié est ignoré
+        self.assertEqual(index.conflicts(1, day(12), day(16), exclude=("absence", 5)), [formation])
+        self.assertEqual(index.conflicts(1, day(12), day(16), kinds={"absence"}), [absence])
+
+    def test_unknown_employee_is_loaded_once(self):
+        index, session = self.make_index([])
+
+        self.assertEqual(index.conflicts(2, day(0), day(5)), [])
+        self.assertEqual(index.conflicts(2, day(0), day(5)), [])
+        self.assertEqual(session.queries, 4)  # Quatre sources, une seule fois
+
+    def test_replace(self):
+        index, _ = self.make_index([Interval(day(10), day(20), "absence", 5, None)])
+
+        index.replace(1, Interval(day(30), day(35), "absence", 5, None))
+
+        self.assertEqual(index.conflicts(1, day(10), day(20)), [])
+        self.assertEqual(len(index.conflicts(1, day(30), day(30))), 1)
+
+    def test_validate_batch_reports_existing_and_self_conflicts(self):
+        existing = Interval(day(10), day(20), "absence", 5, None)
+        index, _ = self.make_index([existing])
+
+        report = index.validate_batch([
+            {"idemploye": 1, "start": day(0), "end": day(5), "kind": "tranche"},
+            {"idemploye": 1, "start": day(18), "end": day(22), "kind": "tranche"},
+            {"idemploye": 1, "start": day(3), "end": day(4), "kind": "tranche"},
+        ])
+
+        self.assertEqual([position for position, _, _ in report], [1, 2])
+        self.assertEqual(report[0][2], [existing])
+        self.assertEqual([(interval.start, interval.end) for interval in report[1][2]], [(day(0), day(5))])
+
+    def test_validate_batch_excludes_the_edited_record(self):
+        index, _ = self.make_index([Interval(day(10), day(20), "absence", 5, None)])
+
+        report = index.validate_batch([
+            {"idemploye": 1, "start": day(12), "end": day(25), "kind": "absence", "record_id": 5},
+        ])
+
+        self.assertEqual(report, [])
+        # L'enregistrement est remplacé, pas dupliqué
+        self.assertEqual([(interval.start, interval.end) for interval in index.trees[1]], [(day(12), day(25))])
+
+    def test_validate_batch_kinds(self):
+        index, _ = self.make_index([Interval(day(10), day(20), "formation", 3, None)])
+
+        report = index.validate_batch(
+            [{"idemploye": 1, "start": day(12), "end": day(14), "kind": "absence"}],
+            kinds={"absence", "tranche"}
+        )
+
+        self.assertEqual(report, [])
+
+
+class CreateTranchesIndexTest(unittest.TestCase):
+    """create_tranches : le lot indexé sans id par validate_batch est remplacé ou retiré"""
+
+    def setUp(self):
+        self.year = datetime.now().year
+        self.conge = SimpleNamespace(idConge=9, idemploye=1, NbrJoursAlloues=30, NbrJoursPris=0, NbrJoursRestants=30)
+
+        self.session = mock.MagicMock()
+        query = self.session.query.return_value.filter.return_value
+        query.first.return_value = self.conge
+        query.count.return_value = 0
+        self.added = []
+        self.session.add.side_effect = self.added.append
+
+        def assign_ids():
+            for position, tranche in enumerate(self.added):
+                tranche.idTranche = 100 + position
+        self.session.flush.side_effect = assign_ids
+
+        self.controller = TrancheController(self.session)
+        patcher = mock.patch.object(TrancheController, "log_history")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.schedule = ScheduleIndex(FakeSession(), [])
+        self.schedule.trees[1] = IntervalTree([Interval(date(self.year, 6, 1), date(self.year, 6, 10), "absence", 5, None)])
+
+    def tranche(self, start, end):
+        return {"numero_decision": 1, "date_decision": date(self.year, *start),
+                "date_debut": date(self.year, *start), "date_fin": date(self.year, *end)}
+
+    def indexed_tranches(self):
+        return sorted(interval.record_id for interval in self.schedule.trees[1] if interval.kind == "tranche")
+
+    def test_created_tranches_are_indexed_with_their_ids(self):
+        self.controller.create_tranches(9, [self.tranche((2, 1), (2, 3)), self.tranche((3, 1), (3, 2))],
+                                        schedule=self.schedule)
+
+        self.assertEqual(self.indexed_tranches(), [100, 101])
+
+    def test_overlap_leaves_no_pending_interval(self):
+        with self.assertRaises(ValueError):
+            self.controller.create_tranches(9, [self.tranche((2, 1), (2, 3)), self.tranche((6, 5), (6, 6))],
+                                            schedule=self.schedule)
+
+        self.assertEqual(self.indexed_tranches(), [])
+        self.session.commit.assert_not_called()
+
+    def test_database_error_leaves_no_pending_interval(self):
+        self.session.commit.side_effect = OperationalError("INSERT", {}, Exception("Lost connection"))
+
+        with self.assertRaises(OperationalError):
+            self.controller.create_tranches(9, [self.tranche((2, 1), (2, 3))], schedule=self.schedule)
+
+        self.assertEqual(self.indexed_tranches(), [])
+        self.session.rollback.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
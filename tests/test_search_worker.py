@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy.exc import OperationalError
+
+from Views.SearchWorker import EmployeeSearchWorker
+
+
+class EmployeeSearchWorkerTest(unittest.TestCase):
+    def make_worker(self, signals, session):
+        return EmployeeSearchWorker(
+            request_id=7,
+            search_term="أحمد",
+            session_factory=lambda: session,
+            row_builder=lambda employe, carriere: (employe, carriere),
+            is_current=lambda request_id: True,
+            signals=signals
+        )
+
+    @mock.patch("Views.SearchWorker.EmployeeController")
+    def test_failing_search_emits_failed(self, controller_class):
+        controller_class.return_value.search_employees.side_effect = OperationalError(
+            "SELECT", {}, Exception("Can't find FULLTEXT index matching the column list")
+        )
+        signals, session = mock.Mock(), mock.Mock()
+
+        self.make_worker(signals, session).run()
+
+        signals.failed.emit.assert_called_once()
+        request_id, message = signals.failed.emit.call_args.args
+        self.assertEqual(request_id, 7)
+        self.assertIn("FULLTEXT", message)
+        signals.rows_ready.emit.assert_not_called()
+        signals.finished.emit.assert_called_once_with(7)
+        session.close.assert_called_once()
+
+    @mock.patch("Views.SearchWorker.EmployeeController")
+    def test_empty_search_sends_one_empty_chunk(self, controller_class):
+        controller_class.return_value.search_employees.return_value = []
+        signals = mock.Mock()
+
+        self.make_worker(signals, mock.Mock()).run()
+
+        signals.rows_ready.emit.assert_called_once_with(7, [], True)
+        signals.failed.emit.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
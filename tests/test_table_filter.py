@@ -0,0 +1,148 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql
+
+from Controllers.EmployeController import EmployeeController
+from Controllers.conge_controller import CongeController
+from Controllers.table_filter import TableFilter, compile_field_filters, compile_table_filter, paginate
+from Models.Conge import Conge
+from Models.Employe import Employe
+
+
+def to_mysql(query, clause):
+    """(clause WHERE, paramètres) de la requête filtrée par `clause`, compilée pour MySQL"""
+    compiled = query.where(clause).compile(dialect=mysql.dialect())
+    return str(compiled).split("\nWHERE ", 1)[1], compiled.params
+
+
+class CompileTableFilterTest(unittest.TestCase):
+    columns = CongeController.FILTER_COLUMNS
+
+    def compile(self, table_filter):
+        query = select(Conge.idConge).outerjoin(Employe, Employe.idemploye == Conge.idemploye)
+        return to_mysql(query, compile_table_filter(table_filter, self.columns))
+
+    def test_empty_filter_gives_no_clause(self):
+        self.assertIsNone(compile_table_filter(None, self.columns))
+        self.assertIsNone(compile_table_filter(TableFilter(["السنة"], "   "), self.columns))
+        self.assertIsNone(compile_table_filter(TableFilter([], "2024"), self.columns))
+
+    def test_unknown_label_matches_nothing(self):
+        sql, _ = self.compile(TableFilter(["عمود غير موجود"], "2024"))
+
+        self.assertEqual(sql, "false = 1")
+
+    def test_unknown_labels_are_skipped_next_to_known_ones(self):
+        sql, _ = self.compile(TableFilter(["عمود غير موجود", "اللقب"], "x"))
+
+        self.assertNotIn("false", sql)
+        self.assertIn("employes.`Nom` LIKE", sql)
+
+    def test_non_text_columns_are_cast(self):
+        sql, _ = self.compile(TableFilter(["السنة", "اللقب"], "2024"))
+
+        self.assertIn("CAST(conges.`Annee` AS CHAR)", sql)
+        self.assertNotIn("CAST(employes.`Nom`", sql)
+        self.assertIn(" OR ", sql)
+
+    def test_like_wildcards_are_escaped(self):
+        sql, params = self.compile(TableFilter(["اللقب"], "50%_a"))
+
+        self.assertIn("ESCAPE '/'", sql)
+        self.assertIn("50/%/_a", params.values())
+
+    def test_two_line_headers_match_their_label(self):
+        table_filter = TableFilter(["عدد الأيام\nالمستحقة"], "30")
+
+        self.assertEqual(table_filter.columns, ["عدد الأيام المستحقة"])
+        sql, _ = self.compile(table_filter)
+        self.assertIn("CAST(conges.`NbrJoursAlloues` AS CHAR)", sql)
+
+
+class CompileFieldFiltersTest(unittest.TestCase):
+    fields = EmployeeController.FILTER_FIELDS
+    joins = EmployeeController.FILTER_JOINS
+
+    def compile(self, criteria):
+        clause = compile_field_filters(criteria, self.fields, self.joins)
+        return to_mysql(select(Employe.idemploye), clause) if clause is not None else (None, None)
+
+    def test_no_criteria_gives_no_clause(self):
+        self.assertEqual(self.compile({}), (None, None))
+        self.assertEqual(self.compile({"اللقب": "", "معيار مجهول": "x"}), (None, None))
+
+    def test_clause_follows_registry_order(self):
+        sql, params = self.compile({"الاسم": "أحمد", "رقم الموظف": "12"})
+        reversed_sql, _ = self.compile({"رقم الموظف": "12", "الاسم": "أحمد"})
+
+        self.assertEqual(sql, reversed_sql)
+        id_position = sql.index("employes.idemploye = ")
+        name_position = sql.index("employes.`Prenom` LIKE")
+        self.assertLess(id_position, name_position)
+        self.assertIn(" AND ", sql)
+        self.assertIn(12, params.values())
+
+    def test_prefix_operator(self):
+        sql, params = self.compile({"اللقب": "بن%"})
+
+        self.assertIn("employes.`Nom` LIKE concat(", sql)
+        self.assertIn("ESCAPE '/'", sql)
+        self.assertIn("بن/%", params.values())
+
+    def test_current_degree_uses_correlated_exists(self):
+        sql, params = self.compile({"الدرجة الحالية": "3"})
+
+        self.assertEqual(sql.count("EXISTS (SELECT"), 2)
+        self.assertIn("FROM permanents \nWHERE permanents.idemploye = employes.idemploye", sql)
+        self.assertIn("FROM contractuels \nWHERE contractuels.idemploye = employes.idemploye", sql)
+        self.assertIn("CAST(contractuels.percentage AS CHAR)", sql)
+        self.assertIn(" OR ", sql)
+        self.assertIn(3, params.values())
+
+    def test_non_numeric_degree_only_checks_the_percentage(self):
+        sql, _ = self.compile({"الدرجة الحالية": "5.5"})
+
+        # L'alternative des titulaires (false) disparaît du OR
+        self.assertTrue(sql.startswith("EXISTS (SELECT"))
+        self.assertNotIn("permanents", sql)
+
+    def test_non_numeric_id_matches_nothing(self):
+        sql, _ = self.compile({"رقم الموظف": "abc"})
+
+        self.assertEqual(sql, "false = 1")
+
+    def test_date_range(self):
+        sql, params = self.compile({"تاريخ الميلاد": ("1980-01-01", None)})
+
+        self.assertIn("employes.`Datedenaissance` >= ", sql)
+        self.assertNotIn("<=", sql)
+        self.assertIn("1980-01-01", params.values())
+
+
+class PaginateTest(unittest.TestCase):
+    def make_query(self, total, rows):
+        query = mock.MagicMock()
+        query.order_by.return_value.count.return_value = total
+        query.offset.return_value.limit.return_value.all.return_value = rows
+        return query
+
+    def test_page_offset_and_total(self):
+        query = self.make_query(42, ["a", "b"])
+
+        self.assertEqual(paginate(query, 3, 10), (["a", "b"], 42))
+        query.order_by.assert_called_once_with(None)
+        query.offset.assert_called_once_with(20)
+        query.offset.return_value.limit.assert_called_once_with(10)
+
+    def test_page_below_one_is_the_first_page(self):
+        query = self.make_query(5, [])
+
+        paginate(query, 0, 10)
+
+        query.offset.assert_called_once_with(0)
+
+
+if __name__ == "__main__":
+    unittest.main()